@@ -1,10 +1,16 @@
 import streamlit as st
-from PIL import Image
+from utils.warmup import show_model_status
+from utils.assets import get_asset_pipeline
+from utils.lazy_imports import preload
 
 # Set the page config for a better layout and title
 st.set_page_config(page_title="Healthcare Multi-Page App", layout="wide")
 
-st.image("assets/HealthBridge.jpg", use_container_width =True)
+# Served as a pre-sized WebP variant instead of decoding the full-size JPEG on every run
+st.image(get_asset_pipeline().image_src("assets/HealthBridge.jpg", 1600), use_container_width =True)
+
+# Starts loading the assistant's model once per server process
+show_model_status()
 
 # Title and header for the landing page
 st.title("Welcome to the Healthcare Multi-Page App")
@@ -65,3 +71,7 @@ st.markdown("""
     ---
     **Contact Us**: support@healthcareapp.com
 """)
+
+# Once the page is drawn, import the data and chart libraries in the
+# background so the Dashboard and Cohort pages open without waiting on them
+preload()
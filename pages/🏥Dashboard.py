@@ -1,20 +1,19 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
-import warnings
-warnings.filterwarnings('ignore')
+from utils.lazy_imports import np, pd, px, go, make_subplots
+from utils.vitals_generator import generate_vitals, generate_lab_history
+from utils.lab_ranges import classify_labs
+from utils.vitals_store import get_vitals_store
+from utils.vitals_aggregates import get_vitals_aggregates
+from utils.alert_rules import AlertEngine
+from utils.downsample import downsample_frame, FULL_WIDTH_PX, HALF_WIDTH_PX
+from utils.figure_cache import get_figure_cache, fingerprint
 
 st.set_page_config(page_title="Dashboard", page_icon="🏥", layout="wide")
 st.title("🏥 Medical History Dashboard")
 
 @st.cache_data
 def generate_sample_data():
-    np.random.seed(42)
-    
     # Patient basic info
     patient_info = {
         'Name': 'Ali',
@@ -26,32 +25,22 @@ def generate_sample_data():
         'BMI': 25.5
     }
     
-    # Generate vital signs data over time
-    dates = pd.date_range(start='2023-01-01', end='2024-12-31', freq='M')
-    vitals_data = []
-    
-    for date in dates:
-        vitals_data.append({
-            'Date': date,
-            'Systolic_BP': np.random.normal(130, 15),
-            'Diastolic_BP': np.random.normal(85, 10),
-            'Heart_Rate': np.random.normal(75, 8),
-            'Temperature': np.random.normal(98.6, 0.5),
-            'Weight': np.random.normal(78, 2),
-            'Blood_Sugar': np.random.normal(100, 20)
-        })
-    
-    vitals_df = pd.DataFrame(vitals_data)
-    
-    # Lab results
+    # Lab results (latest draw); Status is computed from the reference range below
     lab_data = {
+        'Date': pd.Timestamp('2024-12-31'),
         'Test': ['Hemoglobin', 'White Blood Cells', 'Cholesterol', 'HDL', 'LDL', 'Triglycerides', 'Creatinine', 'BUN'],
         'Value': [14.2, 6.8, 195, 45, 125, 150, 1.1, 18],
         'Unit': ['g/dL', '10³/μL', 'mg/dL', 'mg/dL', 'mg/dL', 'mg/dL', 'mg/dL', 'mg/dL'],
         'Reference_Range': ['13.5-17.5', '4.0-11.0', '<200', '>40', '<100', '<150', '0.7-1.3', '7-20'],
-        'Status': ['Normal', 'Normal', 'Borderline High', 'Low', 'High', 'Normal', 'Normal', 'Normal']
     }
-    lab_df = pd.DataFrame(lab_data)
+    
+    # Earlier quarterly draws, then every result classified in one pass
+    earlier_labs = generate_lab_history(1, start='2023-01-01', end='2024-09-30', freq='QE', seed=42)
+    lab_history = classify_labs(pd.concat(
+        [earlier_labs.drop(columns='patient_id').astype({'Test': str}), pd.DataFrame(lab_data)],
+        ignore_index=True
+    ))
+    lab_df = lab_history[lab_history['Date'] == lab_history['Date'].max()].reset_index(drop=True)
     
     # Medical history
     medical_history = [
@@ -71,11 +60,27 @@ def generate_sample_data():
     ]
     medications_df = pd.DataFrame(medications)
     
-    return patient_info, vitals_df, lab_df, history_df, medications_df
+    return patient_info, lab_df, lab_history, history_df, medications_df
+
+
+SAMPLE_PATIENT_ID = 0
+
+@st.cache_resource
+def load_vitals_store():
+    # Vital signs live in the on-disk store; the sample patient is written once
+    store = get_vitals_store()
+    if not store.has_patient(SAMPLE_PATIENT_ID):
+        store.write(generate_vitals(1, start='2023-01-01', end='2024-12-31', freq='ME', seed=42, vary_patients=False))
+    return store
 
 
 # Load data
-patient_info, vitals_df, lab_df, history_df, medications_df = generate_sample_data()
+patient_info, lab_df, lab_history, history_df, medications_df = generate_sample_data()
+vitals_store = load_vitals_store()
+vitals_aggregates = get_vitals_aggregates(vitals_store)
+patient_id = SAMPLE_PATIENT_ID
+alert_engine = AlertEngine()
+figure_cache = get_figure_cache()
 
 # Sidebar for patient selection and filters
 st.sidebar.header("Patient Information")
@@ -94,20 +99,25 @@ tab1, tab2, tab3, tab4 = st.tabs(["📊 Overview", "💓 Vital Signs", "🧪 Lab
 with tab1:
     st.header("Patient Overview & Key Insights")
     
+    # Maintained incrementally as readings arrive; reading it does not touch the history
+    vitals_summary = vitals_aggregates.get(vitals_store, patient_id)
+    latest = vitals_summary['last']
+    recent = vitals_summary['windows']['recent']
+
     # Key metrics
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        latest_bp = f"{vitals_df['Systolic_BP'].iloc[-1]:.0f}/{vitals_df['Diastolic_BP'].iloc[-1]:.0f}"
+        latest_bp = f"{latest['Systolic_BP']:.0f}/{latest['Diastolic_BP']:.0f}"
         st.metric("Latest Blood Pressure", latest_bp, delta="Normal Range")
     
     with col2:
-        latest_hr = f"{vitals_df['Heart_Rate'].iloc[-1]:.0f} bpm"
+        latest_hr = f"{latest['Heart_Rate']:.0f} bpm"
         st.metric("Heart Rate", latest_hr, delta="Normal")
     
     with col3:
-        latest_weight = f"{vitals_df['Weight'].iloc[-1]:.1f} kg"
-        st.metric("Current Weight", latest_weight, delta=f"{vitals_df['Weight'].iloc[-1] - vitals_df['Weight'].iloc[0]:+.1f}")
+        latest_weight = f"{latest['Weight']:.1f} kg"
+        st.metric("Current Weight", latest_weight, delta=f"{latest['Weight'] - vitals_summary['first']['Weight']:+.1f}")
     
     with col4:
         active_conditions = len(history_df[history_df['Status'].isin(['Ongoing', 'Controlled'])])
@@ -122,8 +132,8 @@ with tab1:
         st.subheader("🎯 Clinical Insights")
         
         # Analyze trends
-        bp_trend = "increasing" if vitals_df['Systolic_BP'].iloc[-3:].mean() > vitals_df['Systolic_BP'].iloc[:3].mean() else "stable"
-        weight_change = vitals_df['Weight'].iloc[-1] - vitals_df['Weight'].iloc[0]
+        bp_trend = "increasing" if recent['Systolic_BP']['mean'] > vitals_summary['baseline_mean']['Systolic_BP'] else "stable"
+        weight_change = latest['Weight'] - vitals_summary['first']['Weight']
         
         insights = [
             f"Blood pressure trend: {bp_trend.upper()}",
@@ -138,20 +148,12 @@ with tab1:
     with col2:
         st.subheader("⚠️ Health Alerts")
         
-        # Check for alerts based on latest values
-        alerts = []
-        latest_systolic = vitals_df['Systolic_BP'].iloc[-1]
-        latest_sugar = vitals_df['Blood_Sugar'].iloc[-1]
-        
-        if latest_systolic > 140:
-            alerts.append("High blood pressure detected [Please consult physician]")
-        if latest_sugar > 126:
-            alerts.append("Elevated blood sugar [Please monitor closely]")
-    
-        # Check lab results
-        high_lab_values = lab_df[lab_df['Status'].str.contains('High|Borderline')]
-        for _, row in high_lab_values.iterrows():
-            alerts.append(f"**{row['Test']}** -  {row['Status']} - {row['Value']} {row['Unit']}")
+        # Rules live in utils/alert_rules.py; the same engine runs cohort-wide sweeps
+        alert_table = alert_engine.evaluate(
+            features=alert_engine.features_from_aggregates(patient_id, vitals_summary),
+            labs=lab_df.assign(patient_id=patient_id)
+        )
+        alerts = alert_table['message'].tolist()
         
         if alerts:
             for alert in alerts:
@@ -196,12 +198,15 @@ with tab1:
         st.subheader("Condition Status")
         
         status_counts = history_df['Status'].value_counts()
-        fig_status = px.bar(
-            x=status_counts.values,
-            y=status_counts.index,
-            orientation='h',
-            title="Current Status Distribution",
-            labels={"x": "Number of Records", "y": "Status Type"}
+        fig_status = figure_cache.get_or_build(
+            patient_id, 'condition_status', fingerprint(status_counts),
+            lambda: px.bar(
+                x=status_counts.values,
+                y=status_counts.index,
+                orientation='h',
+                title="Current Status Distribution",
+                labels={"x": "Number of Records", "y": "Status Type"}
+            )
         )
         st.plotly_chart(fig_status, use_container_width=True)
 
@@ -215,65 +220,104 @@ with tab2:
         st.header("Vital Signs Monitoring")
 
     with col2:
+        first_date, last_date = vitals_store.time_bounds(patient_id)
         date_range = st.date_input(
             "Select Date Range",
-            value=(vitals_df['Date'].min(), vitals_df['Date'].max()),
-            min_value=vitals_df['Date'].min(),
-            max_value=vitals_df['Date'].max()
+            value=(first_date, last_date),
+            min_value=first_date,
+            max_value=last_date
         )  
     
-    # Filter data based on date range
-    mask = (vitals_df['Date'] >= pd.to_datetime(date_range[0])) & (vitals_df['Date'] <= pd.to_datetime(date_range[1]))
-    filtered_vitals = vitals_df.loc[mask]
-    
-    # Blood pressure chart
-    fig_bp = make_subplots(specs=[[{"secondary_y": True}]])
-    
-    fig_bp.add_trace(
-        go.Scatter(x=filtered_vitals['Date'], y=filtered_vitals['Systolic_BP'], 
-                  name='Systolic BP', line=dict(color='red', width=2)),
-        secondary_y=False,
-    )
-    
-    fig_bp.add_trace(
-        go.Scatter(x=filtered_vitals['Date'], y=filtered_vitals['Diastolic_BP'], 
-                  name='Diastolic BP', line=dict(color='blue', width=2)),
-        secondary_y=False,
+    # Read only the selected date range from the store (whole end day included)
+    range_end = date_range[1] if len(date_range) > 1 else date_range[0]
+    filtered_vitals = vitals_store.read_frame(
+        patient_id,
+        start=pd.to_datetime(date_range[0]),
+        end=pd.to_datetime(range_end) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
     )
+
+    # Thin each series to roughly one point per pixel; narrowing the date
+    # range re-reads the store, so the same budget then shows finer detail
+    bp_points = downsample_frame(filtered_vitals, 'Date', ['Systolic_BP', 'Diastolic_BP'], FULL_WIDTH_PX,
+                                 thresholds={'Systolic_BP': [140], 'Diastolic_BP': [90]})
+    hr_points = downsample_frame(filtered_vitals, 'Date', ['Heart_Rate'], HALF_WIDTH_PX,
+                                 thresholds={'Heart_Rate': [100, 60]})
+    weight_points = downsample_frame(filtered_vitals, 'Date', ['Weight'], HALF_WIDTH_PX, method='minmax')
+    sugar_points = downsample_frame(filtered_vitals, 'Date', ['Blood_Sugar'], FULL_WIDTH_PX,
+                                    thresholds={'Blood_Sugar': [126, 100]})
+    if len(bp_points) < len(filtered_vitals):
+        st.caption(f"Charts show {len(bp_points):,} of {len(filtered_vitals):,} readings; "
+                   "narrow the date range for full detail.")
+    
+    # Figures are cached per data slice; a new write to the store bumps the version
+    vitals_version = vitals_store.version(patient_id)
     
-    # Reference lines for chart
-    fig_bp.add_hline(y=140, line_dash="dash", line_color="red", annotation_text="High BP Threshold")
-    fig_bp.add_hline(y=90, line_dash="dash", line_color="orange", annotation_text="High Diastolic Threshold")
-    
-    fig_bp.update_layout(title="Blood Pressure Trends", height=400)
-    fig_bp.update_xaxes(title_text="Date")
-    fig_bp.update_yaxes(title_text="Blood Pressure (mmHg)", secondary_y=False)
+    # Blood pressure chart
+    def build_bp_chart():
+        fig_bp = make_subplots(specs=[[{"secondary_y": True}]])
+        
+        fig_bp.add_trace(
+            go.Scatter(x=bp_points['Date'], y=bp_points['Systolic_BP'], 
+                      name='Systolic BP', line=dict(color='red', width=2)),
+            secondary_y=False,
+        )
+        
+        fig_bp.add_trace(
+            go.Scatter(x=bp_points['Date'], y=bp_points['Diastolic_BP'], 
+                      name='Diastolic BP', line=dict(color='blue', width=2)),
+            secondary_y=False,
+        )
+        
+        # Reference lines for chart
+        fig_bp.add_hline(y=140, line_dash="dash", line_color="red", annotation_text="High BP Threshold")
+        fig_bp.add_hline(y=90, line_dash="dash", line_color="orange", annotation_text="High Diastolic Threshold")
+        
+        fig_bp.update_layout(title="Blood Pressure Trends", height=400)
+        fig_bp.update_xaxes(title_text="Date")
+        fig_bp.update_yaxes(title_text="Blood Pressure (mmHg)", secondary_y=False)
+        return fig_bp
     
+    fig_bp = figure_cache.get_or_build(patient_id, 'blood_pressure', fingerprint(bp_points),
+                                       build_bp_chart, version=vitals_version)
     st.plotly_chart(fig_bp, use_container_width=True)
     
     # Other vital signs
     col1, col2 = st.columns(2)
     
     with col1:
-        fig_hr = px.line(filtered_vitals, x='Date', y='Heart_Rate', 
-                        title='Heart Rate Over Time',
-                        labels={'Heart_Rate': 'Heart Rate (bpm)'})
-        fig_hr.add_hline(y=100, line_dash="dash", line_color="red", annotation_text="High HR")
-        fig_hr.add_hline(y=60, line_dash="dash", line_color="blue", annotation_text="Low HR")
+        def build_hr_chart():
+            fig_hr = px.line(hr_points, x='Date', y='Heart_Rate', 
+                            title='Heart Rate Over Time',
+                            labels={'Heart_Rate': 'Heart Rate (bpm)'})
+            fig_hr.add_hline(y=100, line_dash="dash", line_color="red", annotation_text="High HR")
+            fig_hr.add_hline(y=60, line_dash="dash", line_color="blue", annotation_text="Low HR")
+            return fig_hr
+        
+        fig_hr = figure_cache.get_or_build(patient_id, 'heart_rate', fingerprint(hr_points),
+                                           build_hr_chart, version=vitals_version)
         st.plotly_chart(fig_hr, use_container_width=True)
     
     with col2:
-        fig_weight = px.line(filtered_vitals, x='Date', y='Weight', 
-                           title='Weight Tracking',
-                           labels={'Weight': 'Weight (kg)'})
+        fig_weight = figure_cache.get_or_build(
+            patient_id, 'weight', fingerprint(weight_points),
+            lambda: px.line(weight_points, x='Date', y='Weight', 
+                            title='Weight Tracking',
+                            labels={'Weight': 'Weight (kg)'}),
+            version=vitals_version
+        )
         st.plotly_chart(fig_weight, use_container_width=True)
     
     # Blood sugar monitoring
-    fig_sugar = px.line(filtered_vitals, x='Date', y='Blood_Sugar', 
-                       title='Blood Sugar Levels',
-                       labels={'Blood_Sugar': 'Blood Sugar (mg/dL)'})
-    fig_sugar.add_hline(y=126, line_dash="dash", line_color="red", annotation_text="Diabetes Threshold")
-    fig_sugar.add_hline(y=100, line_dash="dash", line_color="orange", annotation_text="Pre-diabetes")
+    def build_sugar_chart():
+        fig_sugar = px.line(sugar_points, x='Date', y='Blood_Sugar', 
+                           title='Blood Sugar Levels',
+                           labels={'Blood_Sugar': 'Blood Sugar (mg/dL)'})
+        fig_sugar.add_hline(y=126, line_dash="dash", line_color="red", annotation_text="Diabetes Threshold")
+        fig_sugar.add_hline(y=100, line_dash="dash", line_color="orange", annotation_text="Pre-diabetes")
+        return fig_sugar
+    
+    fig_sugar = figure_cache.get_or_build(patient_id, 'blood_sugar', fingerprint(sugar_points),
+                                          build_sugar_chart, version=vitals_version)
     st.plotly_chart(fig_sugar, use_container_width=True)
 
 
@@ -293,7 +337,8 @@ with tab3:
             'Normal': '✅',
             'High': '🔴',
             'Low': '🔵',
-            'Borderline High': '🟡'
+            'Borderline High': '🟡',
+            'Borderline Low': '🟠'
         })
         
         st.dataframe(
@@ -306,8 +351,11 @@ with tab3:
         st.subheader("Lab Status Summary")
         
         status_counts = lab_df['Status'].value_counts()
-        fig_pie = px.pie(values=status_counts.values, names=status_counts.index,
-                        title="Lab Results Distribution")
+        fig_pie = figure_cache.get_or_build(
+            patient_id, 'lab_status', fingerprint(status_counts),
+            lambda: px.pie(values=status_counts.values, names=status_counts.index,
+                           title="Lab Results Distribution")
+        )
         st.plotly_chart(fig_pie, use_container_width=True)
     
     # Detailed analysis
@@ -316,27 +364,54 @@ with tab3:
     # Cholesterol panel visualization
     cholesterol_data = lab_df[lab_df['Test'].isin(['Cholesterol', 'HDL', 'LDL', 'Triglycerides'])]
     
-    fig_chol = go.Figure()
-    
-    colors = ['red' if status in ['High', 'Borderline High'] else 'green' if status == 'Normal' else 'blue' 
-              for status in cholesterol_data['Status']]
-    
-    fig_chol.add_trace(go.Bar(
-        x=cholesterol_data['Test'],
-        y=cholesterol_data['Value'],
-        marker_color=colors,
-        text=cholesterol_data['Value'],
-        textposition='auto',
-    ))
-    
-    fig_chol.update_layout(
-        title="Cholesterol Panel Results",
-        xaxis_title="Test",
-        yaxis_title="Value (mg/dL)",
-        height=400
-    )
+    def build_cholesterol_chart():
+        fig_chol = go.Figure()
+        
+        colors = ['red' if status in ['High', 'Borderline High'] else 'green' if status == 'Normal' else 'blue' 
+                  for status in cholesterol_data['Status']]
+        
+        fig_chol.add_trace(go.Bar(
+            x=cholesterol_data['Test'],
+            y=cholesterol_data['Value'],
+            marker_color=colors,
+            text=cholesterol_data['Value'],
+            textposition='auto',
+        ))
+        
+        fig_chol.update_layout(
+            title="Cholesterol Panel Results",
+            xaxis_title="Test",
+            yaxis_title="Value (mg/dL)",
+            height=400
+        )
+        return fig_chol
     
+    fig_chol = figure_cache.get_or_build(patient_id, 'cholesterol_panel',
+                                         fingerprint(cholesterol_data[['Test', 'Value', 'Status']]),
+                                         build_cholesterol_chart)
     st.plotly_chart(fig_chol, use_container_width=True)
+
+    # Lab history
+    st.subheader("Lab History")
+
+    history_test = st.selectbox("Test", lab_df['Test'].tolist())
+    test_history = lab_history[lab_history['Test'] == history_test]
+    def build_lab_history_chart():
+        fig_lab_history = px.line(test_history, x='Date', y='Value', markers=True,
+                                  title=f"{history_test} Over Time",
+                                  labels={'Value': f"{history_test} ({test_history['Unit'].iloc[-1]})"})
+        range_low, range_high = test_history['Range_Low'].iloc[-1], test_history['Range_High'].iloc[-1]
+        if np.isfinite(range_high):
+            fig_lab_history.add_hline(y=range_high, line_dash="dash", line_color="red", annotation_text="Upper limit")
+        if np.isfinite(range_low):
+            fig_lab_history.add_hline(y=range_low, line_dash="dash", line_color="blue", annotation_text="Lower limit")
+        return fig_lab_history
+    
+    fig_lab_history = figure_cache.get_or_build(
+        patient_id, 'lab_history', fingerprint(history_test, test_history[['Date', 'Value', 'Unit', 'Range_Low', 'Range_High']]),
+        build_lab_history_chart
+    )
+    st.plotly_chart(fig_lab_history, use_container_width=True)
     
 #===========================================================================================================
 
@@ -346,7 +421,8 @@ with tab4:
     st.subheader("Active Prescriptions")
     
     # Display medications 
-    for _, med in medications_df.iterrows():
+    medication_notes = alert_engine.medication_notes_for(medications_df['Medication'])
+    for i, med in medications_df.iterrows():
         with st.expander(f"💊 {med['Medication']} - {med['Dosage']}"):
             col1, col2 = st.columns(2)
             
@@ -358,13 +434,6 @@ with tab4:
             with col2:
                 st.write(f"**Purpose:** {med['Purpose']}")
                 
-                # Add some medication-specific notes (IF-THEN)
-                if 'Lisinopril' in med['Medication']:
-                    st.info("Monitor blood pressure regularly. Report any persistent cough.")
-                elif 'Metformin' in med['Medication']:
-                    st.info("Take with food. Monitor blood sugar levels.")
-                elif 'Atorvastatin' in med['Medication']:
-                    st.info("Take in the evening. Annual liver function tests recommended.")
-                elif 'Sertraline' in med['Medication']:
-                    st.info("May take 4-6 weeks for full effect. Monitor mood changes.")
-    
+                # Medication-specific notes (rules in utils/alert_rules.py)
+                if medication_notes[i]:
+                    st.info(medication_notes[i])
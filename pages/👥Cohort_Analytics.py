@@ -0,0 +1,83 @@
+import streamlit as st
+from datetime import date
+from utils import config
+from utils.lazy_imports import px
+from utils.cohort_analytics import DEFAULT_COHORT, cohort_key, compute_cohort
+
+st.set_page_config(page_title="Cohort Analytics", page_icon="👥", layout="wide")
+st.title("👥 Cohort Analytics")
+st.markdown("Population views across a synthetic patient cohort: blood pressure control, lab status and condition status.")
+
+# Cohort definition
+st.sidebar.header("Cohort Definition")
+with st.sidebar.form("cohort_definition"):
+    n_patients = st.select_slider("Population size", options=[500, 1000, 2000, 5000, 10000, 20000],
+                                  value=DEFAULT_COHORT["n_patients"])
+    min_age, max_age = st.slider("Age range", 18, 89, (DEFAULT_COHORT["min_age"], DEFAULT_COHORT["max_age"]))
+    genders = st.multiselect("Gender", ["Female", "Male"], default=DEFAULT_COHORT["genders"])
+    period = st.date_input("Readings period", value=(date(2024, 1, 1), date(2024, 12, 31)),
+                           min_value=date(2020, 1, 1), max_value=date(2024, 12, 31))
+    st.form_submit_button("Update Cohort")
+
+period_end = period[1] if len(period) > 1 else period[0]
+definition = {
+    "n_patients": n_patients,
+    "min_age": min_age,
+    "max_age": max_age,
+    "genders": genders,
+    "start": period[0].isoformat(),
+    "end": period_end.isoformat(),
+}
+
+# Shards run in the process pool; an identical definition is served from the cache
+with st.spinner("Computing cohort features..."):
+    cohort = compute_cohort(cohort_key(definition))
+
+if not cohort["patients"]:
+    st.warning("No patients match this cohort definition.")
+    st.stop()
+
+st.caption(f"{cohort['shards']} shards computed in {cohort['seconds']:.2f}s "
+           f"on up to {config.COHORT_WORKERS} worker processes (cached per cohort definition).")
+
+col1, col2, col3 = st.columns(3)
+col1.metric("Patients in Cohort", f"{cohort['patients']:,}")
+col2.metric("Uncontrolled BP", f"{cohort['uncontrolled_bp']:,}")
+col3.metric("Uncontrolled BP Share", f"{cohort['uncontrolled_share']:.1%}")
+
+st.markdown("---")
+
+tab1, tab2, tab3 = st.tabs(["💓 Blood Pressure", "🧪 Lab Status", "🩺 Conditions"])
+
+with tab1:
+    st.subheader("Uncontrolled Blood Pressure by Group")
+    st.caption("Uncontrolled: 30-day average at or above 140 systolic or 90 diastolic mmHg.")
+    by_group = cohort["by_group"]
+    fig_bp = px.bar(by_group, x="Age Band", y="Uncontrolled Share", color="Gender", barmode="group",
+                    title="Share of Patients with Uncontrolled BP", labels={"Uncontrolled Share": "Share of patients"})
+    fig_bp.update_yaxes(tickformat=".0%")
+    st.plotly_chart(fig_bp, use_container_width=True)
+    st.dataframe(by_group, use_container_width=True, hide_index=True)
+
+with tab2:
+    lab_status = cohort["lab_status"]
+    col1, col2 = st.columns([2, 1])
+
+    with col1:
+        fig_labs = px.bar(lab_status, x="Test", y="Count", color="Status", title="Lab Status by Test",
+                          category_orders={"Status": list(lab_status["Status"].cat.categories)})
+        st.plotly_chart(fig_labs, use_container_width=True)
+
+    with col2:
+        status_counts = lab_status.groupby("Status", observed=True)["Count"].sum()
+        fig_pie = px.pie(values=status_counts.values, names=status_counts.index,
+                         title="Lab Results Distribution")
+        st.plotly_chart(fig_pie, use_container_width=True)
+
+with tab3:
+    conditions = cohort["conditions"]
+    fig_conditions = px.bar(conditions, x="Count", y="Condition", color="Status", orientation="h",
+                            title="Condition Status Counts")
+    st.plotly_chart(fig_conditions, use_container_width=True)
+    st.dataframe(conditions.pivot_table(index="Condition", columns="Status", values="Count", fill_value=0),
+                 use_container_width=True)
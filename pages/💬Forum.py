@@ -1,98 +1,20 @@
+import html
 import streamlit as st
-from datetime import datetime
-import uuid
+from utils.forum_store import PAGE_SIZE
+from utils.forum_model import get_forum_model
+from utils.forum_html import post_html
+from utils.assets import get_asset_pipeline, POST_AVATAR_PX
+from utils.knowledge_base import get_knowledge_base
 
 st.set_page_config(layout="wide")
 st.title("💬 Forum")
 
-# Initialize session_state with hardcoded posts only once
-if "posts" not in st.session_state:
-    st.session_state.posts = [
-        {
-            "id": str(uuid.uuid4()),
-            "user": "Alice",
-            "avatar": "https://randomuser.me/api/portraits/women/1.jpg",
-            "time": "2 hours ago",
-            "content": "Has anyone experienced joint pain along with fever? I'm really worried it might be something serious.",
-            "likes": 12,
-            "comments": [
-                {"user": "Bob", "avatar": "https://randomuser.me/api/portraits/men/2.jpg", "text": "That sounds like it could be an autoimmune issue. Have you seen a doctor?"},
-                {"user": "Charlie", "avatar": "https://randomuser.me/api/portraits/men/3.jpg", "text": "Could be the flu, but I'd get it checked out just in case."}
-            ]
-        },
-        {
-            "id": str(uuid.uuid4()),
-            "user": "Bob",
-            "avatar": "https://randomuser.me/api/portraits/men/4.jpg",
-            "time": "4 hours ago",
-            "content": "I've been feeling fatigued for weeks now. My doctor ran tests, but they couldn’t pinpoint the cause. Any advice?",
-            "likes": 8,
-            "comments": [
-                {"user": "Alice", "avatar": "https://randomuser.me/api/portraits/women/1.jpg", "text": "Fatigue can be linked to stress or even poor diet. Have you tried changing your routine?"},
-                {"user": "Charlie", "avatar": "https://randomuser.me/api/portraits/men/5.jpg", "text": "You might want to consider seeing a specialist or getting a second opinion."}
-            ]
-        },
-        {
-            "id": str(uuid.uuid4()),
-            "user": "Charlie",
-            "avatar": "https://randomuser.me/api/portraits/men/5.jpg",
-            "time": "1 day ago",
-            "content": "Has anyone dealt with persistent headaches? I’ve tried over-the-counter meds, but nothing seems to work.",
-            "likes": 5,
-            "comments": [
-                {"user": "Alice", "avatar": "https://randomuser.me/api/portraits/women/1.jpg", "text": "I had similar issues. I was prescribed a migraine medication, and it really helped."},
-                {"user": "Bob", "avatar": "https://randomuser.me/api/portraits/men/4.jpg", "text": "Have you tried keeping a headache journal? It could help identify triggers."}
-            ]
-        },
-        {
-            "id": str(uuid.uuid4()),
-            "user": "Alice",
-            "avatar": "https://randomuser.me/api/portraits/women/1.jpg",
-            "time": "3 days ago",
-            "content": "I’ve been struggling with anxiety lately. I know exercise is good, but I feel too overwhelmed to start.",
-            "likes": 15,
-            "comments": [
-                {"user": "Bob", "avatar": "https://randomuser.me/api/portraits/men/2.jpg", "text": "Starting small with a 10-minute walk could help ease the pressure. Baby steps!"},
-                {"user": "Charlie", "avatar": "https://randomuser.me/api/portraits/men/5.jpg", "text": "Yoga and mindfulness also helped me when I felt anxious."}
-            ]
-        },
-        {
-            "id": str(uuid.uuid4()),
-            "user": "Bob",
-            "avatar": "https://randomuser.me/api/portraits/men/4.jpg",
-            "time": "5 days ago",
-            "content": "Does anyone know how to manage asthma symptoms during cold weather? I’m really struggling this winter.",
-            "likes": 9,
-            "comments": [
-                {"user": "Alice", "avatar": "https://randomuser.me/api/portraits/women/1.jpg", "text": "Make sure to use your inhaler regularly and wear a scarf over your mouth to warm up the air."},
-                {"user": "Charlie", "avatar": "https://randomuser.me/api/portraits/men/5.jpg", "text": "You should also avoid cold, dry air as much as possible and stay indoors when you can."}
-            ]
-        },
-        {
-            "id": str(uuid.uuid4()),
-            "user": "Charlie",
-            "avatar": "https://randomuser.me/api/portraits/men/5.jpg",
-            "time": "1 week ago",
-            "content": "Has anyone been on a gluten-free diet for a while? How did you adjust to it and feel? I’ve been considering it.",
-            "likes": 7,
-            "comments": [
-                {"user": "Alice", "avatar": "https://randomuser.me/api/portraits/women/1.jpg", "text": "It took a while for me to get used to it, but my digestive issues improved."},
-                {"user": "Bob", "avatar": "https://randomuser.me/api/portraits/men/4.jpg", "text": "Gluten-free can be tough, but it definitely helps with inflammation if you’re sensitive."}
-            ]
-        },
-        {
-            "id": str(uuid.uuid4()),
-            "user": "Alice",
-            "avatar": "https://randomuser.me/api/portraits/women/1.jpg",
-            "time": "1 week ago",
-            "content": "I’ve been having trouble sleeping lately. Any tips for getting better sleep without relying on medication?",
-            "likes": 10,
-            "comments": [
-                {"user": "Bob", "avatar": "https://randomuser.me/api/portraits/men/2.jpg", "text": "Try limiting screen time before bed and establish a consistent routine. It helps a lot."},
-                {"user": "Charlie", "avatar": "https://randomuser.me/api/portraits/men/5.jpg", "text": "I also found drinking chamomile tea before bed really soothing."}
-            ]
-        }
-    ]
+# One forum model is shared by every session; a session only keeps where it
+# is in the list (and its own comment drafts in the inputs below)
+forum = get_forum_model()
+assets = get_asset_pipeline()
+if "forum_cursors" not in st.session_state:
+    st.session_state.forum_cursors = [None]
 
 
 # --- Custom CSS ---
@@ -136,15 +58,9 @@ st.subheader("📢 Share your thoughts")
 new_status = st.text_area("What's on your mind?", key="status_input")
 if st.button("Post"):
     if new_status.strip():
-        st.session_state.posts.insert(0, {
-            "id": str(uuid.uuid4()),
-            "user": "You",
-            "avatar": "https://randomuser.me/api/portraits/lego/1.jpg",
-            "time": datetime.now().strftime("%H:%M %p"),
-            "content": new_status,
-            "likes": 0,
-            "comments": []
-        })
+        post = forum.create_post("You", "", new_status)
+        get_knowledge_base().add_post(post)
+        st.session_state.forum_cursors = [None]
         st.success("Posted successfully!")
         st.rerun()
     else:
@@ -152,53 +68,97 @@ if st.button("Post"):
 
 st.markdown("---")
 
-# --- Display Posts ---
-for post in st.session_state.posts:
-    comments_html = ""
-    for comment in post["comments"]:
-        comments_html += f"""
-        <div class="comment-box">
-            <img src="{comment['avatar']}" width="35" class="comment-avatar"/>
-            <div class="comment-content"><strong>{comment['user']}</strong><br>{comment['text']}</div>
-        </div>
-        """.strip()
-
-    post_html = f"""
-    <div class="post-box">
-        <div style="display:flex;align-items:center;gap:15px;">
-            <img src="{post['avatar']}" width="50" class="user-img"/>
-            <div>
-                <strong>{post['user']}</strong><br>
-                <span class="text-small">{post['time']}</span>
+# --- Search ---
+search = st.text_input("🔍 Search posts and comments", key="forum_search", placeholder="e.g. asthma, headaches")
+if search.strip():
+    results = forum.search(search)
+    st.caption(f"{len(results)} matching discussion{'s' if len(results) != 1 else ''}")
+    for post in results:
+        st.markdown(f"""
+        <div class="post-box">
+            <div style="display:flex;align-items:center;gap:15px;">
+                <img src="{html.escape(assets.avatar_src(post['user'], post['avatar'], POST_AVATAR_PX))}" width="{POST_AVATAR_PX}" class="user-img"/>
+                <div>
+                    <strong>{html.escape(post['user'])}</strong><br>
+                    <span class="text-small">{post['time']} · matched in {post['match']}</span>
+                </div>
             </div>
+            <p style="margin-top:10px;font-size:15px;">{post['snippet']}</p>
+            <span class="like-text">❤️ {post['likes']} Hearts</span>
+            <span class="text-small"> · 💬 {len(post['comments'])} comments</span>
         </div>
-        <p style="margin-top:10px;font-size:15px;">{post['content']}</p>
-        <span class="like-text">❤️ {post['likes']} Hearts</span>
-        {comments_html}
-    </div>
-    """
-    st.markdown(post_html, unsafe_allow_html=True)
+        """, unsafe_allow_html=True)
+    st.stop()
+
+# --- Display Posts (one page at a time) ---
+sort_labels = {"newest": "Newest", "likes": "Most liked"}
+sort = st.selectbox("Sort by", list(sort_labels), format_func=sort_labels.get, key="forum_sort",
+                    on_change=lambda: st.session_state.update(forum_cursors=[None]))
+page_number = len(st.session_state.forum_cursors)
+posts, next_cursor = forum.page(sort, after=st.session_state.forum_cursors[-1], limit=PAGE_SIZE)
+
+def like_post(post_id):
+    forum.like(post_id)
+    st.session_state.forum_changed.add(post_id)
+
+
+def comment_on_post(post_id):
+    comment_input = st.session_state[f"comment_input_{post_id}"]
+    if comment_input.strip():
+        post = forum.add_comment(post_id, "You", "", comment_input)
+        if post is None:
+            st.session_state.forum_missing_post = post_id
+            return
+        get_knowledge_base().add_post(post)
+        st.session_state[f"comment_input_{post_id}"] = ""
+        st.session_state.forum_changed.add(post_id)
+    else:
+        st.session_state.forum_empty_comment = post_id
+
+
+@st.fragment
+def show_post(post):
+    # Like and Comment rerun only this fragment, with the arguments of the
+    # last full run, so a post changed since then is re-read from the store
+    if post["id"] in st.session_state.forum_changed:
+        post = forum.get(post["id"])
+
+    # HTML is memoized per post version; unchanged posts are not rebuilt
+    st.markdown(post_html(post), unsafe_allow_html=True)
 
     # --- Add Heart Button ---
     like_button_key = f"like_btn_{post['id']}"
-    if st.button("❤️ Like", key=like_button_key):
-        post["likes"] += 1
-        st.rerun()
+    st.button("❤️ Like", key=like_button_key, on_click=like_post, args=(post["id"],))
 
     # --- Add Comment Input for This Post ---
     comment_input_key = f"comment_input_{post['id']}"
     comment_button_key = f"comment_btn_{post['id']}"
-    comment_input = st.text_input("Write a comment...", key=comment_input_key)
-    if st.button("Comment", key=comment_button_key):
-        if comment_input.strip():
-            post["comments"].append({
-                "user": "You",
-                "avatar": "https://randomuser.me/api/portraits/lego/2.jpg",
-                "text": comment_input
-            })
-            st.rerun()
-        else:
-            st.warning("Comment cannot be empty.")
+    st.text_input("Write a comment...", key=comment_input_key)
+    st.button("Comment", key=comment_button_key, on_click=comment_on_post, args=(post["id"],))
+    if st.session_state.get("forum_empty_comment") == post["id"]:
+        del st.session_state.forum_empty_comment
+        st.warning("Comment cannot be empty.")
+    if st.session_state.get("forum_missing_post") == post["id"]:
+        del st.session_state.forum_missing_post
+        st.warning("This post no longer exists, so the comment was not added.")
 
     st.markdown("---")
 
+
+# Posts on this page are fresh from the store, so nothing needs re-reading
+st.session_state.forum_changed = set()
+for post in posts:
+    show_post(post)
+
+# --- Pagination ---
+col1, col2, col3 = st.columns([1, 2, 1])
+with col1:
+    if page_number > 1 and st.button("← Newer posts" if sort == "newest" else "← Previous"):
+        st.session_state.forum_cursors.pop()
+        st.rerun()
+with col2:
+    st.caption(f"Page {page_number}")
+with col3:
+    if next_cursor is not None and st.button("Older posts →" if sort == "newest" else "Next →"):
+        st.session_state.forum_cursors.append(next_cursor)
+        st.rerun()
@@ -0,0 +1,42 @@
+import streamlit as st
+from utils.llm_metrics import get_metrics, FIELDS
+from utils.llm_client import get_llm_client
+from utils import config
+
+st.set_page_config(page_title="Admin Metrics", page_icon="📈", layout="wide")
+st.title("📈 Assistant Performance")
+st.markdown("Latency of recent AI Assistant replies on this server process. Use the CSV export for capacity planning.")
+
+metrics = get_metrics()
+rows = metrics.snapshot()
+summary = metrics.summary()
+queue = get_llm_client().stats()
+
+col1, col2, col3, col4, col5 = st.columns(5)
+col1.metric("Model requests", summary["requests"])
+col2.metric("TTFT p50", f"{summary['ttft_p50_ms'] or 0:.0f} ms")
+col3.metric("TTFT p95", f"{summary['ttft_p95_ms'] or 0:.0f} ms")
+col4.metric("Queue wait p95", f"{summary['queue_wait_p95_ms'] or 0:.0f} ms")
+col5.metric("Tokens / sec", f"{summary['mean_tokens_per_sec'] or 0:.1f}")
+
+st.caption(f"Model slots in use: {queue['active']}/{queue['max_concurrent']} | "
+           f"Waiting: {queue['waiting']} | Rejected: {queue['rejected']} | Timed out in queue: {queue['timed_out']}")
+
+st.markdown("---")
+
+if rows:
+    st.subheader("Recent requests")
+    st.dataframe(list(reversed(rows)), column_order=FIELDS, use_container_width=True, hide_index=True)
+else:
+    st.info("No assistant requests have been recorded since the server started.")
+
+col1, col2 = st.columns([1, 5])
+with col1:
+    st.download_button("Download CSV", metrics.to_csv(), file_name="assistant_latency.csv", mime="text/csv")
+# Clearing affects every session on this server, so it needs ALLOW_METRICS_CLEAR=1 and a confirmation
+if config.ALLOW_METRICS_CLEAR:
+    with col2:
+        confirm = st.checkbox("Clear the history for everyone on this server")
+        if st.button("Clear", disabled=not confirm):
+            metrics.clear()
+            st.rerun()
@@ -1,69 +1,140 @@
 import streamlit as st
-from PIL import Image
+from utils.resource_store import get_resource_store, normalize_link, PAGE_SIZE, RESOURCE_TYPES
+from utils.knowledge_base import get_knowledge_base
+from utils.assets import get_asset_pipeline
+from utils.link_metadata import get_link_checker, get_link_metadata, THUMBNAIL_WIDTH
+
+# Resource images are shown in the centered column (~700px); variants are made at twice that
+RESOURCE_IMAGE_WIDTH = 1400
+ALL = "All"
 
 # --- Page setup ---
 st.set_page_config(page_title="Educational Resources", page_icon="📚")
 st.title("📚 Educational Resources Hub")
 st.markdown("Resources curated by healthcare professionals to help patients understand their conditions better.")
 
-# --- Sample hardcoded resources ---
-resources = [
-    {
-        "title": "Understanding Hypertension",
-        "description": "A beginner-friendly guide to managing high blood pressure.",
-        "type": "Article",
-        "link": "https://www.heart.org/en/health-topics/high-blood-pressure",
-        "posted_by": "Dr. Smith",
-        "src": "assets/HighBloodPressure.png"
-    },
-    {
-        "title": "Diabetes & Nutrition",
-        "description": "Learn how to manage diabetes through diet and exercise.",
-        "type": "Video",
-        "link": "https://www.youtube.com/watch?v=wZAjVQWbMlE",
-        "posted_by": "Dr. Maria Tan",
-        "src": "assets/Diabetes.png"
-    },
-    {
-        "title": "Asthma Action Plan",
-        "description": "Download a printable asthma management plan.",
-        "type": "PDF",
-        "link": "https://www.cdc.gov/asthma/action-plan/documents/asthma-action-plan-508.pdf",
-        "posted_by": "Nurse Alex",
-        "src": "assets/Asthma.png"
-    }
-]
+# One catalog is shared by every session; a session only keeps its filters
+# and where it is in the list
+catalog = get_resource_store()
+# Links are checked and previewed in the background; this page only reads the results
+link_checker = get_link_checker()
+if "resource_cursors" not in st.session_state:
+    st.session_state.resource_cursors = [None]
+
+
+def reset_pages():
+    st.session_state.resource_cursors = [None]
 
-# --- Display resources ---
+
+# --- Filters ---
 st.subheader("Resources for You")
+col1, col2, col3 = st.columns(3)
+with col1:
+    resource_type = st.selectbox("Type", [ALL] + catalog.types(), key="resource_type", on_change=reset_pages)
+with col2:
+    tag = st.selectbox("Topic", [ALL] + catalog.tags(), key="resource_tag", on_change=reset_pages)
+with col3:
+    author = st.selectbox("Posted by", [ALL] + catalog.authors(), key="resource_author", on_change=reset_pages)
+
+filters = {
+    "type": None if resource_type == ALL else resource_type,
+    "tag": None if tag == ALL else tag,
+    "author": None if author == ALL else author,
+}
+page_number = len(st.session_state.resource_cursors)
+resources, next_cursor = catalog.page(**filters, after=st.session_state.resource_cursors[-1], limit=PAGE_SIZE)
+previews = get_link_metadata().get_many(res["link_key"] for res in resources)
+st.caption(f"{catalog.count(**filters):,} resources")
 st.markdown("---")
 
+# --- Display resources (one page at a time) ---
+if not resources:
+    st.info("No resources match these filters.")
+
 for res in resources:
     with st.container():
         st.markdown(f"### [{res['title']}]({res['link']})")
-        
-        try:
-            st.image(res["src"], use_container_width=True)
-        except Exception as e:
-            st.warning(f"Image not found for {res['title']}.")
 
-        st.markdown(f"*Type:* {res['type']}  |  *Posted by:* {res['posted_by']}")
+        preview = previews.get(res["link_key"], {})
+        if preview.get("status") == "broken":
+            st.warning(f"⚠️ This link returned HTTP {preview['http_status']} when it was last checked.")
+        elif preview.get("title") and preview["title"] != res["title"]:
+            st.caption(f"🔗 {preview['title']}")
+
+        if res["src"]:
+            try:
+                st.image(get_asset_pipeline().image_src(res["src"], RESOURCE_IMAGE_WIDTH), use_container_width=True)
+            except Exception as e:
+                st.warning(f"Image not found for {res['title']}.")
+        elif preview.get("thumbnail"):
+            try:
+                st.image(get_asset_pipeline().image_src(preview["thumbnail"], THUMBNAIL_WIDTH), width=THUMBNAIL_WIDTH // 2)
+            except Exception:
+                pass
+
+        pages = f" ({preview['page_count']} pages)" if preview.get("page_count") else ""
+        st.markdown(f"*Type:* {res['type']}{pages}  |  *Posted by:* {res['posted_by']}")
         st.markdown(res["description"])
+        if res["tags"]:
+            st.caption(" · ".join(f"#{tag}" for tag in res["tags"]))
         st.markdown("---")
 
+# --- Pagination ---
+col1, col2, col3 = st.columns([1, 2, 1])
+with col1:
+    if page_number > 1 and st.button("← Newer"):
+        st.session_state.resource_cursors.pop()
+        st.rerun()
+with col2:
+    st.caption(f"Page {page_number}")
+with col3:
+    if next_cursor is not None and st.button("Older →"):
+        st.session_state.resource_cursors.append(next_cursor)
+        st.rerun()
+
+
+# --- Submit a new resource (added to the shared catalog) ---
+def submit_resource():
+    # Runs before the rerun, so the new resource is already in the list above
+    resource = {
+        "title": st.session_state.resource_title,
+        "description": st.session_state.resource_description,
+        "type": st.session_state.resource_new_type,
+        "link": st.session_state.resource_link,
+        "posted_by": st.session_state.resource_posted_by,
+        "tags": st.session_state.resource_tags,
+    }
+    if not resource["title"].strip() or not resource["posted_by"].strip():
+        st.session_state.resource_message = ("warning", "Please give the resource a title and your name.")
+        return
+    if normalize_link(resource["link"]) is None:
+        st.session_state.resource_message = ("warning", "Please enter a valid web link (http or https).")
+        return
+
+    stored, created = catalog.add(resource)
+    if not created:
+        st.session_state.resource_message = ("info", f"This link is already in the catalog as \"{stored['title']}\".")
+        return
+    get_knowledge_base().add_resource(stored)
+    link_checker.submit(stored["link"])
+    for key in ("resource_title", "resource_description", "resource_link", "resource_tags"):
+        st.session_state[key] = ""
+    reset_pages()
+    st.session_state.resource_message = ("success", f"Thank you {stored['posted_by']}, your resource has been added.")
+
 
-# --- Simulate adding a new resource (not persistent) ---
 st.subheader("📝 Submit a New Resource")
 
 with st.form("resource_form"):
-    title = st.text_input("Resource Title")
-    description = st.text_area("Short Description")
-    resource_type = st.selectbox("Resource Type", ["Article", "Video", "PDF", "Website", "Other"])
-    link = st.text_input("Link to Resource (YouTube, PDF, article, etc.)")
-    posted_by = st.text_input("Your Name / Role")
+    st.text_input("Resource Title", key="resource_title")
+    st.text_area("Short Description", key="resource_description")
+    st.selectbox("Resource Type", RESOURCE_TYPES, key="resource_new_type")
+    st.text_input("Link to Resource (YouTube, PDF, article, etc.)", key="resource_link")
+    st.text_input("Topics (comma separated)", key="resource_tags", placeholder="e.g. asthma, breathing")
+    st.text_input("Your Name / Role", key="resource_posted_by")
 
-    submitted = st.form_submit_button("Submit Resource")
+    st.form_submit_button("Submit Resource", on_click=submit_resource)
 
-if submitted:
-    st.success(f"Thank you {posted_by}, your resource has been added.")
-    # st.info(f"Preview:\n- **Title**: {title}\n- **Type**: {resource_type}\n- **Link**: {link}")
+if "resource_message" in st.session_state:
+    level, message = st.session_state.pop("resource_message")
+    getattr(st, level)(message)
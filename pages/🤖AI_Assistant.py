@@ -1,19 +1,207 @@
 # pages/AI_Assistant.py
+import uuid
 import streamlit as st
-import ollama
+from utils.llm_client import get_llm_client, QueueFullError, QueueTimeoutError
+from utils.response_cache import ResponseCache, make_key, replay_stream
+from utils.context_window import ConversationWindow, format_transcript, message_tokens
+from utils.knowledge_base import get_knowledge_base, format_context
+from utils.llm_metrics import StreamTimer, get_metrics
+from utils.warmup import show_model_status
+from utils.transcript import user_bubble_html, first_visible, TRANSCRIPT_PAGE_SIZE
+from utils.conversation_store import get_conversation_store, new_owner_token, owner_key
+from utils.chat_sessions import get_chat_sessions
+from utils import config
 
-def generate_response():
-        response = ollama.chat(model='llama3', stream=True, messages=st.session_state.messages)
-        for partial_resp in response:
-            token = partial_resp["message"]["content"]
-            st.session_state["full_message"] += token
-            yield token
+MODEL = config.LLM_MODEL
+MAX_PROMPT_TOKENS = 2048
+RETRIEVAL_K = 3
+GREETING = "Hi! How can I help you today?"
+# Messages kept in session memory; older ones are read back from the store on demand
+MAX_RESIDENT_MESSAGES = 100
+
+@st.cache_resource
+def get_response_cache():
+    # Shared by every session on this server so repeated questions skip the model
+    return ResponseCache(max_entries=512, ttl_seconds=6 * 60 * 60)
+
+def summarize_turns(previous_summary, new_messages):
+    # Only the turns that just left the window are sent, together with the old summary
+    prompt = (
+        "Update the summary of a conversation between a patient and a healthcare assistant. "
+        "Keep symptoms, conditions, medications and advice given. Answer in under 150 words.\n\n"
+        f"Current summary: {previous_summary or '(none)'}\n\n"
+        f"New turns:\n{format_transcript(new_messages)}"
+    )
+    response = get_llm_client().chat(MODEL, [{"role": "user", "content": prompt}])
+    return response["message"]["content"].strip()
+
+def generate_response(messages, status):
+        cache = get_response_cache()
+        key = make_key(MODEL, messages)
+        timer = StreamTimer(MODEL, prompt_tokens=sum(message_tokens(msg) for msg in messages))
+        cached = cache.get(key)
+        if cached is not None:
+            for token in replay_stream(cached):
+                timer.token()
+                st.session_state["full_message"] += token
+                yield token
+            get_metrics().record(timer.finish(source="cache"))
+            return
+
+        def show_position(position):
+            status.info(f"⏳ The assistant is busy — you are number {position} in the queue.")
+
+        response = get_llm_client().stream_chat(MODEL, messages, on_queued=show_position, on_admitted=timer.admitted)
+        try:
+            for i, partial_resp in enumerate(response):
+                if i == 0:
+                    status.empty()
+                timer.token(partial_resp)
+                token = partial_resp["message"]["content"]
+                st.session_state["full_message"] += token
+                yield token
+        except QueueFullError:
+            get_metrics().record(timer.finish(status="rejected"))
+            raise
+        except QueueTimeoutError:
+            get_metrics().record(timer.finish(status="queue_timeout"))
+            raise
+        except Exception:
+            get_metrics().record(timer.finish(status="error"))
+            raise
+        get_metrics().record(timer.finish())
+        cache.put(key, st.session_state["full_message"])
+
+def current_owner():
+    # Conversations belong to the browser session that started them. There are
+    # no accounts, so the owner is a random token kept in the session and in
+    # the URL (a refresh or a bookmark keeps it); the store only sees its hash.
+    token = st.session_state.get("owner_token") or st.query_params.get("k") or new_owner_token()
+    st.session_state["owner_token"] = token
+    if st.query_params.get("k") != token:
+        st.query_params["k"] = token
+    return owner_key(token)
+
+def chat_state():
+    # This session's messages and windows (see utils/chat_sessions.py); None
+    # before the first run or after the session was dropped for being idle
+    return get_chat_sessions().get(st.session_state.get("chat_key"))
+
+def new_chat_state(messages, offset=0):
+    key = st.session_state.setdefault("chat_key", uuid.uuid4().hex)
+    return get_chat_sessions().put(key, {
+        "messages": messages,
+        "messages_offset": offset,
+        "transcript_shown": TRANSCRIPT_PAGE_SIZE,
+        "context_window": ConversationWindow(summarize_turns, max_prompt_tokens=MAX_PROMPT_TOKENS),
+    })
+
+def open_conversation(conversation_id):
+    # Loads only the newest page of a stored conversation into this session;
+    # None if the conversation does not exist or belongs to someone else
+    store = get_conversation_store()
+    if not store.owns(conversation_id, current_owner()):
+        return None
+    offset, messages = store.tail(conversation_id, TRANSCRIPT_PAGE_SIZE)
+    chat = new_chat_state(messages, offset)
+    state = store.load_window_state(conversation_id)
+    if state:
+        chat["context_window"].restore(state)
+    st.session_state["conversation_id"] = conversation_id
+    st.query_params["c"] = conversation_id
+    return chat
+
+def start_conversation():
+    # Nothing is stored until the first question, so visits that never ask
+    # one leave no conversation behind
+    st.session_state["conversation_id"] = None
+    st.query_params.pop("c", None)
+    return new_chat_state([{"role": "ai", "content": GREETING}])
+
+def show_conversation_picker():
+    st.sidebar.subheader("Conversations")
+    if st.sidebar.button("➕ New conversation"):
+        start_conversation()
+        st.rerun()
+    for conv in get_conversation_store().recent(current_owner(), limit=8):
+        if conv["id"] == st.session_state["conversation_id"]:
+            st.sidebar.markdown(f"**▸ {conv['title']}**")
+        elif st.sidebar.button(conv["title"], key=f"conv_{conv['id']}"):
+            open_conversation(conv["id"])
+            st.rerun()
+
+def load_earlier(store, conversation_id):
+    # Widens the visible window by a page, reading older messages from the
+    # store once the ones held in memory are all visible
+    chat = chat_state()
+    if chat is None:
+        return
+    messages = chat["messages"]
+    offset = chat["messages_offset"]
+    if first_visible(len(messages), chat["transcript_shown"]) < TRANSCRIPT_PAGE_SIZE and offset:
+        begin = max(offset - TRANSCRIPT_PAGE_SIZE, 0)
+        messages[:0] = store.messages(conversation_id, begin, offset)
+        chat["messages_offset"] = begin
+    chat["transcript_shown"] += TRANSCRIPT_PAGE_SIZE
+
+@st.fragment
+def show_transcript(store, conversation_id):
+    # Only the newest messages are drawn; as a fragment, "Load earlier"
+    # reruns the transcript alone instead of the whole page
+    chat = chat_state()
+    if chat is None:
+        # Dropped while idle; the next full run reopens the conversation
+        st.rerun()
+    messages = chat["messages"]
+    start = first_visible(len(messages), chat["transcript_shown"])
+    hidden = chat["messages_offset"] + start
+    if hidden:
+        st.button(f"⬆️ Load earlier messages ({hidden} hidden)", on_click=load_earlier, args=(store, conversation_id))
+
+    for msg in messages[start:]:
+        if msg["role"] == "user":
+            st.markdown(user_bubble_html(msg["content"]), unsafe_allow_html=True)
+        else:
+            st.chat_message("ai", avatar="🤖").write(msg["content"])
+
+def store_turn(store, chat, prompt, reply):
+    # The first question creates the stored conversation, greeting included
+    conversation_id = st.session_state["conversation_id"]
+    if conversation_id is None:
+        conversation_id = store.create(current_owner())
+        store.append(conversation_id, "ai", GREETING)
+        st.session_state["conversation_id"] = conversation_id
+        st.query_params["c"] = conversation_id
+    store.append(conversation_id, "user", prompt)
+    store.append(conversation_id, "ai", reply)
+    store.save_window_state(conversation_id, chat["context_window"].state())
 
 def run_ai_assistant():
     st.title("🤖 Assistant")
 
-    if "messages" not in st.session_state:
-        st.session_state["messages"] = [{"role": "ai", "content": "Hi! How can I help you today?"}]
+    store = get_conversation_store()
+    requested = st.query_params.get("c")
+    current = st.session_state.get("conversation_id")
+    chat = chat_state()
+    if requested and requested != current:
+        # Ids from the URL are only opened if this session owns them
+        opened = open_conversation(requested)
+        if opened is None:
+            st.warning("That conversation could not be opened.")
+            if chat is None:
+                chat = open_conversation(current) if current else start_conversation()
+            elif current:
+                st.query_params["c"] = current
+            else:
+                st.query_params.pop("c", None)
+        else:
+            chat = opened
+    elif chat is None:
+        # A new session, or one dropped while idle: the store still has its conversation
+        chat = (current and open_conversation(current)) or start_conversation()
+    elif current and requested != current:
+        st.query_params["c"] = current
+    conversation_id = st.session_state["conversation_id"]
 
     # for msg in st.session_state.messages:
     #     if msg["role"] == "user":
@@ -21,34 +209,67 @@ def run_ai_assistant():
     #     else:
     #         st.chat_message(msg["role"], avatar="🤖").write(msg["content"])
 
-    for msg in st.session_state.messages:
-        if msg["role"] == "user":
-            st.markdown(f"""
-            <div style='display: flex; justify-content: flex-end;'>
-                <div style='background-color: #DCF8C6; padding: 8px 12px; border-radius: 10px; max-width: 70%; margin: 4px 0;'>
-                    {msg["content"]}
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-
-        else:
-            st.chat_message("ai", avatar="🤖").write(msg["content"])
+    show_transcript(store, conversation_id)
 
     
     if prompt := st.chat_input():
-        st.session_state.messages.append({"role": "user", "content": prompt})
+        messages = chat["messages"]
+        messages.append({"role": "user", "content": prompt})
         # st.chat_message("user", avatar="🧑‍💻").write(prompt)
-        st.markdown(f"""
-            <div style='display: flex; justify-content: flex-end;'>
-                <div style='background-color: #DCF8C6; padding: 8px 12px; border-radius: 10px; max-width: 70%; margin: 4px 0;'>
-                    {prompt}
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+        st.markdown(user_bubble_html(prompt), unsafe_allow_html=True)
         st.session_state["full_message"] = ""
-        st.chat_message("ai", avatar="🤖").write_stream(generate_response)
-        st.session_state.messages.append({"role": "ai", "content": st.session_state["full_message"]})
+        status = st.empty()
+        # build() moves the summary and token counts on; if the turn fails
+        # nothing is stored, so the window goes back to match the transcript
+        window = chat["context_window"]
+        saved, turns = window.state(), len(window.history)
+
+        def roll_back():
+            window.restore(saved)
+            del window.history[turns:]
+            messages.pop()
+
+        try:
+            prompt_messages, report = window.build(
+                messages,
+                offset=chat["messages_offset"],
+                load=lambda start, stop: store.messages(conversation_id, start, stop),
+            )
+            passages = get_knowledge_base().search(prompt, k=RETRIEVAL_K)
+            if passages:
+                prompt_messages = [{"role": "system", "content": format_context(passages)}] + prompt_messages
+            # Same first message as the warm-up request, so Ollama can reuse its prompt cache
+            prompt_messages = [{"role": "system", "content": config.SYSTEM_PROMPT}] + prompt_messages
+            st.chat_message("ai", avatar="🤖").write_stream(generate_response(prompt_messages, status))
+        except QueueFullError:
+            status.warning("The assistant is handling too many questions right now. Please try again in a minute.")
+            roll_back()
+            return
+        except QueueTimeoutError:
+            status.warning("Sorry, the wait took too long. Please ask again.")
+            roll_back()
+            return
+        except BaseException:
+            # Model errors, and reruns or stops that interrupt the stream
+            roll_back()
+            raise
+        messages.append({"role": "ai", "content": st.session_state["full_message"]})
+        store_turn(store, chat, prompt, st.session_state["full_message"])
+
+        excess = len(messages) - MAX_RESIDENT_MESSAGES
+        if excess > 0:
+            del messages[:excess]
+            chat["messages_offset"] += excess
+        st.caption(f"Prompt: {report['prompt_tokens']} tokens ({report['messages_sent']} recent messages"
+                   f"{', earlier turns summarized' if report['summarized_messages'] else ''}) "
+                   f"vs {report['full_tokens']} for the full history")
+
+    show_conversation_picker()
+    show_model_status()
+    stats = get_response_cache().stats()
+    st.sidebar.caption(f"Response cache: {stats['hits']} hits / {stats['misses']} misses ({stats['entries']} cached)")
+    queue = get_llm_client().stats()
+    st.sidebar.caption(f"Model slots in use: {queue['active']}/{queue['max_concurrent']}, waiting: {queue['waiting']}")
 
 if __name__ == "__main__":
     run_ai_assistant()
-
@@ -0,0 +1,14 @@
+# tests/conftest.py
+# Runs the tests against the repo's modules with a throwaway data directory,
+# no model warm-up and no background preload.
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("HEALTHBRIDGE_DATA_DIR", tempfile.mkdtemp(prefix="healthbridge-tests-"))
+os.environ.setdefault("LLM_WARMUP", "0")
+os.environ.setdefault("PRELOAD_MODULES", "0")
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.alert_rules import ALERT_COLUMNS, AlertEngine, MEDICATION_NOTES
+
+WINDOW_RULES = [
+    {"id": f"{stat}_{window}", "column": "Systolic_BP", "stat": stat, "window": window, "op": ">", "value": 0,
+     "severity": "low", "message": stat}
+    for stat in ("mean", "min", "max", "slope_per_day") for window in ("recent", "30d")
+] + [{"id": "last", "column": "Systolic_BP", "stat": "last", "op": ">", "value": 0, "severity": "low",
+      "message": "last"}]
+
+
+def readings(n_patients=6, days=60, seed=1):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for patient_id in range(n_patients):
+        # Uneven spacing, and one patient with a single reading
+        count = 1 if patient_id == 0 else days
+        dates = pd.Timestamp("2024-01-01") + pd.to_timedelta(np.sort(rng.choice(days * 2, count, replace=False)), "D")
+        frames.append(pd.DataFrame({
+            "patient_id": patient_id,
+            "Date": dates,
+            "Systolic_BP": rng.integers(110, 170, count),
+            "Blood_Sugar": rng.integers(80, 160, count),
+        }))
+    # Rows arrive out of order
+    return pd.concat(frames, ignore_index=True).sample(frac=1, random_state=seed)
+
+
+def old_vital_alerts(latest):
+    # The Dashboard's per-patient checks before the rules engine
+    alerts = []
+    if latest["Systolic_BP"] > 140:
+        alerts.append("High blood pressure detected [Please consult physician]")
+    if latest["Blood_Sugar"] > 126:
+        alerts.append("Elevated blood sugar [Please monitor closely]")
+    return alerts
+
+
+def old_lab_alerts(lab_df):
+    alerts = []
+    for _, row in lab_df[lab_df["Status"].str.contains("High|Borderline")].iterrows():
+        alerts.append(f"**{row['Test']}** -  {row['Status']} - {row['Value']} {row['Unit']}")
+    return alerts
+
+
+def old_medication_note(medication):
+    if "Lisinopril" in medication:
+        return "Monitor blood pressure regularly. Report any persistent cough."
+    elif "Metformin" in medication:
+        return "Take with food. Monitor blood sugar levels."
+    elif "Atorvastatin" in medication:
+        return "Take in the evening. Annual liver function tests recommended."
+    elif "Sertraline" in medication:
+        return "May take 4-6 weeks for full effect. Monitor mood changes."
+    return ""
+
+
+def test_vital_features_match_a_per_patient_loop():
+    data = readings()
+    engine = AlertEngine(vital_rules=WINDOW_RULES)
+    features = engine.vital_features(data)
+
+    for patient_id, rows in data.sort_values("Date").groupby("patient_id"):
+        values = rows["Systolic_BP"].astype(float)
+        recent = rows.tail(3)
+        month = rows[rows["Date"] >= rows["Date"].max() - pd.Timedelta("30D")]
+        row = features.loc[patient_id]
+        assert row["Systolic_BP:last:"] == values.iloc[-1]
+        for name, window in (("recent", recent), ("30d", month)):
+            assert row[f"Systolic_BP:mean:{name}"] == pytest.approx(window["Systolic_BP"].mean())
+            assert row[f"Systolic_BP:min:{name}"] == window["Systolic_BP"].min()
+            assert row[f"Systolic_BP:max:{name}"] == window["Systolic_BP"].max()
+            days = (window["Date"] - window["Date"].min()).dt.total_seconds() / 86400
+            slope = np.polyfit(days, window["Systolic_BP"], 1)[0] if len(window) > 1 else 0.0
+            assert row[f"Systolic_BP:slope_per_day:{name}"] == pytest.approx(slope, abs=1e-9)
+
+
+def test_vital_alerts_match_the_old_checks():
+    data = readings(n_patients=40, days=5, seed=7)
+    # Thresholds are strict: equal values do not alert
+    data.loc[data.index[:4], ["Systolic_BP", "Blood_Sugar"]] = [[140, 126], [141, 127], [140, 127], [141, 126]]
+    engine = AlertEngine()
+    table = engine.evaluate(features=engine.vital_features(data))
+
+    for patient_id, rows in data.sort_values("Date", kind="stable").groupby("patient_id"):
+        expected = old_vital_alerts(rows.iloc[-1])
+        assert table.loc[table["patient_id"] == patient_id, "message"].tolist() == expected
+
+
+def test_dashboard_alerts_match_the_old_checks():
+    labs = pd.DataFrame({
+        "Test": ["HbA1c", "LDL", "TSH", "Glucose"],
+        "Value": [7.1, 99, 2.0, 101],
+        "Unit": ["%", "mg/dL", "mIU/L", "mg/dL"],
+        "Status": ["High", "Normal", "Low", "Borderline High"],
+    })
+    engine = AlertEngine()
+    for latest in ({"Systolic_BP": 150, "Blood_Sugar": 110}, {"Systolic_BP": 120, "Blood_Sugar": 130},
+                   {"Systolic_BP": 140, "Blood_Sugar": 126}):
+        features = pd.DataFrame([{"Systolic_BP:last:": latest["Systolic_BP"],
+                                  "Blood_Sugar:last:": latest["Blood_Sugar"]}], index=pd.Index([1], name="patient_id"))
+        table = engine.evaluate(features=features, labs=labs.assign(patient_id=1))
+        assert table["message"].tolist() == old_vital_alerts(latest) + old_lab_alerts(labs)
+
+
+def test_nothing_to_evaluate_means_no_alerts():
+    table = AlertEngine().evaluate()
+    assert table.empty
+    assert list(table.columns) == ALERT_COLUMNS
+
+
+def test_medication_notes_match_the_old_if_chain():
+    medications = pd.Series(["Lisinopril", "Metformin 500mg", "Atorvastatin", "Sertraline 50mg", "Aspirin",
+                             "Lisinopril + Metformin", None], index=[3, 5, 7, 9, 11, 13, 15])
+    notes = AlertEngine().medication_notes_for(medications)
+    assert notes.index.tolist() == medications.index.tolist()
+    assert notes.tolist() == [old_medication_note(str(name)) for name in medications]
+    assert len(MEDICATION_NOTES) == 4
+
+
+def test_unknown_operator_or_window_is_rejected():
+    with pytest.raises(ValueError):
+        AlertEngine(vital_rules=[{**WINDOW_RULES[0], "op": "!="}])
+    with pytest.raises(ValueError):
+        AlertEngine(vital_rules=[{**WINDOW_RULES[0], "window": "7d"}])
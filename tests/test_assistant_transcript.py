@@ -0,0 +1,122 @@
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from tests.conftest import ROOT_DIR
+from utils.chat_sessions import get_chat_sessions
+from utils.conversation_store import get_conversation_store, new_owner_token, owner_key
+from utils.transcript import TRANSCRIPT_PAGE_SIZE
+
+PAGE = str(ROOT_DIR / "pages" / "🤖AI_Assistant.py")
+
+
+def open_long_conversation(n_messages):
+    store = get_conversation_store()
+    token = new_owner_token()
+    conversation_id = store.create(owner_key(token))
+    for i in range(n_messages):
+        store.append(conversation_id, "ai" if i % 2 == 0 else "user", f"message {i} <img src=x onerror=alert(1)>")
+    app = AppTest.from_file(PAGE, default_timeout=60)
+    app.query_params["c"] = conversation_id
+    app.query_params["k"] = token
+    app.run()
+    assert not app.exception
+    return app
+
+
+def chat(app):
+    return get_chat_sessions().get(app.session_state["chat_key"])
+
+
+def drawn_messages(app):
+    bubbles = [m for m in app.main.markdown if "message " in m.value]
+    return bubbles, app.main.chat_message
+
+
+def test_long_conversation_draws_one_page():
+    app = open_long_conversation(500)
+    bubbles, replies = drawn_messages(app)
+    assert len(bubbles) == TRANSCRIPT_PAGE_SIZE
+    assert len(replies) == TRANSCRIPT_PAGE_SIZE // 2
+    assert app.main.button[0].label == f"⬆️ Load earlier messages ({500 - TRANSCRIPT_PAGE_SIZE} hidden)"
+
+
+def test_load_earlier_adds_one_page_at_a_time():
+    app = open_long_conversation(500)
+    for pages in (2, 3):
+        app.main.button[0].click().run()
+        bubbles, replies = drawn_messages(app)
+        assert len(replies) == pages * TRANSCRIPT_PAGE_SIZE // 2
+        assert app.main.button[0].label == f"⬆️ Load earlier messages ({500 - pages * TRANSCRIPT_PAGE_SIZE} hidden)"
+
+
+def test_user_messages_are_escaped():
+    app = open_long_conversation(4)
+    user_bubbles = [m.value for m in app.main.markdown if "DCF8C6" in m.value]
+    assert user_bubbles
+    assert all("<img" not in value and "&lt;img" in value for value in user_bubbles)
+
+
+def test_failed_turn_leaves_the_context_window_as_it_was():
+    # No model server runs under test, so the model call fails
+    app = open_long_conversation(4)
+    window = chat(app)["context_window"]
+    saved, turns = window.state(), len(window.history)
+
+    app.chat_input[0].set_value("Is 150/95 high?").run()
+    assert app.exception
+    window = chat(app)["context_window"]
+    assert window.state() == saved
+    assert len(window.history) == turns
+    assert [msg["content"] for msg in chat(app)["messages"]][-1] == "message 3 <img src=x onerror=alert(1)>"
+
+
+def count_conversations():
+    return get_conversation_store().db.query_one("SELECT COUNT(*) FROM conversations")[0]
+
+
+@pytest.fixture
+def model(monkeypatch):
+    from tools.fake_ollama import FakeOllamaServer
+    from utils import config
+    from utils.llm_client import get_llm_client
+
+    server = FakeOllamaServer(first_token_ms=0, token_ms=0, tokens=5).start()
+    monkeypatch.setattr(config, "OLLAMA_HOST", server.url)
+    get_llm_client.clear()
+    yield server
+    get_llm_client.clear()
+    server.shutdown()
+
+
+def test_conversation_is_stored_on_the_first_question(model):
+    before = count_conversations()
+    app = AppTest.from_file(PAGE, default_timeout=60)
+    app.run()
+    app.sidebar.button[0].click().run()  # "New conversation"
+    assert not app.exception
+    assert app.session_state["conversation_id"] is None
+    assert count_conversations() == before
+
+    app.chat_input[0].set_value("What is a normal resting heart rate?").run()
+    assert not app.exception
+    conversation_id = app.session_state["conversation_id"]
+    assert conversation_id and app.query_params["c"] == conversation_id
+    assert count_conversations() == before + 1
+    stored = get_conversation_store().messages(conversation_id, 0, 10)
+    assert [msg["role"] for msg in stored] == ["ai", "user", "ai"]
+
+
+def test_dropped_session_reopens_its_conversation(monkeypatch):
+    app = open_long_conversation(30)
+    conversation_id = app.session_state["conversation_id"]
+    chat(app)["transcript_shown"] = 100
+    # Every session counts as idle for the next lookup
+    monkeypatch.setattr(get_chat_sessions(), "idle_seconds", -1)
+    assert chat(app) is None
+    monkeypatch.undo()
+
+    app.run()
+    assert not app.exception
+    assert app.session_state["conversation_id"] == conversation_id
+    assert chat(app)["messages_offset"] == 30 - TRANSCRIPT_PAGE_SIZE
+    assert chat(app)["transcript_shown"] == TRANSCRIPT_PAGE_SIZE
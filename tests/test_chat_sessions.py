@@ -0,0 +1,40 @@
+from utils.chat_sessions import ChatSessions
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_idle_sessions_are_dropped_by_other_sessions_lookups():
+    clock = Clock()
+    sessions = ChatSessions(idle_seconds=60, clock=clock)
+    sessions.put("idle", {"messages": []})
+    clock.now = 30
+    sessions.put("active", {"messages": []})
+    clock.now = 61
+    # Only the active session comes back; the idle one is dropped anyway
+    assert sessions.get("active") is not None
+    assert sessions.stats() == {"sessions": 1, "evictions": 1}
+    assert sessions.get("idle") is None
+
+
+def test_lookups_keep_a_session_alive():
+    clock = Clock()
+    sessions = ChatSessions(idle_seconds=60, clock=clock)
+    state = sessions.put("a", {"messages": []})
+    for clock.now in (50, 100, 150):
+        assert sessions.get("a") is state
+
+
+def test_least_recently_used_sessions_go_first_over_the_limit():
+    sessions = ChatSessions(max_sessions=2, clock=Clock())
+    sessions.put("a", {})
+    sessions.put("b", {})
+    sessions.get("a")
+    sessions.put("c", {})
+    assert sessions.get("b") is None
+    assert sessions.get("a") is not None and sessions.get("c") is not None
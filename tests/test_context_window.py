@@ -0,0 +1,97 @@
+from utils.context_window import ConversationWindow, message_tokens
+
+
+def turns(n, content="x"):
+    return [{"role": "user" if i % 2 else "ai", "content": f"{content} {i}"} for i in range(n)]
+
+
+class Summaries:
+    # Stands in for the model: records what it was asked to fold in
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, previous, new_messages):
+        self.calls.append((previous, [msg["content"] for msg in new_messages]))
+        return f"summary {len(self.calls)}"
+
+
+def window(summarize, max_prompt_tokens=50, **kwargs):
+    return ConversationWindow(summarize, max_prompt_tokens=max_prompt_tokens, summary_tokens=10,
+                              min_recent_messages=2, **kwargs)
+
+
+def test_short_conversation_is_sent_whole():
+    summarize = Summaries()
+    messages = turns(3)
+    prompt, report = window(summarize).build(messages)
+    assert prompt == messages
+    assert summarize.calls == []
+    assert report["messages_sent"] == 3
+    assert report["full_tokens"] == sum(message_tokens(msg) for msg in messages)
+
+
+def test_cut_keeps_the_newest_messages_that_fit_the_budget():
+    summarize = Summaries()
+    messages = turns(10)
+    cost = message_tokens(messages[0])
+    keep = (50 - 10) // cost
+    prompt, report = window(summarize).build(messages)
+    assert prompt[0] == {"role": "system", "content": "Summary of the earlier conversation: summary 1"}
+    assert prompt[1:] == messages[-keep:]
+    assert summarize.calls == [("", [msg["content"] for msg in messages[:-keep]])]
+    assert report["summarized_messages"] == 10 - keep
+
+
+def test_min_recent_messages_are_kept_even_over_budget():
+    long = "word " * 40
+    messages = turns(3) + [{"role": "user", "content": long}, {"role": "ai", "content": long}]
+    prompt, _ = window(Summaries()).build(messages)
+    assert prompt[1:] == messages[-2:]
+
+
+def test_summary_is_only_extended_with_turns_that_left_the_window():
+    summarize = Summaries()
+    conversation = window(summarize)
+    messages = turns(10)
+    conversation.build(messages)
+    first_cut = conversation.summarized_upto
+
+    messages += turns(2, content="y")
+    conversation.build(messages)
+    assert len(summarize.calls) == 2
+    previous, new = summarize.calls[1]
+    assert previous == "summary 1"
+    assert new == [msg["content"] for msg in messages[first_cut:conversation.summarized_upto]]
+
+    # Nothing new left the window: no model call
+    conversation.build(messages)
+    assert len(summarize.calls) == 2
+
+
+def test_only_the_tail_in_memory_loads_what_the_summary_still_needs():
+    summarize = Summaries()
+    messages = turns(30)
+    loads = []
+
+    def load(start, stop):
+        loads.append((start, stop))
+        return messages[start:stop]
+
+    offset = 20
+    prompt, report = window(summarize).build(messages[offset:], offset=offset, load=load)
+    assert loads == [(0, offset)]
+    assert summarize.calls[0][1] == [msg["content"] for msg in messages[:report["summarized_messages"]]]
+    assert report["messages_total"] == 30
+    assert prompt[1:] == messages[report["summarized_messages"]:]
+
+
+def test_restore_undoes_a_build():
+    summarize = Summaries()
+    conversation = window(summarize)
+    conversation.build(turns(10))
+    saved = conversation.state()
+
+    conversation.build(turns(14))
+    assert conversation.state() != saved
+    conversation.restore(saved)
+    assert conversation.state() == saved
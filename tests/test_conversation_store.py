@@ -0,0 +1,44 @@
+from streamlit.testing.v1 import AppTest
+
+from tests.conftest import ROOT_DIR
+from utils.conversation_store import ConversationStore, new_owner_token, owner_key
+
+PAGE = str(ROOT_DIR / "pages" / "🤖AI_Assistant.py")
+
+
+def test_conversations_are_scoped_to_their_owner(tmp_path):
+    store = ConversationStore(tmp_path / "conversations.db")
+    alice, bob = owner_key(new_owner_token()), owner_key(new_owner_token())
+    conversation_id = store.create(alice)
+    store.append(conversation_id, "ai", "Hi!")
+    store.append(conversation_id, "user", "My blood pressure is 150/95")
+
+    assert [conv["id"] for conv in store.recent(alice)] == [conversation_id]
+    assert store.recent(bob) == []
+    assert store.owns(conversation_id, alice)
+    assert not store.owns(conversation_id, bob)
+    assert not store.owns(conversation_id, "")
+
+
+def test_page_refuses_a_conversation_id_it_does_not_own():
+    from utils.conversation_store import get_conversation_store
+
+    store = get_conversation_store()
+    token = new_owner_token()
+    private = store.create(owner_key(token))
+    store.append(private, "ai", "Hi!")
+    store.append(private, "user", "private question")
+
+    app = AppTest.from_file(PAGE, default_timeout=60)
+    app.query_params["c"] = private
+    app.run()
+    assert not app.exception
+    assert app.session_state["conversation_id"] != private
+    assert app.warning[0].value == "That conversation could not be opened."
+    assert all("private question" not in m.value for m in app.markdown)
+    assert all("private question" not in b.label for b in app.sidebar.button)
+
+    owner = AppTest.from_file(PAGE, default_timeout=60)
+    owner.query_params.update({"c": private, "k": token})
+    owner.run()
+    assert owner.session_state["conversation_id"] == private
@@ -0,0 +1,46 @@
+import sqlite3
+import threading
+
+import pytest
+
+from utils.db import Database
+
+
+def test_connections_are_reused_across_threads(tmp_path):
+    db = Database(tmp_path / "test.db", max_idle=2)
+    with db.transaction() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+
+    # Like Streamlit reruns: every call on a new thread
+    for i in range(50):
+        thread = threading.Thread(target=lambda: db.query("SELECT * FROM t"))
+        thread.start()
+        thread.join()
+    assert db.idle_count() == 1
+
+
+def test_idle_connections_are_capped_and_closed(tmp_path):
+    db = Database(tmp_path / "test.db", max_idle=2)
+    with db.connection() as a, db.connection() as b, db.connection() as c:
+        pass
+    # c and b come back first; there is no room left for a
+    assert db.idle_count() == 2
+    with pytest.raises(sqlite3.ProgrammingError):
+        a.execute("SELECT 1")
+
+    db.close()
+    assert db.idle_count() == 0
+    for conn in (b, c):
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+
+def test_failed_transaction_rolls_back(tmp_path):
+    db = Database(tmp_path / "test.db")
+    with db.transaction() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+    with pytest.raises(RuntimeError):
+        with db.transaction() as conn:
+            conn.execute("INSERT INTO t VALUES (1)")
+            raise RuntimeError
+    assert db.query_one("SELECT COUNT(*) FROM t")[0] == 0
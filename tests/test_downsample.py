@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.downsample import downsample_frame, lttb, minmax, threshold_extremes
+
+
+def series(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.arange(n, dtype=float), 120 + np.cumsum(rng.normal(0, 1, n))
+
+
+@pytest.mark.parametrize("n, n_out", [(1000, 100), (1000, 3), (101, 50), (10, 9)])
+def test_lttb_keeps_first_and_last_and_returns_n_out_increasing_points(n, n_out):
+    x, y = series(n)
+    selected = lttb(x, y, n_out)
+    assert len(selected) == n_out
+    assert selected[0] == 0 and selected[-1] == n - 1
+    assert np.all(np.diff(selected) > 0)
+
+
+@pytest.mark.parametrize("n_out", [10, 11, 2])
+def test_lttb_returns_short_series_unchanged(n_out):
+    x, y = series(10)
+    assert lttb(x, y, n_out).tolist() == list(range(10))
+
+
+def test_lttb_keeps_an_isolated_spike():
+    x, y = series(1000)
+    y[537] = 400
+    assert 537 in lttb(x, y, 50)
+
+
+def test_minmax_keeps_every_bucket_extreme():
+    _, y = series(1000, seed=3)
+    selected = minmax(y, 20)
+    for bucket in np.array_split(np.arange(1000), 20):
+        assert y[bucket].min() in y[selected] and y[bucket].max() in y[selected]
+    assert minmax(y[:30], 20).tolist() == list(range(30))
+
+
+def test_extremes_are_kept_only_for_buckets_that_cross_a_threshold():
+    y = np.full(100, 120.0)
+    y[15] = 150  # crosses 140 in the second bucket (rows 10-19)
+    y[55] = 139  # below the threshold: not a crossing
+    y[90] = 140  # touching it is not crossing it
+    selected = threshold_extremes(y, [140], 10)
+    # That bucket's first minimum and its maximum
+    assert sorted(selected.tolist()) == [10, 15]
+    assert threshold_extremes(y, [], 10).size == 0
+    assert threshold_extremes(np.array([]), [140], 10).size == 0
+
+
+def frame(n):
+    x, y = series(n, seed=5)
+    return pd.DataFrame({"Date": pd.date_range("2024-01-01", periods=n, freq="h"), "Systolic_BP": y,
+                         "Heart_Rate": 70 + y / 10})
+
+
+def test_frames_that_fit_the_width_are_returned_unchanged():
+    data = frame(500)
+    assert downsample_frame(data, "Date", ["Systolic_BP"], 500) is data
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_downsampled_frame_keeps_the_ends_and_every_threshold_crossing(method):
+    data = frame(20_000)
+    data["Systolic_BP"] = 120.0
+    spikes = [3, 7_777, 19_998]
+    data.loc[spikes, "Systolic_BP"] = 145.0
+
+    rows = downsample_frame(data, "Date", ["Systolic_BP", "Heart_Rate"], 200,
+                            thresholds={"Systolic_BP": [140]}, method=method)
+    assert len(rows) < len(data) // 10
+    assert rows.index[0] == 0 and rows.index[-1] == len(data) - 1
+    assert rows.index.is_monotonic_increasing
+    assert set(spikes) <= set(rows.index)
+    assert (rows["Systolic_BP"] > 140).sum() == len(spikes)
@@ -0,0 +1,82 @@
+import pandas as pd
+import plotly.graph_objects as go
+
+from utils.figure_cache import FigureCache, fingerprint
+
+
+class Builds:
+    # Counts how often a figure actually had to be built
+    def __init__(self, points=3):
+        self.points = points
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return go.Figure(go.Scatter(x=list(range(self.points)), y=list(range(self.points))))
+
+
+def spec_size(points):
+    return len(Builds(points)().to_json())
+
+
+def test_same_inputs_hit_and_rebuild_nothing():
+    cache = FigureCache()
+    build = Builds()
+    first = cache.get_or_build(1, "bp", "a", build, version=1)
+    again = cache.get_or_build(1, "bp", "a", build, version=1)
+    assert build.calls == 1
+    assert again.to_dict() == first.to_dict()
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_version_bump_misses_and_drops_the_older_figures():
+    cache = FigureCache()
+    build = Builds()
+    cache.get_or_build(1, "bp", "a", build, version=1)
+    cache.get_or_build(1, "bp", "b", build, version=1)
+    cache.get_or_build(2, "bp", "a", build, version=1)
+
+    cache.get_or_build(1, "bp", "a", build, version=2)
+    assert build.calls == 4
+    stats = cache.stats()
+    assert stats["invalidations"] == 2
+    assert stats["entries"] == 2  # patient 1 at version 2, patient 2 untouched
+
+    # A session still on version 1 rebuilds without evicting the newer figure
+    cache.get_or_build(1, "bp", "a", build, version=1)
+    assert build.calls == 5
+    cache.get_or_build(1, "bp", "a", build, version=2)
+    assert build.calls == 5
+
+
+def test_eviction_keeps_the_total_under_the_limit():
+    size = spec_size(50)
+    cache = FigureCache(max_bytes=size * 3 + size // 2)
+    build = Builds(50)
+    for chart in range(10):
+        cache.get_or_build(1, f"chart {chart}", "a", build, version=1)
+        assert cache.stats()["bytes"] <= cache.max_bytes
+
+    stats = cache.stats()
+    assert stats["entries"] == 3 and stats["evictions"] == 7
+    # Least recently used go first
+    cache.get_or_build(1, "chart 9", "a", build, version=1)
+    assert build.calls == 10
+    cache.get_or_build(1, "chart 0", "a", build, version=1)
+    assert build.calls == 11
+
+
+def test_figures_larger_than_the_limit_are_not_kept():
+    cache = FigureCache(max_bytes=spec_size(50) - 1)
+    cache.get_or_build(1, "bp", "a", Builds(50), version=1)
+    assert cache.stats()["entries"] == 0 and cache.stats()["bytes"] == 0
+
+
+def test_fingerprint_follows_the_data():
+    frame = pd.DataFrame({"Systolic_BP": [120, 130]})
+    assert fingerprint(frame, 140) == fingerprint(frame.copy(), 140)
+    assert fingerprint(frame, 140) != fingerprint(frame, 150)
+    assert fingerprint(frame) != fingerprint(frame.rename(columns={"Systolic_BP": "Diastolic_BP"}))
+    changed = frame.copy()
+    changed.loc[1, "Systolic_BP"] = 131
+    assert fingerprint(frame) != fingerprint(changed)
@@ -0,0 +1,19 @@
+from utils.forum_html import post_html
+from utils.forum_model import ForumModel
+from utils.forum_store import ForumStore
+
+PAYLOAD = "<img src=x onerror=alert(document.cookie)>"
+
+
+def test_post_and_comments_are_escaped(tmp_path):
+    forum = ForumModel(ForumStore(tmp_path / "forum.db", seed_posts=[]))
+    try:
+        post = forum.create_post(f"Mallory {PAYLOAD}", "", f"Hello {PAYLOAD}")
+        post = forum.add_comment(post["id"], f"Eve {PAYLOAD}", "", f"Reply {PAYLOAD}")
+        html = post_html(post)
+    finally:
+        forum.close()
+
+    assert "<img src=x" not in html
+    assert html.count("&lt;img src=x onerror=alert(document.cookie)&gt;") == 4
+    assert "Hello &lt;img" in html and "Reply &lt;img" in html
@@ -0,0 +1,97 @@
+import copy
+import threading
+import time
+
+import pytest
+
+from utils.forum_model import ForumModel
+from utils.forum_store import ForumStore
+
+
+class SlowStore(ForumStore):
+    # Widens the window in which a flush is on its way to the store
+    def add_likes(self, counts):
+        time.sleep(0.002)
+        super().add_likes(counts)
+
+
+@pytest.fixture
+def forum(tmp_path):
+    # Flushes every few milliseconds or every 7 likes, and a one-post snapshot
+    # cache, so likes keep crossing flushes and snapshots keep being re-read
+    # from the store
+    forum = ForumModel(SlowStore(tmp_path / "forum.db", seed_posts=[]), flush_interval=0.002,
+                       flush_batch=7, max_posts=1)
+    yield forum
+    forum.close()
+
+
+def consistent(post):
+    # Every like and every comment moves the version on by one
+    return post["version"] == post["likes"] + len(post["comments"])
+
+
+def test_likes_across_flushes_are_neither_lost_nor_double_counted(forum):
+    posts = [forum.create_post("a", "", f"post {i}")["id"] for i in range(3)]
+    likes_per_thread = 150
+    errors = []
+
+    def like_all():
+        last_seen = dict.fromkeys(posts, 0)
+        for _ in range(likes_per_thread):
+            for post_id in posts:
+                forum.like(post_id)
+                seen = forum.get(post_id)["likes"]
+                # A count that goes backwards lost likes for a while (flushed
+                # from pending but not yet in the store); one past the total
+                # counted some twice
+                if not last_seen[post_id] < seen <= 4 * likes_per_thread:
+                    errors.append(f"{post_id}: {last_seen[post_id]} then {seen} likes")
+                last_seen[post_id] = seen
+
+    threads = [threading.Thread(target=like_all) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert forum.flushes > 1
+    for post_id in posts:
+        assert forum.get(post_id)["likes"] == 4 * likes_per_thread
+    forum.close()
+    for post_id in posts:
+        assert forum.store.get(post_id)["likes"] == 4 * likes_per_thread
+
+
+def test_readers_never_see_a_half_updated_snapshot(forum):
+    post_id = forum.create_post("a", "", "hello")["id"]
+    other_id = forum.create_post("a", "", "evicts the first one")["id"]
+    done = threading.Event()
+    problems = []
+
+    def read():
+        held = []
+        while not done.is_set():
+            for post in [forum.get(post_id), *forum.page()[0], *forum.page("likes")[0]]:
+                if not consistent(post):
+                    problems.append(post)
+                held.append((post, copy.deepcopy(post)))
+        # Snapshots already handed out are never changed in place
+        problems.extend(post for post, was in held[::50] if post != was)
+
+    readers = [threading.Thread(target=read) for _ in range(3)]
+    for reader in readers:
+        reader.start()
+    for i in range(300):
+        forum.like(post_id)
+        forum.like(other_id)
+        if i % 30 == 0:
+            forum.add_comment(post_id, "b", "", f"comment {i}")
+    done.set()
+    for reader in readers:
+        reader.join()
+
+    assert problems == []
+    post = forum.get(post_id)
+    assert post["likes"] == 300 and len(post["comments"]) == 10 and consistent(post)
@@ -0,0 +1,141 @@
+import pytest
+
+from utils import forum_store
+from utils.forum_model import ForumModel
+from utils.forum_store import ForumStore, highlight, match_query
+
+
+def new_store(tmp_path):
+    return ForumStore(tmp_path / "forum.db", seed_posts=[])
+
+
+def contents(posts):
+    return [post["content"] for post in posts]
+
+
+# --- search ---
+
+def test_all_words_must_match_before_any_word_may(tmp_path):
+    store = new_store(tmp_path)
+    store.create_post("a", "", "Low blood sugar after running")
+    store.create_post("b", "", "Blood pressure readings in the morning")
+    assert contents(store.search("blood pressure")) == ["Blood pressure readings in the morning"]
+    # No post has both words: falls back to either word
+    assert sorted(contents(store.search("pressure sugar"))) == [
+        "Blood pressure readings in the morning", "Low blood sugar after running"]
+    assert store.search("insulin") == []
+    assert store.search("?!") == []
+
+
+def test_query_syntax_in_the_input_is_matched_as_words(tmp_path):
+    store = new_store(tmp_path)
+    store.create_post("a", "", "Is NEAR normal OK?")
+    assert match_query('near" OR (x') == '"near" "or" "x"'
+    assert match_query("near or x", " OR ") == '"near" OR "or" OR "x"'
+    assert contents(store.search('NEAR" OR (normal')) == ["Is NEAR normal OK?"]
+
+
+def test_snippets_escape_the_text_and_mark_the_match(tmp_path):
+    store = new_store(tmp_path)
+    store.create_post("a", "", "My <b>dizziness</b> & headaches")
+    [post] = store.search("dizziness")
+    assert post["snippet"] == "My &lt;b&gt;<mark>dizziness</mark>&lt;/b&gt; &amp; headaches"
+    assert highlight("<i>\x02x\x03</i>") == "&lt;i&gt;<mark>x</mark>&lt;/i&gt;"
+
+
+def test_new_posts_and_comments_are_indexed_once(tmp_path):
+    store = new_store(tmp_path)
+    post = store.create_post("a", "", "Starting metformin next week")
+    store.add_comment(post["id"], "b", "", "Take it with food to avoid nausea")
+    store.like(post["id"])
+    store.add_likes({post["id"]: 2})
+
+    [hit] = store.search("nausea")
+    assert hit["id"] == post["id"] and hit["match"] == "comment"
+    [hit] = store.search("metformin")
+    assert hit["match"] == "post"
+    # Likes update the post row but add nothing to the index
+    indexed = store.db.query_one("SELECT COUNT(*) FROM forum_fts")[0]
+    assert indexed == 2
+
+
+def test_posts_from_before_search_existed_are_indexed_on_open(tmp_path):
+    store = new_store(tmp_path)
+    store.create_post("a", "", "Knee pain when climbing stairs")
+    with store.db.transaction() as conn:
+        conn.execute("DROP TABLE forum_fts")
+    store.close()
+    assert contents(new_store(tmp_path).search("stairs")) == ["Knee pain when climbing stairs"]
+
+
+def test_only_the_newest_matches_are_ranked(tmp_path, monkeypatch):
+    # An older post that matches best is not found once newer matches fill
+    # the window
+    monkeypatch.setattr(forum_store, "SEARCH_WINDOW", 3)
+    store = new_store(tmp_path)
+    store.create_post("a", "", "asthma asthma asthma inhaler")
+    for i in range(3):
+        store.create_post("b", "", f"asthma note {i} " + "filler " * 20)
+    results = contents(store.search("asthma"))
+    assert len(results) == 3
+    assert "asthma asthma asthma inhaler" not in results
+
+    monkeypatch.setattr(forum_store, "SEARCH_WINDOW", 4)
+    assert contents(store.search("asthma"))[0] == "asthma asthma asthma inhaler"
+
+
+# --- pages ---
+
+def add_posts(store, n):
+    # Few distinct times and like counts, so most sort keys tie
+    with store.db.transaction() as conn:
+        for i in range(n):
+            conn.execute("INSERT INTO posts (id, user, avatar, content, created_at, likes) VALUES (?, ?, ?, ?, ?, ?)",
+                         (f"p{i}", "a", "", f"post {i}", 1000.0 + i // 4, i % 3))
+
+
+def walk(store, sort, limit):
+    posts, cursor, pages = [], None, 0
+    while True:
+        page, cursor = store.page(sort, after=cursor, limit=limit)
+        posts += page
+        pages += 1
+        if cursor is None:
+            return posts, pages
+
+
+def expected(store, sort):
+    rows = store.db.query("SELECT id, likes, created_at, pk FROM posts")
+    key = {"newest": lambda r: (r["created_at"], r["pk"]),
+           "likes": lambda r: (r["likes"], r["created_at"], r["pk"])}[sort]
+    return [row["id"] for row in sorted(rows, key=key, reverse=True)]
+
+
+@pytest.mark.parametrize("sort", ["newest", "likes"])
+@pytest.mark.parametrize("limit", [1, 4, 7, 25, 30])
+def test_pages_continue_exactly_where_the_last_one_ended(tmp_path, sort, limit):
+    store = new_store(tmp_path)
+    add_posts(store, 25)
+    posts, pages = walk(store, sort, limit)
+    assert [post["id"] for post in posts] == expected(store, sort)
+    assert pages == max(-(-25 // limit), 1)
+
+
+def test_new_posts_do_not_shift_later_pages(tmp_path):
+    store = new_store(tmp_path)
+    add_posts(store, 12)
+    first, cursor = store.page("newest", limit=5)
+    store.create_post("b", "", "brand new")
+    second, _ = store.page("newest", after=cursor, limit=5)
+    assert [post["id"] for post in first + second] == expected(store, "newest")[1:11]
+
+
+def test_comment_on_a_missing_post_is_not_stored(tmp_path):
+    store = new_store(tmp_path)
+    assert store.add_comment("no-such-post", "a", "", "hello") is None
+    assert store.db.query_one("SELECT COUNT(*) FROM comments")[0] == 0
+    forum = ForumModel(store)
+    try:
+        assert forum.add_comment("no-such-post", "a", "", "hello") is None
+    finally:
+        forum.close()
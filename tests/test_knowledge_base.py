@@ -0,0 +1,96 @@
+import json
+import warnings
+
+import pytest
+
+from utils.knowledge_base import KnowledgeBase
+
+TOPICS = ["blood pressure readings", "insulin dosing schedule", "low sodium recipes", "walking after surgery",
+          "sleep and heart rate", "cholesterol test results", "migraine triggers", "knee pain exercises"]
+
+
+def passages(version=0):
+    return [(f"p{i}", "resource", f"{topic} guide version {version}") for i, topic in enumerate(TOPICS)]
+
+
+def indexed_rows(kb):
+    return {row for table in kb._tables for bucket in table.values() for row in bucket}
+
+
+def vector_rows(kb):
+    return kb._vectors_path.stat().st_size // (4 * kb.dim)
+
+
+def test_edited_passage_leaves_the_index(tmp_path):
+    kb = KnowledgeBase(tmp_path)
+    kb.add(passages())
+    assert kb.add(passages()) == 0
+    kb.add([("p0", "resource", "blood pressure readings guide, rewritten")])
+
+    assert len(kb.passages) == len(TOPICS) + 1
+    assert 0 not in indexed_rows(kb)
+    assert indexed_rows(kb) == set(kb._ids.values())
+    results = kb.search("blood pressure readings guide", k=5, min_score=0)
+    assert [r["text"] for r in results if r["id"] == "p0"] == ["blood pressure readings guide, rewritten"]
+
+
+def test_superseded_rows_are_compacted_out_of_both_files(tmp_path):
+    kb = KnowledgeBase(tmp_path)
+    kb.add(passages())
+    kb.add(passages(version=1)[:2])
+    assert len(kb.passages) == len(TOPICS) + 2
+
+    kb.add(passages(version=1)[2:])  # now half the rows are superseded
+    assert len(kb.passages) == len(TOPICS)
+    assert kb._ids == {f"p{i}": i for i in range(len(TOPICS))}
+    assert len((tmp_path / "passages.jsonl").read_text().splitlines()) == len(TOPICS)
+    assert vector_rows(kb) == 64  # back to the initial capacity
+    assert indexed_rows(kb) == set(range(len(TOPICS)))
+
+    before = kb.search("insulin dosing", k=3)
+    reopened = KnowledgeBase(tmp_path)
+    assert reopened.search("insulin dosing", k=3) == before
+    assert before[0]["text"] == "insulin dosing schedule guide version 1"
+
+
+def test_superseded_rows_left_on_disk_are_dropped_on_open(tmp_path):
+    kb = KnowledgeBase(tmp_path)
+    kb.add(passages())
+    kb.add(passages(version=1)[:1])
+    assert len(kb.passages) == len(TOPICS) + 1
+
+    reopened = KnowledgeBase(tmp_path)
+    assert len(reopened.passages) == len(TOPICS)
+    assert reopened.passages[-1]["text"] == "blood pressure readings guide version 1"
+    assert reopened.search("blood pressure readings", k=1) == kb.search("blood pressure readings", k=1)
+
+
+@pytest.mark.parametrize("damage", ["torn tail", "corrupt line", "not a passage"])
+def test_unreadable_lines_are_skipped_with_a_warning(tmp_path, damage):
+    kb = KnowledgeBase(tmp_path)
+    kb.add(passages())
+    expected = kb.search("knee pain exercises", k=1)
+    meta = tmp_path / "passages.jsonl"
+    lines = meta.read_text(encoding="utf-8").splitlines(keepends=True)
+    if damage == "torn tail":
+        lines[-1] = lines[-1][:25]
+    elif damage == "corrupt line":
+        lines[3] = "{\"id\": \"p3\", \"sour\x00\n"
+    else:
+        lines[3] = json.dumps({"id": "p3"}) + "\n"
+    meta.write_text("".join(lines), encoding="utf-8")
+
+    with pytest.warns(UserWarning, match="skipping unreadable passage on line"):
+        reopened = KnowledgeBase(tmp_path)
+    assert len(reopened.passages) == len(TOPICS) - 1
+    lost = "p7" if damage == "torn tail" else "p3"
+    assert lost not in reopened._ids
+    # The rows after the bad line still line up with their vectors
+    if damage != "torn tail":
+        assert reopened.search("knee pain exercises", k=1) == expected
+
+    # The files were rewritten without it, and new passages append cleanly
+    reopened.add([(lost, "resource", "restored passage about " + TOPICS[int(lost[1:])])])
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert len(KnowledgeBase(tmp_path).passages) == len(TOPICS)
@@ -0,0 +1,24 @@
+import pandas as pd
+import pytest
+
+from utils.lab_ranges import classify_labs, parse_range
+
+
+def test_parse_range_forms():
+    assert parse_range("13.5-17.5") == (13.5, 17.5, True, True)
+    assert parse_range("<200")[1:] == (200.0, True, False)
+    assert parse_range(">=40")[0] == 40.0
+    with pytest.raises(ValueError):
+        parse_range("normal")
+
+
+def test_classify_labs_uses_each_rows_range():
+    labs = pd.DataFrame({
+        "Test": ["LDL", "LDL", "HDL", "Hemoglobin", "Hemoglobin"],
+        "Unit": ["mg/dL", "mg/dL", "mg/dL", "g/dL", "g/dL"],
+        "Reference_Range": ["<100", "<100", ">40", "13.5-17.5", "13.5-17.5"],
+        "Value": [80.0, 130.0, 30.0, 17.2, 15.0],
+    })
+    result = classify_labs(labs)
+    assert result["Status"].tolist() == ["Normal", "High", "Low", "Borderline High", "Normal"]
+    assert result["Range_High"].tolist()[:2] == [100.0, 100.0]
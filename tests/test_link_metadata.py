@@ -0,0 +1,81 @@
+import pytest
+
+from tools.fake_links import FakeLinksServer
+from utils.link_metadata import LinkChecker, MetadataStore, is_public_address
+from utils.resource_store import normalize_link
+
+
+@pytest.fixture
+def server():
+    server = FakeLinksServer().start()
+    yield server
+    server.shutdown()
+
+
+def check(tmp_path, links, allowed_hosts=()):
+    checker = LinkChecker(MetadataStore(tmp_path / "link_metadata.db"), tmp_path / "thumbnails",
+                          retries=2, backoff=0.01, host_interval=0, allowed_hosts=allowed_hosts).start()
+    for link in links:
+        assert checker.submit(link)
+    assert checker.wait_idle(30)
+    checker.close()
+    records = checker.cache.get_many(normalize_link(link) for link in links)
+    return [records[normalize_link(link)] for link in links]
+
+
+@pytest.mark.parametrize("address", ["127.0.0.1", "10.1.2.3", "192.168.0.10", "169.254.169.254",
+                                     "100.64.0.1", "0.0.0.0", "::1", "fe80::1%eth0", "fd00::1",
+                                     "::ffff:127.0.0.1", "224.0.0.1"])
+def test_non_public_addresses(address):
+    assert not is_public_address(address)
+
+
+def test_public_addresses():
+    assert is_public_address("93.184.215.14")
+    assert is_public_address("2606:2800:21f:cb07:6820:80da:af6b:8b2c")
+
+
+def test_localhost_is_not_a_catalog_link():
+    assert normalize_link("http://localhost:8501/") is None
+
+
+def test_loopback_is_refused_unless_allowed(tmp_path, server):
+    [record] = check(tmp_path, [f"{server.url}/article"])
+    assert record["status"] == "unreachable"
+    assert record["error"].startswith("refused")
+    assert server.hits("/article") == 0
+
+    (tmp_path / "allowed").mkdir()
+    [record] = check(tmp_path / "allowed", [f"{server.url}/article"], allowed_hosts=["127.0.0.1"])
+    assert record["status"] == "ok"
+
+
+def test_every_redirect_hop_is_checked(tmp_path, server):
+    # /internal redirects to the same server as "localhost", which is not allowed
+    [record] = check(tmp_path, [f"{server.url}/internal"], allowed_hosts=["127.0.0.1"])
+    assert record["status"] == "unreachable"
+    assert record["error"].startswith("refused")
+    assert record["attempts"] == 1
+    assert server.hits("/article") == 0
+
+
+def test_requests_go_to_the_checked_address(server):
+    # The URL's host does not resolve at all: the connection can only have
+    # gone to the pinned address, with the original Host header kept
+    import asyncio
+
+    import httpx
+
+    from utils.link_metadata import PinnedTransport
+
+    port = server.server_address[1]
+
+    async def fetch():
+        async with httpx.AsyncClient(transport=PinnedTransport()) as client:
+            return await client.get(f"http://checked.invalid:{port}/article",
+                                    extensions={"pinned_address": "127.0.0.1"})
+
+    response = asyncio.run(fetch())
+    assert response.status_code == 200
+    assert str(response.url) == f"http://checked.invalid:{port}/article"
+    assert server.hosts[-1] == f"checked.invalid:{port}"
@@ -0,0 +1,90 @@
+import threading
+
+import pytest
+
+from utils.llm_client import PooledChatClient, QueueTimeoutError
+
+
+class FakeClient:
+    def chat(self, model, messages, stream=False, **kwargs):
+        if stream:
+            return iter([{"message": {"content": "ok"}}])
+        return {"message": {"content": "ok"}}
+
+
+class Stop(BaseException):
+    # Stands in for streamlit's StopException / RerunException
+    pass
+
+
+def raise_stop(*args):
+    raise Stop()
+
+
+def test_queued_caller_that_goes_away_gives_up_its_place():
+    client = PooledChatClient(FakeClient, max_concurrent=1, queue_timeout=2)
+    holder = client.stream_chat("m", [])
+    next(holder)  # holds the only slot
+
+    with pytest.raises(Stop):
+        client.chat("m", [], on_queued=raise_stop)
+    assert client.stats()["waiting"] == 0
+
+    holder.close()
+    assert client.chat("m", [])["message"]["content"] == "ok"
+    stats = client.stats()
+    assert (stats["active"], stats["waiting"]) == (0, 0)
+
+
+def test_failing_on_admitted_releases_the_slot():
+    client = PooledChatClient(FakeClient, max_concurrent=1, queue_timeout=2)
+    with pytest.raises(Stop):
+        client.chat("m", [], on_admitted=raise_stop)
+    with pytest.raises(Stop):
+        list(client.stream_chat("m", [], on_admitted=raise_stop))
+    assert client.stats()["active"] == 0
+    assert client.chat("m", [])["message"]["content"] == "ok"
+
+
+def test_queue_timeout_removes_the_ticket():
+    client = PooledChatClient(FakeClient, max_concurrent=1, queue_timeout=0.2, poll_interval=0.05)
+    holder = client.stream_chat("m", [])
+    next(holder)
+    with pytest.raises(QueueTimeoutError):
+        client.chat("m", [])
+    stats = client.stats()
+    assert (stats["waiting"], stats["timed_out"]) == (0, 1)
+    holder.close()
+    done = threading.Event()
+    threading.Thread(target=lambda: (client.chat("m", []), done.set())).start()
+    assert done.wait(2)
+
+
+def test_slow_client_creation_does_not_hold_up_the_queue():
+    building, release = threading.Event(), threading.Event()
+    created = []
+
+    def slow_factory():
+        # Like the first `import ollama`
+        created.append(1)
+        building.set()
+        release.wait(5)
+        return FakeClient()
+
+    client = PooledChatClient(slow_factory, max_concurrent=2, queue_timeout=2)
+    first = threading.Thread(target=lambda: client.chat("m", []))
+    first.start()
+    assert building.wait(2)
+
+    # Admission and stats go on while the client is being built
+    admitted = threading.Event()
+    second = threading.Thread(target=lambda: client.chat("m", [], on_admitted=admitted.set))
+    second.start()
+    assert admitted.wait(1)
+    assert client.stats()["active"] == 2
+
+    release.set()
+    first.join(2)
+    second.join(2)
+    assert created == [1]
+    assert client.stats()["active"] == 0
@@ -0,0 +1,26 @@
+from utils.resource_store import ResourceStore, absolute_link, normalize_link
+
+RESOURCE = {"title": "Asthma basics", "description": "", "type": "Article", "posted_by": "Dr. Lee", "tags": "asthma"}
+
+
+def test_links_without_a_scheme_are_stored_as_https(tmp_path):
+    store = ResourceStore(tmp_path / "resources.db", seed_resources=[])
+    stored, created = store.add({**RESOURCE, "link": "example.org/asthma"})
+    assert created
+    assert stored["link"] == "https://example.org/asthma"
+    assert stored["link_key"] == "example.org/asthma"
+
+
+def test_spellings_of_one_link_are_stored_once(tmp_path):
+    store = ResourceStore(tmp_path / "resources.db", seed_resources=[])
+    store.add({**RESOURCE, "link": "HTTPS://www.Example.org/asthma/?utm_source=x#top"})
+    stored, created = store.add({**RESOURCE, "link": "example.org/asthma"})
+    assert not created
+    assert stored["link"] == "https://www.Example.org/asthma/?utm_source=x#top"
+    assert store.count() == 1
+
+
+def test_absolute_link_rejects_what_normalize_link_rejects():
+    assert absolute_link("not a link") is None and normalize_link("not a link") is None
+    assert absolute_link("ftp://example.org/file") is None
+    assert absolute_link(" http://example.org ") == "http://example.org"
@@ -0,0 +1,75 @@
+from utils.response_cache import ResponseCache, make_key, replay_stream
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def ask(*contents):
+    return [{"role": "user" if i % 2 == 0 else "ai", "content": text} for i, text in enumerate(contents)]
+
+
+def test_entries_expire_after_the_ttl():
+    clock = Clock()
+    cache = ResponseCache(ttl_seconds=60, clock=clock)
+    cache.put("k", "reply")
+    clock.now = 60
+    assert cache.get("k") == "reply"
+    clock.now = 60.5
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+    # A fresh put starts the TTL again
+    cache.put("k", "newer reply")
+    clock.now = 100
+    assert cache.get("k") == "newer reply"
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2, clock=Clock())
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"  # "b" is now the oldest
+    cache.put("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_counters_follow_hits_misses_and_evictions():
+    clock = Clock()
+    cache = ResponseCache(max_entries=1, ttl_seconds=10, clock=clock)
+    assert cache.stats() == {"entries": 0, "hits": 0, "misses": 0, "evictions": 0, "hit_rate": 0.0}
+
+    cache.get("a")
+    cache.put("a", "1")
+    cache.get("a")
+    cache.get("a")
+    cache.put("b", "2")
+    cache.put("c", "")  # empty replies are not stored
+    clock.now = 11
+    cache.get("b")  # expired
+    assert cache.stats() == {"entries": 0, "hits": 2, "misses": 2, "evictions": 1, "hit_rate": 0.5}
+
+
+def test_key_ignores_case_and_whitespace_only():
+    key = make_key("llama3", ask("What is  a normal\nblood pressure? ", "About 120/80."))
+    assert make_key("llama3", ask("what is a normal blood pressure?", "  about 120/80.")) == key
+    assert make_key("llama3.1", ask("What is a normal blood pressure?", "About 120/80.")) != key
+    assert make_key("llama3", ask("What is a normal blood pressure?")) != key
+    assert make_key("llama3", ask("What is a normal blood pressure!", "About 120/80.")) != key
+    # The same words from the other side of the conversation are a different prompt
+    swapped = [{"role": "ai", "content": "What is a normal blood pressure?"},
+               {"role": "user", "content": "About 120/80."}]
+    assert make_key("llama3", swapped) != key
+
+
+def test_replayed_stream_joins_back_to_the_reply():
+    text = "Drink water,\n\nand rest.  See a doctor if it persists."
+    chunks = list(replay_stream(text))
+    assert "".join(chunks) == text
+    assert len(chunks) == 10  # one per word
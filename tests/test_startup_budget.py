@@ -0,0 +1,44 @@
+import pytest
+
+from tools.startup_report import BUDGETS_MS, LAZY_MODULES, over_budget, probe, probe_env
+
+# Timings on a shared CI machine vary run to run, so they are only checked
+# against a multiple of the budget; the deterministic check is which modules
+# a page's imports load
+TIMING_SLACK = 3
+
+
+@pytest.fixture(scope="module")
+def results(tmp_path_factory):
+    # One untimed pass fills the data directory, as in tools/startup_report.py,
+    # then one measured fresh process per page
+    env = probe_env(tmp_path_factory.mktemp("startup"))
+    for page in BUDGETS_MS:
+        probe(page, env)
+    return {page: probe(page, env) for page in BUDGETS_MS}
+
+
+@pytest.mark.parametrize("page", list(BUDGETS_MS))
+def test_page_imports_leave_the_heavy_libraries_unloaded(results, page):
+    assert results[page]["eager"] == []
+    assert results[page]["exceptions"] == []
+
+
+@pytest.mark.parametrize("page", list(BUDGETS_MS))
+def test_page_is_within_a_loose_multiple_of_its_budget(results, page):
+    budgets = [budget * TIMING_SLACK for budget in BUDGETS_MS[page]]
+    over = over_budget(results[page], budgets)
+    assert not over, f"{page}: {', '.join(over)}"
+
+
+def test_over_budget_reports_each_measure():
+    result = {"import_ms": 150, "render_ms": 900, "rerun_ms": 400, "eager": [], "exceptions": []}
+    assert over_budget(result, (100, 1000, 250)) == ["import_ms 150 > 100", "rerun_ms 400 > 250"]
+    assert over_budget({**result, "eager": ["pandas"], "exceptions": ["boom"]}, (None, None, None)) == [
+        "imported eagerly: pandas", "exception: boom"]
+
+
+def test_lazy_modules_match_the_proxies():
+    from utils import lazy_imports
+    proxied = {value._name for value in vars(lazy_imports).values() if isinstance(value, lazy_imports.LazyModule)}
+    assert proxied == set(LAZY_MODULES)
@@ -0,0 +1,37 @@
+import threading
+
+import pytest
+
+from utils.vitals_aggregates import VitalsAggregates
+from utils.vitals_generator import generate_vitals_batch, sample_times
+from utils.vitals_store import VitalsStore
+
+
+def batch(day):
+    times = sample_times(f"2024-03-{day:02d}", f"2024-03-{day:02d} 23:00", "h")
+    return generate_vitals_batch([3], times, batch_index=day)
+
+
+def window_stats(snapshot):
+    return {(name, column): (stats["count"], stats["mean"], stats["min"], stats["max"])
+            for name, columns in snapshot["windows"].items() for column, stats in columns.items()}
+
+
+@pytest.mark.parametrize("trial", range(5))
+def test_bootstrap_during_writes_loses_no_rows(tmp_path, trial):
+    store = VitalsStore(tmp_path)
+    store.write(batch(1))
+    aggregates = VitalsAggregates()
+    store.subscribe(aggregates.on_write)
+
+    writer = threading.Thread(target=lambda: [store.write(batch(day)) for day in range(2, 16)])
+    writer.start()
+    for _ in range(trial * 3):
+        store.version(3)  # stagger the first get() against the writes
+    aggregates.get(store, 3)
+    writer.join()
+
+    live = aggregates.get(store, 3)
+    fresh = VitalsAggregates().get(store, 3)
+    assert live["last_time"] == fresh["last_time"]
+    assert window_stats(live) == pytest.approx(window_stats(fresh))
@@ -0,0 +1,17 @@
+from utils.vitals_generator import VITAL_COLUMNS, generate_vitals, vitals_frame
+
+ARGS = ("2024-01-01", "2024-01-02", "h")
+
+
+def test_generate_vitals_is_repeatable():
+    first, second = generate_vitals(3, *ARGS, batch_patients=2), generate_vitals(3, *ARGS, batch_patients=2)
+    assert len(first["patient_id"]) == 3 * 25
+    assert all((first[name] == second[name]).all() for name in first)
+
+
+def test_generate_vitals_with_no_patients_is_empty():
+    columns = generate_vitals(0, *ARGS)
+    reference = generate_vitals(1, *ARGS)
+    assert list(columns) == ["patient_id", "Date"] + VITAL_COLUMNS
+    assert all(len(values) == 0 and values.dtype == reference[name].dtype for name, values in columns.items())
+    assert vitals_frame(columns).empty
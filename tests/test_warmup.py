@@ -0,0 +1,22 @@
+from utils.warmup import ModelReadiness, warm_up
+
+
+class FlakyClient:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def chat(self, model, messages, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("connection refused")
+        return {"message": {"content": "H"}}
+
+
+def test_warm_up_retries_until_the_model_answers():
+    client = FlakyClient(failures=3)
+    readiness = ModelReadiness("llama3")
+    warm_up(client, readiness, "system", retry_initial=0.01, retry_max=0.02)
+    assert client.calls == 4
+    assert readiness.state == "ready"
+    assert readiness.error is None
@@ -0,0 +1,46 @@
+import os
+import sys
+import types
+
+import pytest
+
+from utils.worker_pool import make_process_pool
+
+
+def test_workers_do_not_rerun_the_parents_main(tmp_path, monkeypatch):
+    # Under Streamlit, __main__ is the page script that ran last
+    marker = tmp_path / "page-ran"
+    page = tmp_path / "page.py"
+    page.write_text(f"open({str(marker)!r}, 'w').close()\n")
+    main = types.ModuleType("__main__")
+    main.__file__ = str(page)
+    monkeypatch.setitem(sys.modules, "__main__", main)
+
+    pool = make_process_pool(2, preload=["utils.cohort_analytics"])
+    if pool is None:
+        pytest.skip("no forkserver on this platform")
+    try:
+        pids = {pool.submit(os.getpid).result(timeout=60) for _ in range(4)}
+    finally:
+        pool.shutdown()
+    assert pids and os.getpid() not in pids
+    assert not marker.exists()
+
+
+def test_cohort_shards_computed_in_the_pool_match_a_serial_run():
+    from utils.cohort_analytics import run_cohort, summarize
+
+    definition = {"n_patients": 400}
+    pool = make_process_pool(2, preload=["numpy", "pandas", "utils.cohort_analytics"])
+    if pool is None:
+        pytest.skip("no forkserver on this platform")
+    try:
+        pooled = summarize(run_cohort(definition, pool, shard_batches=2))
+    finally:
+        pool.shutdown()
+    serial = summarize(run_cohort(definition, shard_batches=2))
+
+    assert pooled["patients"] == serial["patients"] > 0
+    assert pooled["shards"] == serial["shards"] > 1
+    for name in ("by_group", "lab_status", "conditions"):
+        assert pooled[name].equals(serial[name]), name
@@ -0,0 +1,137 @@
+# tools/check_links.py
+# Runs the resource link checker (utils/link_metadata.py) against the fake
+# link server and checks what it cached: titles, thumbnails, PDF page counts,
+# broken and unreachable links, retries, the per-host rate limit, that a
+# cached link is not fetched again and that private addresses are refused
+# unless allowed.
+#
+#   python tools/check_links.py
+#   python tools/check_links.py --workers 8 --host-interval-ms 100
+#
+# Exits with status 1 when any check fails, so it can gate CI.
+import argparse
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from tools.fake_links import FakeLinksServer, PDF_PAGES, COMPRESSED_PDF_PAGES  # noqa: E402
+from utils.assets import AssetPipeline  # noqa: E402
+from utils.link_metadata import LinkChecker, MetadataStore, THUMBNAIL_WIDTH  # noqa: E402
+from utils.resource_store import normalize_link  # noqa: E402
+
+
+def closed_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the link checker against a local fake web server.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--host-interval-ms", type=float, default=100)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--timeout-s", type=float, default=1.0, help="request timeout (the slow page takes 3s)")
+    parser.add_argument("--idle-timeout-s", type=float, default=60)
+    args = parser.parse_args()
+
+    server = FakeLinksServer(flaky_failures=args.retries - 1).start()
+    base = server.url
+    links = {
+        "article": f"{base}/article",
+        "video": f"{base}/video",
+        "pdf": f"{base}/guide.pdf",
+        "compressed_pdf": f"{base}/compressed.pdf",
+        "missing": f"{base}/missing",
+        "moved": f"{base}/moved",
+        "flaky": f"{base}/flaky",
+        "slow": f"{base}/slow",
+        "unreachable": f"http://127.0.0.1:{closed_port()}/",
+        "internal_redirect": f"{base}/internal",
+        "private": "http://10.0.0.1/",
+    }
+
+    with tempfile.TemporaryDirectory(prefix="healthbridge-links-") as data_dir:
+        pipeline = AssetPipeline(cache_dir=Path(data_dir) / "variants")
+        checker = LinkChecker(MetadataStore(Path(data_dir) / "link_metadata.db"), Path(data_dir) / "thumbnails",
+                              pipeline=pipeline, workers=args.workers, timeout=args.timeout_s,
+                              retries=args.retries, backoff=0.05, host_interval=args.host_interval_ms / 1000,
+                              allowed_hosts=[server.server_address[0]]).start()
+
+        started = time.perf_counter()
+        submit_ms = []
+        for link in list(links.values()) + [links["pdf"]]:
+            t = time.perf_counter()
+            checker.submit(link)
+            submit_ms.append((time.perf_counter() - t) * 1000)
+        idle = checker.wait_idle(args.idle_timeout_s)
+        elapsed = time.perf_counter() - started
+
+        records = checker.cache.get_many(normalize_link(link) for link in links.values())
+        result = {name: records.get(normalize_link(link), {}) for name, link in links.items()}
+
+        # Already cached: submitting again must not fetch
+        article_hits = server.hits("/article")
+        checker.submit(links["article"])
+        checker.wait_idle(args.idle_timeout_s)
+
+        # Requests are spaced when sent; arrival times at the server jitter a
+        # little, so check the overall span and allow half an interval per gap
+        arrivals = [t for t, _ in server.requests]
+        gaps = [b - a for a, b in zip(arrivals, arrivals[1:])]
+        min_gap_ms = min(gaps) * 1000 if gaps else 0.0
+        span_ms = (arrivals[-1] - arrivals[0]) * 1000 if arrivals else 0.0
+        thumbnail = result["article"].get("thumbnail")
+
+        checks = [
+            ("queue drained", idle),
+            ("submit never blocks (<5 ms)", max(submit_ms) < 5),
+            ("article ok with page title", result["article"].get("status") == "ok"
+             and result["article"].get("title") == "Understanding Hypertension | Fake Heart Association"),
+            ("article thumbnail downloaded and resized", bool(thumbnail) and Path(thumbnail).is_file()
+             and pipeline.image(thumbnail, THUMBNAIL_WIDTH) is not None),
+            ("video title from og:title", result["video"].get("title") == "Diabetes & Nutrition"),
+            ("video thumbnail from twitter:image", bool(result["video"].get("thumbnail"))),
+            ("thumbnail shared by both pages fetched once", server.hits("/thumb.png") == 1),
+            ("PDF page count", result["pdf"].get("page_count") == PDF_PAGES),
+            ("compressed PDF page count", result["compressed_pdf"].get("page_count") == COMPRESSED_PDF_PAGES),
+            ("duplicate submission fetched once", server.hits("/guide.pdf") == 1),
+            ("missing page is broken (404), not retried", result["missing"].get("status") == "broken"
+             and result["missing"].get("http_status") == 404 and result["missing"].get("attempts") == 1),
+            ("redirect followed", result["moved"].get("status") == "ok"
+             and str(result["moved"].get("final_url", "")).endswith("/article")),
+            ("503s retried until ok", result["flaky"].get("status") == "ok"
+             and result["flaky"].get("attempts") == args.retries),
+            ("timeout retried, then unreachable", result["slow"].get("status") == "unreachable"
+             and result["slow"].get("attempts") == args.retries),
+            ("closed port unreachable", result["unreachable"].get("status") == "unreachable"),
+            ("redirect to a private address refused", result["internal_redirect"].get("status") == "unreachable"
+             and str(result["internal_redirect"].get("error", "")).startswith("refused")),
+            ("private address refused, not retried", result["private"].get("status") == "unreachable"
+             and str(result["private"].get("error", "")).startswith("refused")
+             and result["private"].get("attempts") == 1),
+            ("cached link not fetched again", server.hits("/article") == article_hits),
+            (f"per-host rate limit ({args.host_interval_ms:.0f} ms between requests)",
+             span_ms >= (len(arrivals) - 1) * args.host_interval_ms - 5 and min_gap_ms >= args.host_interval_ms / 2),
+        ]
+        checker.close()
+
+    print(f"{len(server.requests)} requests to the fake server in {elapsed:.2f}s "
+          f"(min gap {min_gap_ms:.0f} ms, max submit {max(submit_ms):.2f} ms)")
+    for name, record in result.items():
+        print(f"  {name:17} {record.get('status', '-'):12} http={record.get('http_status')} "
+              f"attempts={record.get('attempts')} title={record.get('title')!r} pages={record.get('page_count')}")
+    failed = [name for name, ok in checks if not ok]
+    for name, ok in checks:
+        print(f"{'PASS' if ok else 'FAIL'}  {name}")
+    server.shutdown()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+# tools/fake_links.py
+# Stand-in web server for the resource link checker (utils/link_metadata.py):
+# an article and a video page with preview tags, a thumbnail image, PDFs with
+# a known page count, a missing page, a redirect, a redirect to a private
+# address, a page that fails before it succeeds and a slow one. Every request
+# is logged with its arrival time so retries and per-host rate limits can be
+# checked.
+#
+# The checker refuses loopback addresses unless they are allowed, so point the
+# app at this server with LINK_ALLOWED_HOSTS (see utils/config.py):
+#
+#   python tools/fake_links.py --port 11556
+#   LINK_ALLOWED_HOSTS=127.0.0.1 streamlit run Home.py
+import argparse
+import struct
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ARTICLE_HTML = """<!doctype html>
+<html><head>
+<title>Understanding Hypertension | Fake Heart Association</title>
+<meta property="og:image" content="/thumb.png">
+</head><body><h1>High blood pressure</h1></body></html>"""
+
+VIDEO_HTML = """<!doctype html>
+<html><head>
+<title>Video - FakeTube</title>
+<meta property="og:title" content="Diabetes &amp; Nutrition">
+<meta name="twitter:image" content="/thumb.png">
+</head><body></body></html>"""
+
+PDF_PAGES = 5
+COMPRESSED_PDF_PAGES = 7
+
+
+def png_bytes(width=64, height=36, colour=(52, 152, 219)):
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    row = b"\x00" + bytes(colour) * width
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(row * height)) + chunk(b"IEND", b""))
+
+
+def pdf_bytes(pages, compressed=False):
+    # Enough of a PDF for a page count: catalog, page tree and pages. With
+    # compressed=True the page tree sits in a Flate-compressed object stream.
+    kids = " ".join(f"{3 + i} 0 R" for i in range(pages))
+    tree = f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode("ascii")
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    if compressed:
+        stream = zlib.compress(b"2 0 " + tree)
+        objects.append(b"<< /Type /ObjStm /N 1 /First 4 /Filter /FlateDecode /Length %d >>\nstream\n" % len(stream)
+                       + stream + b"\nendstream")
+    else:
+        objects.append(tree)
+    objects += [b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] >>"] * pages
+    body = b"%PDF-1.5\n"
+    for number, obj in enumerate(objects, start=1):
+        body += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    return body + b"trailer\n<< /Root 1 0 R >>\n%%EOF\n"
+
+
+class FakeLinksHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, body, content_type, status=200, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        with self.server.lock:
+            self.server.requests.append((time.monotonic(), path))
+            self.server.hosts.append(self.headers.get("Host"))
+            seen = sum(1 for _, p in self.server.requests if p == path)
+
+        if path == "/article":
+            self._send(ARTICLE_HTML.encode("utf-8"), "text/html; charset=utf-8")
+        elif path == "/video":
+            self._send(VIDEO_HTML.encode("utf-8"), "text/html; charset=utf-8")
+        elif path == "/thumb.png":
+            self._send(png_bytes(), "image/png")
+        elif path == "/guide.pdf":
+            self._send(pdf_bytes(PDF_PAGES), "application/pdf")
+        elif path == "/compressed.pdf":
+            self._send(pdf_bytes(COMPRESSED_PDF_PAGES, compressed=True), "application/pdf")
+        elif path == "/moved":
+            self._send(b"", "text/plain", status=301, headers={"Location": "/article"})
+        elif path == "/internal":
+            # Same server under a name that is not allowed
+            port = self.server.server_address[1]
+            self._send(b"", "text/plain", status=302, headers={"Location": f"http://localhost:{port}/article"})
+        elif path == "/flaky":
+            # Unavailable for the first `flaky_failures` requests
+            if seen <= self.server.flaky_failures:
+                self._send(b"try again", "text/plain", status=503, headers={"Retry-After": "0"})
+            else:
+                self._send(ARTICLE_HTML.encode("utf-8"), "text/html; charset=utf-8")
+        elif path == "/slow":
+            time.sleep(self.server.slow_s)
+            self._send(ARTICLE_HTML.encode("utf-8"), "text/html; charset=utf-8")
+        else:
+            self._send(b"not found", "text/plain", status=404)
+
+
+class FakeLinksServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, flaky_failures=2, slow_ms=3000, verbose=False):
+        super().__init__((host, port), FakeLinksHandler)
+        self.flaky_failures = flaky_failures
+        self.slow_s = slow_ms / 1000
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        self.requests = []
+        # Host header of each request, in the same order
+        self.hosts = []
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle_error(self, request, client_address):
+        # The checker hangs up on /slow when it times out; that is expected
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def hits(self, path):
+        with self.lock:
+            return sum(1 for _, p in self.requests if p == path)
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, name="fake-links", daemon=True)
+        thread.start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake web pages for offline link-checker testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11556)
+    parser.add_argument("--flaky-failures", type=int, default=2, help="503s before /flaky succeeds")
+    parser.add_argument("--slow-ms", type=float, default=3000, help="delay before /slow answers")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server = FakeLinksServer(args.host, args.port, args.flaky_failures, args.slow_ms, args.verbose)
+    print(f"Fake links listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
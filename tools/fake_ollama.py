@@ -0,0 +1,150 @@
+# tools/fake_ollama.py
+# Stand-in for the Ollama HTTP API (/api/chat, /api/tags, /api/version) that
+# streams canned text with a fixed first-token latency and per-token delay.
+# Lets the assistant run and be load-tested without a model.
+#
+#   python tools/fake_ollama.py --port 11555 --first-token-ms 400 --token-ms 25
+#   OLLAMA_HOST=http://127.0.0.1:11555 streamlit run Home.py
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = (
+    "Blood pressure below 120/80 mmHg is considered normal for most adults. Regular exercise, "
+    "less salt, enough sleep and not smoking all help keep it there. Please see a doctor if "
+    "your readings stay high or you feel dizzy, short of breath or have chest pain."
+).split()
+
+
+def reply_tokens(count):
+    return [WORDS[i % len(WORDS)] + " " for i in range(count)]
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/api/version":
+            self._send_json({"version": "0.0.0-fake"})
+        elif self.path == "/api/tags":
+            self._send_json({"models": [{"name": "llama3:latest", "model": "llama3:latest"}]})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        if self.path != "/api/chat":
+            self._send_json({"error": "not found"}, status=404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        model = request.get("model", "llama3")
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in request.get("messages", []))
+        n_tokens = request.get("options", {}).get("num_predict") or self.server.tokens
+        n_tokens = min(n_tokens, self.server.tokens) if n_tokens > 0 else self.server.tokens
+        tokens = reply_tokens(n_tokens)
+        with self.server.lock:
+            self.server.requests += 1
+
+        started = time.perf_counter_ns()
+        time.sleep(self.server.first_token_s)
+
+        def chunk(content, done=False):
+            payload = {
+                "model": model,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "message": {"role": "assistant", "content": content},
+                "done": done,
+            }
+            if done:
+                elapsed = time.perf_counter_ns() - started
+                payload.update({
+                    "done_reason": "stop",
+                    "total_duration": elapsed,
+                    "load_duration": 0,
+                    "prompt_eval_count": prompt_tokens,
+                    "prompt_eval_duration": int(self.server.first_token_s * 1e9),
+                    "eval_count": len(tokens),
+                    "eval_duration": max(elapsed - int(self.server.first_token_s * 1e9), 0),
+                })
+            return payload
+
+        if not request.get("stream", True):
+            time.sleep(self.server.token_s * len(tokens))
+            self._send_json(chunk("".join(tokens), done=True))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self.server.token_s)
+            self._write_chunk(chunk(token))
+        self._write_chunk(chunk("", done=True))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, payload):
+        data = (json.dumps(payload) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, first_token_ms=300, token_ms=20, tokens=60, verbose=False):
+        super().__init__((host, port), FakeOllamaHandler)
+        self.first_token_s = first_token_ms / 1000
+        self.token_s = token_ms / 1000
+        self.tokens = tokens
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, name="fake-ollama", daemon=True)
+        thread.start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama chat endpoint for offline testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11555)
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--token-ms", type=float, default=20)
+    parser.add_argument("--tokens", type=int, default=60, help="tokens per reply")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(args.host, args.port, args.first_token_ms, args.token_ms, args.tokens, args.verbose)
+    print(f"Fake Ollama listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+# tools/load_test.py
+# Drives N concurrent AI Assistant sessions through the real page script
+# (streamlit's AppTest) against the fake Ollama server, then reports
+# throughput, time to first token and UI-side render time.
+#
+#   python tools/load_test.py --sessions 20 --turns 3
+#   python tools/load_test.py --sessions 10 --max-ttft-p95-ms 2000 --max-rerun-p95-ms 500
+#
+# Exits with status 1 when a --max-* budget is exceeded, so it can gate CI.
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from tools.fake_ollama import FakeOllamaServer  # noqa: E402
+
+PAGE = ROOT_DIR / "pages" / "🤖AI_Assistant.py"
+QUESTIONS = [
+    "What is a normal blood pressure?",
+    "How can I lower my blood sugar?",
+    "What should be in an asthma action plan?",
+    "Is it normal to feel tired all the time?",
+    "How much sleep do adults need?",
+]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = (len(values) - 1) * q / 100
+    lower = int(index)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (index - lower)
+
+
+def serialize_script_compiles():
+    # Each AppTest has its own script cache and re-parses the page, and
+    # parsing/compiling from several threads at once trips CPython 3.11's AST
+    # recursion check. In the real server one cache is shared, so this costs
+    # the measurement nothing.
+    from streamlit.runtime.scriptrunner import script_cache
+
+    lock = threading.Lock()
+    get_bytecode = script_cache.ScriptCache.get_bytecode
+
+    def locked_get_bytecode(self, script_path):
+        with lock:
+            return get_bytecode(self, script_path)
+
+    script_cache.ScriptCache.get_bytecode = locked_get_bytecode
+
+
+def run_session(session_id, turns, timeout, results, errors, start_barrier):
+    from streamlit.testing.v1 import AppTest
+
+    try:
+        app = AppTest.from_file(str(PAGE), default_timeout=timeout)
+        app.run()
+        if app.exception:
+            raise RuntimeError(app.exception[0].value)
+        start_barrier.wait(timeout)
+        for turn in range(turns):
+            # Unique wording per session and turn so the response cache does not short-circuit the model
+            question = f"{QUESTIONS[turn % len(QUESTIONS)]} (session {session_id}, turn {turn})"
+            started = time.perf_counter()
+            app.chat_input[0].set_value(question).run()
+            turn_ms = (time.perf_counter() - started) * 1000
+            if app.exception:
+                raise RuntimeError(app.exception[0].value)
+
+            # A rerun with no new input is the cost of redrawing the transcript alone
+            started = time.perf_counter()
+            app.run()
+            rerun_ms = (time.perf_counter() - started) * 1000
+            results.append({"session": session_id, "turn": turn, "turn_ms": turn_ms, "rerun_ms": rerun_ms})
+    except threading.BrokenBarrierError:
+        errors.append(f"session {session_id}: not started, another session failed to load the page")
+    except Exception as e:
+        errors.append(f"session {session_id}: {e}")
+        # Sessions still waiting to start would otherwise block forever
+        start_barrier.abort()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for the AI Assistant page.")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--token-ms", type=float, default=10)
+    parser.add_argument("--tokens", type=int, default=60)
+    parser.add_argument("--max-concurrent", type=int, default=4, help="LLM_MAX_CONCURRENT for the run")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds allowed per page run")
+    parser.add_argument("--max-ttft-p95-ms", type=float)
+    parser.add_argument("--max-rerun-p95-ms", type=float)
+    parser.add_argument("--min-tokens-per-sec", type=float)
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(first_token_ms=args.first_token_ms, token_ms=args.token_ms, tokens=args.tokens).start()
+    data_dir = tempfile.mkdtemp(prefix="healthbridge-load-")
+    # Must be set before the app's modules read utils.config
+    os.environ.update({
+        "OLLAMA_HOST": server.url,
+        "HEALTHBRIDGE_DATA_DIR": data_dir,
+        "LLM_WARMUP": "0",
+        "LLM_MAX_CONCURRENT": str(args.max_concurrent),
+        "LLM_MAX_QUEUE": str(max(args.sessions, 1)),
+    })
+
+    from utils.llm_metrics import get_metrics
+
+    serialize_script_compiles()
+
+    results, errors = [], []
+    barrier = threading.Barrier(args.sessions)
+    threads = [
+        threading.Thread(target=run_session, args=(i, args.turns, args.timeout, results, errors, barrier))
+        for i in range(args.sessions)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_s = time.perf_counter() - started
+    server.shutdown()
+
+    rows = [row for row in get_metrics().snapshot() if row["source"] == "model" and row["status"] == "ok"]
+    ttft = [row["ttft_ms"] for row in rows if row["ttft_ms"] is not None]
+    waits = [row["queue_wait_ms"] for row in rows]
+    tokens = sum(row["tokens"] for row in rows)
+    turn_ms = [r["turn_ms"] for r in results]
+    rerun_ms = [r["rerun_ms"] for r in results]
+
+    report = {
+        "sessions": args.sessions,
+        "replies": len(results),
+        "errors": len(errors),
+        "wall_s": round(wall_s, 2),
+        "replies_per_sec": round(len(results) / wall_s, 2) if wall_s else 0,
+        "tokens_per_sec": round(tokens / wall_s, 1) if wall_s else 0,
+        "ttft_p50_ms": round(percentile(ttft, 50), 1),
+        "ttft_p95_ms": round(percentile(ttft, 95), 1),
+        "queue_wait_p95_ms": round(percentile(waits, 95), 1),
+        "turn_p50_ms": round(percentile(turn_ms, 50), 1),
+        "turn_p95_ms": round(percentile(turn_ms, 95), 1),
+        "rerun_p50_ms": round(percentile(rerun_ms, 50), 1),
+        "rerun_p95_ms": round(percentile(rerun_ms, 95), 1),
+    }
+    width = max(len(key) for key in report)
+    for key, value in report.items():
+        print(f"{key:<{width}}  {value}")
+    for error in errors[:10]:
+        print(f"ERROR {error}", file=sys.stderr)
+
+    failures = []
+    if errors:
+        failures.append(f"{len(errors)} sessions failed")
+    if args.max_ttft_p95_ms is not None and report["ttft_p95_ms"] > args.max_ttft_p95_ms:
+        failures.append(f"ttft_p95_ms {report['ttft_p95_ms']} > {args.max_ttft_p95_ms}")
+    if args.max_rerun_p95_ms is not None and report["rerun_p95_ms"] > args.max_rerun_p95_ms:
+        failures.append(f"rerun_p95_ms {report['rerun_p95_ms']} > {args.max_rerun_p95_ms}")
+    if args.min_tokens_per_sec is not None and report["tokens_per_sec"] < args.min_tokens_per_sec:
+        failures.append(f"tokens_per_sec {report['tokens_per_sec']} < {args.min_tokens_per_sec}")
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
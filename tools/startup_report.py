@@ -0,0 +1,136 @@
+# tools/startup_report.py
+# Measures cold-start cost page by page. Each page runs in a fresh Python
+# process (as after a deploy or a new replica), which reports how long the
+# page's module-level imports take and how long its first render takes
+# through streamlit's AppTest, then a second (warm) rerun for comparison.
+# Streamlit itself is imported before timing starts: every page pays for it.
+#
+#   python tools/startup_report.py
+#   python tools/startup_report.py --pages Home.py "pages/🏥Dashboard.py" --runs 3
+#
+# Exits with status 1 when a page is over its budget (BUDGETS_MS, or the
+# --max-* options for every page) or its imports load any of LAZY_MODULES, so
+# it can gate CI; tests/test_startup_budget.py runs the same checks under pytest.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# page: (import ms, first render ms, warm rerun ms). Generous enough for a
+# slow CI machine. Pages import numpy, pandas, plotly and ollama through
+# utils.lazy_imports, so importing any page takes a few tens of ms; one that
+# imports that stack eagerly again (pandas alone is ~0.5 s) goes over its
+# import budget. A rerun reuses cached data, so it should be far below the
+# first render.
+BUDGETS_MS = {
+    "Home.py": (100, 1000, 250),
+    "pages/🏥Dashboard.py": (100, 4000, 1000),
+    "pages/👥Cohort_Analytics.py": (100, 8000, 1500),
+    "pages/💬Forum.py": (100, 1500, 500),
+    "pages/📈Admin_Metrics.py": (100, 1000, 250),
+    "pages/📚Educational_Resources_Hub.py": (100, 2000, 500),
+    "pages/🤖AI_Assistant.py": (100, 1500, 500),
+}
+MEASURES = ("import_ms", "render_ms", "rerun_ms")
+# What utils.lazy_imports defers; a page's imports must not load any of it
+# (streamlit itself already loads plotly.graph_objects, which does not count)
+LAZY_MODULES = ("numpy", "pandas", "plotly.express", "plotly.graph_objects", "plotly.subplots", "ollama", "httpx")
+
+# Runs inside the child process; prints one JSON line
+PROBE = r"""
+import ast, json, sys, time
+sys.path.insert(0, sys.argv[2])
+import streamlit
+
+page = sys.argv[1]
+tree = ast.parse(open(page, encoding="utf-8").read())
+imports = ast.Module([node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))], [])
+before = set(sys.modules)
+started = time.perf_counter()
+exec(compile(imports, page, "exec"), {"__name__": "__startup_probe__"})
+import_ms = (time.perf_counter() - started) * 1000
+modules = sorted(name for name in set(sys.modules) - before if "." not in name)
+eager = [name for name in json.loads(sys.argv[3]) if name in sys.modules and name not in before]
+
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(page, default_timeout=120)
+started = time.perf_counter()
+app.run()
+render_ms = (time.perf_counter() - started) * 1000
+started = time.perf_counter()
+app.run()
+rerun_ms = (time.perf_counter() - started) * 1000
+print(json.dumps({"import_ms": import_ms, "render_ms": render_ms, "rerun_ms": rerun_ms,
+                  "modules": modules, "eager": eager, "exceptions": [str(e.value) for e in app.exception]}))
+"""
+
+
+def probe_env(data_dir):
+    # No model warm-up or background preload, and a data directory of its own
+    return {**os.environ, "HEALTHBRIDGE_DATA_DIR": str(data_dir), "LLM_WARMUP": "0", "PRELOAD_MODULES": "0"}
+
+
+def over_budget(result, budgets):
+    # "render_ms 4100 > 4000"-style descriptions of what went over, plus any
+    # deferred module the page's imports loaded and any exceptions
+    over = [f"{measure} {result[measure]:.0f} > {budget:.0f}"
+            for measure, budget in zip(MEASURES, budgets) if budget and result[measure] > budget]
+    over += [f"imported eagerly: {name}" for name in result["eager"]]
+    return over + [f"exception: {e}" for e in result["exceptions"]]
+
+
+def probe(page, env):
+    result = subprocess.run([sys.executable, "-c", PROBE, page, str(ROOT_DIR), json.dumps(LAZY_MODULES)],
+                            cwd=ROOT_DIR, env=env, capture_output=True, text=True, timeout=600)
+    lines = [line for line in result.stdout.splitlines() if line.startswith("{")]
+    if result.returncode or not lines:
+        raise RuntimeError(f"{page} failed:\n{result.stderr[-2000:]}")
+    return json.loads(lines[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-page import and first-render time in fresh processes.")
+    parser.add_argument("--pages", nargs="*", default=list(BUDGETS_MS), help="page scripts, relative to the repo")
+    parser.add_argument("--runs", type=int, default=1, help="fresh processes per page (the median is reported)")
+    parser.add_argument("--max-import-ms", type=float, help="budget for every page instead of BUDGETS_MS")
+    parser.add_argument("--max-render-ms", type=float, help="budget for every page instead of BUDGETS_MS")
+    parser.add_argument("--max-rerun-ms", type=float, help="budget for every page instead of BUDGETS_MS")
+    parser.add_argument("--show-modules", action="store_true", help="list the top-level modules each page imports")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="healthbridge-startup-") as data_dir:
+        # The data directory is filled by one untimed pass so only process
+        # start-up is measured
+        env = probe_env(data_dir)
+        for page in args.pages:
+            probe(page, env)
+
+        failed = []
+        print(f"{'page':40} {'import ms':>10} {'render ms':>10} {'rerun ms':>10}  budget")
+        for page in args.pages:
+            runs = sorted((probe(page, env) for _ in range(args.runs)), key=lambda r: r["import_ms"] + r["render_ms"])
+            result = runs[len(runs) // 2]
+            overrides = (args.max_import_ms, args.max_render_ms, args.max_rerun_ms)
+            budgets = [override or budget for override, budget in zip(overrides, BUDGETS_MS.get(page, (None,) * 3))]
+            over = over_budget(result, budgets)
+            if over:
+                failed.append(page)
+            print(f"{Path(page).name:40} {result['import_ms']:10.0f} {result['render_ms']:10.0f} "
+                  f"{result['rerun_ms']:10.0f}  {'/'.join(str(b or '-') for b in budgets)} {'OVER' if over else 'ok'}")
+            if result["exceptions"]:
+                print(f"    exceptions: {result['exceptions']}")
+            if args.show_modules:
+                print(f"    imports: {', '.join(result['modules'])}")
+
+    if failed:
+        print(f"\nOver budget: {', '.join(failed)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
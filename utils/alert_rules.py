@@ -0,0 +1,162 @@
+# utils/alert_rules.py
+# Clinical alerts and medication notes written as data, and an engine that
+# evaluates them column-wise over a whole cohort at once: one groupby pass
+# to build the per-patient features every rule needs, then one vectorized
+# comparison per rule.
+import operator
+
+from utils.lazy_imports import np, pd
+from utils.vitals_aggregates import DEFAULT_WINDOWS
+from utils.vitals_store import TIME_COLUMN
+
+# stat: "last", or "mean" / "min" / "max" / "slope_per_day" over a named window from DEFAULT_WINDOWS
+VITAL_RULES = [
+    {"id": "high_bp", "column": "Systolic_BP", "stat": "last", "op": ">", "value": 140,
+     "severity": "high", "message": "High blood pressure detected [Please consult physician]"},
+    {"id": "high_sugar", "column": "Blood_Sugar", "stat": "last", "op": ">", "value": 126,
+     "severity": "high", "message": "Elevated blood sugar [Please monitor closely]"},
+]
+
+# Lab rows whose `field` matches the regex raise an alert formatted from the row
+LAB_RULES = [
+    {"id": "lab_out_of_range", "field": "Status", "pattern": "High|Borderline",
+     "severity": "medium", "message": "**{Test}** -  {Status} - {Value} {Unit}"},
+]
+
+# First matching rule wins, as in an if/elif chain
+MEDICATION_NOTES = [
+    {"match": "Lisinopril", "note": "Monitor blood pressure regularly. Report any persistent cough."},
+    {"match": "Metformin", "note": "Take with food. Monitor blood sugar levels."},
+    {"match": "Atorvastatin", "note": "Take in the evening. Annual liver function tests recommended."},
+    {"match": "Sertraline", "note": "May take 4-6 weeks for full effect. Monitor mood changes."},
+]
+
+OPERATORS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le, "==": operator.eq}
+ALERT_COLUMNS = ["patient_id", "rule_id", "severity", "message"]
+
+
+def feature_name(rule):
+    return f"{rule['column']}:{rule['stat']}:{rule.get('window') or ''}"
+
+
+class AlertEngine:
+    def __init__(self, vital_rules=VITAL_RULES, lab_rules=LAB_RULES, medication_notes=MEDICATION_NOTES,
+                 windows=DEFAULT_WINDOWS):
+        for rule in vital_rules:
+            if rule["op"] not in OPERATORS:
+                raise ValueError(f"unknown operator {rule['op']!r} in rule {rule['id']}")
+            if rule["stat"] != "last" and rule.get("window") not in windows:
+                raise ValueError(f"rule {rule['id']} needs a window from {sorted(windows)}")
+        self.vital_rules = vital_rules
+        self.lab_rules = lab_rules
+        self.medication_notes = medication_notes
+        self.windows = windows
+        # Each distinct (column, stat, window) is computed once however many rules use it
+        self.features = sorted({(r["column"], r["stat"], r.get("window")) for r in vital_rules},
+                               key=lambda f: (f[0], f[1], f[2] or ""))
+
+    # --- features ---
+
+    def vital_features(self, readings):
+        # One row per patient from raw readings (patient_id, Date, vitals)
+        readings = readings.sort_values(["patient_id", TIME_COLUMN], kind="stable")
+        grouped = readings.groupby("patient_id", sort=True)
+        features = pd.DataFrame(index=pd.Index(grouped.size().index, name="patient_id"))
+        last_time = grouped[TIME_COLUMN].transform("max")
+        from_end = grouped.cumcount(ascending=False)
+
+        for column, stat, window in self.features:
+            name = f"{column}:{stat}:{window or ''}"
+            if stat == "last":
+                features[name] = grouped[column].last()
+                continue
+            spec = self.windows[window]
+            if "size" in spec:
+                in_window = from_end < spec["size"]
+            else:
+                in_window = readings[TIME_COLUMN] >= last_time - pd.Timedelta(spec["span"])
+            subset = readings.loc[in_window, ["patient_id", TIME_COLUMN, column]]
+            if stat == "slope_per_day":
+                features[name] = _slopes(subset, column)
+            else:
+                features[name] = subset.groupby("patient_id")[column].agg(stat)
+        return features
+
+    def features_from_aggregates(self, patient_id, summary):
+        # Same features for one patient, read from a VitalsAggregates snapshot
+        row = {}
+        for column, stat, window in self.features:
+            if stat == "last":
+                value = summary["last"].get(column)
+            else:
+                value = summary["windows"][window][column][stat]
+            row[f"{column}:{stat}:{window or ''}"] = value
+        return pd.DataFrame([row], index=pd.Index([patient_id], name="patient_id"))
+
+    # --- evaluation ---
+
+    def evaluate_vitals(self, features):
+        frames = []
+        for rule in self.vital_rules:
+            values = features[feature_name(rule)]
+            hit = OPERATORS[rule["op"]](values, rule["value"]).fillna(False).to_numpy(dtype=bool)
+            if hit.any():
+                frames.append(pd.DataFrame({
+                    "patient_id": features.index[hit],
+                    "rule_id": rule["id"],
+                    "severity": rule["severity"],
+                    "message": rule["message"],
+                }))
+        return _concat(frames)
+
+    def evaluate_labs(self, labs):
+        # labs: patient_id plus the columns the rules reference
+        frames = []
+        for rule in self.lab_rules:
+            matched = labs[labs[rule["field"]].astype(str).str.contains(rule["pattern"], regex=True, na=False)]
+            if len(matched):
+                records = matched.to_dict("records")
+                frames.append(pd.DataFrame({
+                    "patient_id": matched["patient_id"].to_numpy(),
+                    "rule_id": rule["id"],
+                    "severity": rule["severity"],
+                    "message": [rule["message"].format_map(record) for record in records],
+                }))
+        return _concat(frames)
+
+    def evaluate(self, features=None, labs=None):
+        parts = []
+        if features is not None:
+            parts.append(self.evaluate_vitals(features))
+        if labs is not None:
+            parts.append(self.evaluate_labs(labs))
+        return _concat(parts)
+
+    def sweep(self, readings, labs=None):
+        # Nightly cohort run: raw readings in, one alert row per (patient, rule hit) out
+        return self.evaluate(self.vital_features(readings), labs)
+
+    def medication_notes_for(self, medications):
+        names = medications.astype(str)
+        conditions = [names.str.contains(rule["match"], regex=False).to_numpy() for rule in self.medication_notes]
+        choices = [rule["note"] for rule in self.medication_notes]
+        return pd.Series(np.select(conditions, choices, default=""), index=medications.index)
+
+
+def _slopes(subset, column):
+    # Least-squares slope per patient in units per day, from grouped sums
+    days = (subset[TIME_COLUMN] - subset.groupby("patient_id")[TIME_COLUMN].transform("min")).dt.total_seconds() / 86400
+    frame = pd.DataFrame({"patient_id": subset["patient_id"], "t": days, "y": subset[column].astype(float)})
+    frame["tt"] = frame["t"] ** 2
+    frame["ty"] = frame["t"] * frame["y"]
+    sums = frame.groupby("patient_id").agg(n=("t", "size"), t=("t", "sum"), y=("y", "sum"),
+                                           tt=("tt", "sum"), ty=("ty", "sum"))
+    denominator = sums["n"] * sums["tt"] - sums["t"] ** 2
+    return ((sums["n"] * sums["ty"] - sums["t"] * sums["y"]) / denominator.where(denominator != 0)).fillna(0.0)
+
+
+def _concat(frames):
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return pd.DataFrame(columns=ALERT_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,154 @@
+# utils/assets.py
+# Resized, compressed image variants built once and served locally. Each
+# variant is a WebP file under static/cache/ named by a hash of its source,
+# which Streamlit serves at /app/static/cache/ (see .streamlit/config.toml),
+# so browsers can cache it forever and reruns do no image work at all.
+# Recently used variants are also held in memory, bounded by bytes.
+import base64
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import streamlit as st
+
+from utils.config import ROOT_DIR
+
+CACHE_DIR = ROOT_DIR / "static" / "cache"
+STATIC_URL = "/app/static/cache"
+MEMORY_BYTES = 16 * 1024 * 1024
+WEBP_QUALITY = 80
+
+# Display sizes in CSS pixels; variants are rendered at twice that for HiDPI screens
+POST_AVATAR_PX = 50
+COMMENT_AVATAR_PX = 35
+
+AVATAR_COLORS = ["#e74c3c", "#3498db", "#2ecc71", "#9b59b6", "#f39c12", "#1abc9c", "#e67e22", "#34495e"]
+
+
+class Variant:
+    def __init__(self, name, data):
+        self.name = name
+        self.data = data
+
+
+class AssetPipeline:
+    def __init__(self, cache_dir=CACHE_DIR, memory_bytes=MEMORY_BYTES, quality=WEBP_QUALITY):
+        self.cache_dir = Path(cache_dir)
+        self.memory_bytes = memory_bytes
+        self.quality = quality
+        self._memory = OrderedDict()
+        self._memory_used = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.builds = 0
+
+    # --- variants ---
+
+    def image(self, path, width):
+        # Variant of a local image at most `width` pixels wide
+        path = Path(path)
+        if not path.is_absolute():
+            path = ROOT_DIR / path
+        stat = path.stat()
+        key = ("file", str(path), stat.st_mtime_ns, stat.st_size, width)
+        return self._variant(key, path.stem, path.read_bytes, lambda: self._resize(path, width))
+
+    def avatar(self, name, size):
+        # Initials on a colour picked from the name, size x size pixels
+        key = ("avatar", name, size)
+        return self._variant(key, "avatar", lambda: name.encode("utf-8"), lambda: _initials_image(name, size))
+
+    def _variant(self, key, stem, source, render):
+        with self._lock:
+            variant = self._memory.get(key)
+            if variant is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return variant
+            self.misses += 1
+
+        # Named by the source content and how it is rendered, so a variant
+        # already on disk (from an earlier run) is reused without decoding
+        digest = hashlib.sha256(source())
+        digest.update(repr((key[-1], self.quality)).encode("ascii"))
+        target = self.cache_dir / f"{stem}-{key[-1]}w.{digest.hexdigest()[:16]}.webp"
+        if target.exists():
+            data = target.read_bytes()
+        else:
+            buffer = io.BytesIO()
+            render().save(buffer, "WEBP", quality=self.quality, method=6)
+            data = buffer.getvalue()
+            self._write(target, data)
+        variant = Variant(target.name, data)
+
+        with self._lock:
+            if key not in self._memory:
+                self._memory[key] = variant
+                self._memory_used += len(data)
+                while self._memory_used > self.memory_bytes and len(self._memory) > 1:
+                    _, evicted = self._memory.popitem(last=False)
+                    self._memory_used -= len(evicted.data)
+        return variant
+
+    def _resize(self, path, width):
+        from PIL import Image
+
+        with Image.open(path) as image:
+            image.load()
+            if image.width > width:
+                image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+            return image if image.mode in ("RGB", "RGBA") else image.convert("RGBA")
+
+    def _write(self, target, data):
+        # Written under a temporary name and renamed, so a concurrent reader
+        # never sees a partial file
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        temporary = target.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        temporary.write_bytes(data)
+        os.replace(temporary, target)
+        self.builds += 1
+
+    # --- URLs ---
+
+    def src(self, variant):
+        # Served as a static file when the server allows it, inline otherwise
+        if st.get_option("server.enableStaticServing"):
+            return f"{STATIC_URL}/{variant.name}"
+        return "data:image/webp;base64," + base64.b64encode(variant.data).decode("ascii")
+
+    def image_src(self, path, width):
+        return self.src(self.image(path, width))
+
+    def avatar_src(self, name, avatar, size):
+        # `avatar` may name a local image; anything else (empty, or a remote URL
+        # stored by older versions) gets a generated initials avatar
+        if avatar and not avatar.startswith(("http://", "https://")) and (ROOT_DIR / avatar).is_file():
+            return self.src(self.image(avatar, size * 2))
+        return self.src(self.avatar(name, size * 2))
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._memory), "bytes": self._memory_used,
+                    "hits": self.hits, "misses": self.misses, "builds": self.builds}
+
+
+def _initials_image(name, size):
+    from PIL import Image, ImageDraw, ImageFont
+
+    words = [word for word in name.split() if word[:1].isalnum()] or ["?"]
+    initials = "".join(word[0] for word in words[:2]).upper()
+    colour = AVATAR_COLORS[int(hashlib.md5(name.encode("utf-8")).hexdigest(), 16) % len(AVATAR_COLORS)]
+    image = Image.new("RGB", (size, size), colour)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=size * 0.42)
+    draw.text((size / 2, size / 2), initials, fill="white", font=font, anchor="mm")
+    return image
+
+
+@st.cache_resource
+def get_asset_pipeline():
+    return AssetPipeline()
@@ -0,0 +1,64 @@
+# utils/chat_sessions.py
+# Per-session AI Assistant state (the messages held in memory, the visible
+# window and the context window), kept in one server-wide registry rather
+# than in st.session_state so that it can be dropped without waiting for
+# its user to come back. Every lookup sweeps out sessions idle for longer
+# than idle_seconds, and at most max_sessions are kept (least recently used
+# go first). A session whose state was dropped reopens its conversation
+# from the store.
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+IDLE_SECONDS = 30 * 60
+MAX_SESSIONS = 500
+
+
+class ChatSessions:
+    def __init__(self, idle_seconds=IDLE_SECONDS, max_sessions=MAX_SESSIONS, clock=time.monotonic):
+        self.idle_seconds = idle_seconds
+        self.max_sessions = max_sessions
+        self._clock = clock
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def _sweep(self, now):
+        # Least recently used first, so the idle ones are at the front
+        while self._sessions:
+            key, (last_active, _) = next(iter(self._sessions.items()))
+            if now - last_active <= self.idle_seconds and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[key]
+            self.evictions += 1
+
+    def get(self, key):
+        # The session's state, or None if it never had any or it was dropped
+        now = self._clock()
+        with self._lock:
+            self._sweep(now)
+            entry = self._sessions.get(key)
+            if entry is None:
+                return None
+            self._sessions[key] = (now, entry[1])
+            self._sessions.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, state):
+        now = self._clock()
+        with self._lock:
+            self._sessions[key] = (now, state)
+            self._sessions.move_to_end(key)
+            self._sweep(now)
+        return state
+
+    def stats(self):
+        with self._lock:
+            return {"sessions": len(self._sessions), "evictions": self.evictions}
+
+
+@st.cache_resource
+def get_chat_sessions():
+    return ChatSessions()
@@ -0,0 +1,192 @@
+# utils/cohort_analytics.py
+# Population views over a synthetic cohort. Patients are split into shards
+# of whole generator batches; each shard regenerates its own readings from
+# the seed in a worker process, extracts per-patient features and returns
+# only small partial counts, which the parent sums. Results therefore do not
+# depend on the number of workers, and nothing large crosses processes.
+import json
+import time
+from collections import Counter
+from concurrent.futures.process import BrokenProcessPool
+
+import streamlit as st
+
+from utils import config
+from utils.alert_rules import AlertEngine
+from utils.lab_ranges import classify_labs, STATUS_ORDER
+from utils.lazy_imports import np, pd
+from utils.vitals_generator import (generate_patients, generate_vitals_batch, generate_lab_batch,
+                                    generate_conditions_batch, sample_times)
+from utils.worker_pool import make_process_pool
+
+# Patients per generator batch (as in iter_vitals) and batches per shard
+BATCH_PATIENTS = 64
+SHARD_BATCHES = 8
+
+AGE_BANDS = [0, 40, 65, 200]
+AGE_LABELS = ["18-39", "40-64", "65+"]
+
+# Uncontrolled BP: 30-day average at or above either threshold
+BP_RULES = [
+    {"id": "uncontrolled_systolic", "column": "Systolic_BP", "stat": "mean", "window": "30d", "op": ">=",
+     "value": 140, "severity": "high", "message": "30-day systolic average at or above 140 mmHg"},
+    {"id": "uncontrolled_diastolic", "column": "Diastolic_BP", "stat": "mean", "window": "30d", "op": ">=",
+     "value": 90, "severity": "high", "message": "30-day diastolic average at or above 90 mmHg"},
+]
+
+DEFAULT_COHORT = {
+    "n_patients": 2000,
+    "min_age": 18,
+    "max_age": 89,
+    "genders": ["Female", "Male"],
+    "start": "2024-01-01",
+    "end": "2024-12-31",
+    "freq": "D",
+    "lab_freq": "QE",
+    "seed": 42,
+}
+
+PARTS = ["patients", "uncontrolled_bp", "systolic_sum", "lab_status", "conditions"]
+
+
+def cohort_key(definition):
+    # Canonical, hashable form of a cohort definition: the results cache key
+    definition = {**DEFAULT_COHORT, **definition}
+    definition["genders"] = sorted(definition["genders"])
+    return json.dumps(definition, sort_keys=True, default=str)
+
+
+def shard_bounds(n_patients, shard_batches=SHARD_BATCHES):
+    size = BATCH_PATIENTS * shard_batches
+    return [(first, min(first + size, n_patients)) for first in range(0, n_patients, size)]
+
+
+def select_patients(definition):
+    patients = generate_patients(definition["n_patients"], seed=definition["seed"])
+    selected = patients[patients["Age"].between(definition["min_age"], definition["max_age"])
+                        & patients["Gender"].isin(definition["genders"])]
+    return pd.DataFrame({
+        "patient_id": selected["patient_id"].to_numpy(),
+        "group": list(zip(pd.cut(selected["Age"], AGE_BANDS, right=False, labels=AGE_LABELS).astype(str),
+                          selected["Gender"])),
+    })
+
+
+def extract_shard(definition, first, stop, cohort):
+    # Runs in a worker: regenerate patients [first, stop) batch by batch, keep
+    # the ones in the cohort and reduce them to counts
+    engine = AlertEngine(vital_rules=BP_RULES, lab_rules=[], medication_notes=[])
+    times = sample_times(definition["start"], definition["end"], definition["freq"])
+    lab_times = sample_times(definition["start"], definition["end"], definition["lab_freq"])
+    selected = set(cohort["patient_id"].tolist())
+    group_of = dict(zip(cohort["patient_id"].tolist(), cohort["group"].tolist()))
+    partial = {name: Counter() for name in PARTS}
+
+    for batch_index in range(first // BATCH_PATIENTS, -(-stop // BATCH_PATIENTS)):
+        batch_ids = np.arange(batch_index * BATCH_PATIENTS, min((batch_index + 1) * BATCH_PATIENTS, stop))
+        keep_ids = np.array([pid for pid in batch_ids.tolist() if pid in selected], dtype=np.int32)
+        if not len(keep_ids):
+            continue
+
+        # Vitals: uncontrolled BP from the last 30 days of readings
+        columns = generate_vitals_batch(batch_ids, times, seed=definition["seed"], batch_index=batch_index)
+        readings = pd.DataFrame(columns)
+        readings = readings[readings["patient_id"].isin(keep_ids)]
+        features = engine.vital_features(readings)
+        uncontrolled = set(engine.evaluate_vitals(features)["patient_id"].tolist())
+        for pid, systolic in features["Systolic_BP:mean:30d"].items():
+            group = group_of[pid]
+            partial["patients"][group] += 1
+            partial["systolic_sum"][group] += float(systolic)
+            if pid in uncontrolled:
+                partial["uncontrolled_bp"][group] += 1
+
+        # Labs: status of each test at the latest draw in the period
+        if len(lab_times):
+            labs = generate_lab_batch(batch_ids, lab_times[-1:], seed=definition["seed"], batch_index=batch_index)
+            labs = classify_labs(labs[labs["patient_id"].isin(keep_ids)])
+            partial["lab_status"].update(zip(labs["Test"].astype(str), labs["Status"]))
+
+        conditions = generate_conditions_batch(batch_ids, seed=definition["seed"], batch_index=batch_index)
+        conditions = conditions[conditions["patient_id"].isin(keep_ids)]
+        partial["conditions"].update(zip(conditions["Condition"], conditions["Status"]))
+    return partial
+
+
+def merge_partials(partials):
+    merged = {name: Counter() for name in PARTS}
+    for partial in partials:
+        for name in PARTS:
+            merged[name].update(partial[name])
+    return merged
+
+
+def run_cohort(definition, executor=None, shard_batches=SHARD_BATCHES):
+    # Without an executor the shards run in this process, one after another
+    definition = {**DEFAULT_COHORT, **definition}
+    cohort = select_patients(definition)
+    shards = []
+    for first, stop in shard_bounds(definition["n_patients"], shard_batches):
+        members = cohort[(cohort["patient_id"] >= first) & (cohort["patient_id"] < stop)]
+        if len(members):
+            shards.append((first, stop, members))
+
+    started = time.perf_counter()
+    if executor is None:
+        partials = [extract_shard(definition, first, stop, members) for first, stop, members in shards]
+    else:
+        futures = [executor.submit(extract_shard, definition, first, stop, members) for first, stop, members in shards]
+        partials = [future.result() for future in futures]
+    merged = merge_partials(partials)
+    merged["shards"] = len(shards)
+    merged["seconds"] = time.perf_counter() - started
+    return merged
+
+
+def summarize(merged):
+    groups = sorted(merged["patients"])
+    by_group = pd.DataFrame({
+        "Age Band": [age for age, _ in groups],
+        "Gender": [gender for _, gender in groups],
+        "Patients": [merged["patients"][group] for group in groups],
+        "Uncontrolled BP": [merged["uncontrolled_bp"][group] for group in groups],
+        "Mean Systolic (30d)": [merged["systolic_sum"][group] / merged["patients"][group] for group in groups],
+    })
+    by_group["Uncontrolled Share"] = by_group["Uncontrolled BP"] / by_group["Patients"]
+
+    lab_status = pd.DataFrame([(test, status, count) for (test, status), count in merged["lab_status"].items()],
+                              columns=["Test", "Status", "Count"])
+    lab_status["Status"] = pd.Categorical(lab_status["Status"], categories=STATUS_ORDER + ["Unknown"])
+    conditions = pd.DataFrame([(name, status, count) for (name, status), count in merged["conditions"].items()],
+                              columns=["Condition", "Status", "Count"])
+
+    patients = int(by_group["Patients"].sum())
+    return {
+        "patients": patients,
+        "uncontrolled_bp": int(by_group["Uncontrolled BP"].sum()),
+        "uncontrolled_share": by_group["Uncontrolled BP"].sum() / patients if patients else 0.0,
+        "by_group": by_group,
+        "lab_status": lab_status.sort_values(["Test", "Status"]).reset_index(drop=True),
+        "conditions": conditions.sort_values(["Condition", "Status"]).reset_index(drop=True),
+        "shards": merged["shards"],
+        "seconds": merged["seconds"],
+    }
+
+
+@st.cache_resource
+def get_cohort_pool():
+    # Workers start from a forkserver with this module and its libraries
+    # already imported (see utils/worker_pool.py); without one the shards run
+    # serially in the server process
+    return make_process_pool(config.COHORT_WORKERS, preload=["numpy", "pandas", "utils.cohort_analytics"])
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def compute_cohort(key):
+    # key comes from cohort_key(), so equal definitions share one result
+    try:
+        return summarize(run_cohort(json.loads(key), get_cohort_pool()))
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start a fresh pool next time
+        get_cohort_pool.clear()
+        raise
@@ -0,0 +1,49 @@
+# utils/config.py
+# Shared locations and settings, overridable through environment variables.
+import os
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = Path(os.environ.get("HEALTHBRIDGE_DATA_DIR", ROOT_DIR / "data"))
+
+# Ollama server and admission control for the shared client (see utils/llm_client.py)
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://127.0.0.1:11434")
+LLM_MAX_CONCURRENT = int(os.environ.get("LLM_MAX_CONCURRENT", "2"))
+LLM_MAX_QUEUE = int(os.environ.get("LLM_MAX_QUEUE", "32"))
+LLM_QUEUE_TIMEOUT = float(os.environ.get("LLM_QUEUE_TIMEOUT", "90"))
+LLM_REQUEST_TIMEOUT = float(os.environ.get("LLM_REQUEST_TIMEOUT", "300"))
+
+# Model served to the AI Assistant and how long Ollama keeps it loaded
+# ("-1" pins it for the life of the Ollama server)
+LLM_MODEL = os.environ.get("LLM_MODEL", "llama3")
+LLM_KEEP_ALIVE = os.environ.get("LLM_KEEP_ALIVE", "-1")
+LLM_WARMUP = os.environ.get("LLM_WARMUP", "1") != "0"
+
+SYSTEM_PROMPT = (
+    "You are the HealthBridge assistant. Give clear, general healthcare information in plain language. "
+    "You are not a doctor: do not diagnose, and advise the user to see a healthcare professional "
+    "for anything urgent, persistent or specific to them."
+)
+
+# Worker processes for cohort feature extraction (see utils/cohort_analytics.py)
+COHORT_WORKERS = int(os.environ.get("COHORT_WORKERS", str(os.cpu_count() or 1)))
+
+# Background link checks and previews for catalog resources (see utils/link_metadata.py);
+# LINK_HOST_INTERVAL is the minimum number of seconds between requests to one host
+LINK_WORKERS = int(os.environ.get("LINK_WORKERS", "4"))
+LINK_TIMEOUT = float(os.environ.get("LINK_TIMEOUT", "10"))
+LINK_RETRIES = int(os.environ.get("LINK_RETRIES", "3"))
+LINK_HOST_INTERVAL = float(os.environ.get("LINK_HOST_INTERVAL", "1.0"))
+# The checker only fetches hosts that resolve to public addresses; hosts listed
+# here (comma-separated, e.g. "127.0.0.1" for tools/fake_links.py) are let through
+LINK_ALLOWED_HOSTS = frozenset(
+    host.strip().lower() for host in os.environ.get("LINK_ALLOWED_HOSTS", "").split(",") if host.strip()
+)
+
+# The Admin Metrics page can clear the latency history for the whole server
+# process; off unless the deployment turns it on
+ALLOW_METRICS_CLEAR = os.environ.get("ALLOW_METRICS_CLEAR", "0") == "1"
+
+# Import the heavy libraries (pandas, numpy, plotly) in the background once the
+# landing page has rendered, instead of when a user first opens a page that needs them
+PRELOAD_MODULES = os.environ.get("PRELOAD_MODULES", "1") != "0"
@@ -0,0 +1,100 @@
+# utils/context_window.py
+# Keeps the prompt sent to the model inside a token budget: recent turns go
+# through verbatim, older turns are folded into a running summary that is
+# only extended with the turns that have newly fallen out of the window.
+import math
+import re
+
+_PIECES = re.compile(r"\w+|[^\w\s]")
+
+# Per-message overhead for role markers and separators in the chat template
+MESSAGE_OVERHEAD = 4
+
+
+def count_tokens(text):
+    # llama3 has no tokenizer bundled with ollama's python client; word and
+    # punctuation pieces scaled for sub-word splits are close enough to budget with.
+    return math.ceil(len(_PIECES.findall(str(text))) * 1.3)
+
+
+def message_tokens(message):
+    return count_tokens(message.get("content", "")) + MESSAGE_OVERHEAD
+
+
+def format_transcript(messages):
+    return "\n".join(f"{msg['role']}: {msg['content']}" for msg in messages)
+
+
+class ConversationWindow:
+    def __init__(self, summarize, max_prompt_tokens=2048, min_recent_messages=4, summary_tokens=256):
+        # summarize(previous_summary, new_messages) -> str
+        self.summarize = summarize
+        self.max_prompt_tokens = max_prompt_tokens
+        self.min_recent_messages = min_recent_messages
+        self.summary_tokens = summary_tokens
+        self.summary = ""
+        self.summarized_upto = 0
+        self.full_tokens = 0
+        self.counted_upto = 0
+        self.history = []
+
+    def state(self):
+        return {
+            "summary": self.summary,
+            "summarized_upto": self.summarized_upto,
+            "full_tokens": self.full_tokens,
+            "counted_upto": self.counted_upto,
+        }
+
+    def restore(self, state):
+        for key, value in state.items():
+            setattr(self, key, value)
+
+    def _cut_index(self, messages):
+        # Walk back from the newest message until the verbatim budget is spent
+        budget = self.max_prompt_tokens - self.summary_tokens
+        used = 0
+        cut = len(messages)
+        while cut > 0:
+            cost = message_tokens(messages[cut - 1])
+            kept = len(messages) - cut
+            if used + cost > budget and kept >= self.min_recent_messages:
+                break
+            used += cost
+            cut -= 1
+        return cut
+
+    def build(self, messages, offset=0, load=None):
+        # `messages` may be just the tail of the conversation starting at
+        # absolute index `offset`; load(start, stop) fetches older messages if
+        # the summary still has to catch up on turns that are not in memory.
+        total = offset + len(messages)
+        cut = max(offset + self._cut_index(messages), self.summarized_upto)
+        if cut > self.summarized_upto:
+            pending = messages[max(self.summarized_upto - offset, 0):cut - offset]
+            if self.summarized_upto < offset:
+                pending = load(self.summarized_upto, offset) + pending
+            self.summary = self.summarize(self.summary, pending)
+            self.summarized_upto = cut
+
+        if total > self.counted_upto:
+            self.full_tokens += sum(message_tokens(msg) for msg in messages[max(self.counted_upto - offset, 0):])
+            self.counted_upto = total
+
+        prompt = []
+        if self.summary:
+            prompt.append({"role": "system", "content": f"Summary of the earlier conversation: {self.summary}"})
+        prompt.extend(messages[cut - offset:])
+
+        prompt_tokens = sum(message_tokens(msg) for msg in prompt)
+        report = {
+            "turn": len(self.history) + 1,
+            "messages_total": total,
+            "messages_sent": total - cut,
+            "summarized_messages": self.summarized_upto,
+            "full_tokens": self.full_tokens,
+            "prompt_tokens": prompt_tokens,
+            "saved_tokens": max(self.full_tokens - prompt_tokens, 0),
+        }
+        self.history.append(report)
+        return prompt, report
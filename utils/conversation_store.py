@@ -0,0 +1,154 @@
+# utils/conversation_store.py
+# SQLite (WAL) store for assistant conversations. Messages are an
+# append-only log addressed by (conversation, seq), so a session only has to
+# read the slice it is showing and can drop everything else from memory.
+# Every conversation has an owner key, and lookups are scoped to it, so one
+# visitor cannot list or open another's conversations.
+import hashlib
+import json
+import secrets
+import threading
+import time
+import uuid
+
+import streamlit as st
+
+from utils.config import DATA_DIR
+from utils.db import Database
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL DEFAULT '',
+    title TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    window_state TEXT
+);
+CREATE TABLE IF NOT EXISTS messages (
+    conversation_id TEXT NOT NULL REFERENCES conversations (id),
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (conversation_id, seq)
+) WITHOUT ROWID;
+"""
+
+# Created after the owner column exists (databases from before it gain the
+# column on open; their conversations have no owner and can no longer be opened)
+INDEXES = """
+DROP INDEX IF EXISTS idx_conversations_updated;
+CREATE INDEX IF NOT EXISTS idx_conversations_owner ON conversations (owner, updated_at DESC);
+"""
+
+
+def new_owner_token():
+    return secrets.token_urlsafe(24)
+
+
+def owner_key(token):
+    # Only a hash of the owner's token is stored
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class ConversationStore:
+    def __init__(self, path):
+        self.path = str(path)
+        self.db = Database(self.path)
+        self._write_lock = threading.Lock()
+        with self.db.transaction() as conn:
+            conn.executescript(SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(conversations)")}
+            if "owner" not in columns:
+                conn.execute("ALTER TABLE conversations ADD COLUMN owner TEXT NOT NULL DEFAULT ''")
+            conn.executescript(INDEXES)
+
+    def close(self):
+        self.db.close()
+
+    def create(self, owner, title="New conversation"):
+        if not owner:
+            raise ValueError("a conversation needs an owner")
+        conversation_id = uuid.uuid4().hex
+        now = time.time()
+        with self._write_lock, self.db.transaction() as conn:
+            conn.execute(
+                "INSERT INTO conversations (id, owner, title, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (conversation_id, owner, title, now, now),
+            )
+        return conversation_id
+
+    def owns(self, conversation_id, owner):
+        if not owner:
+            return False
+        row = self.db.query_one(
+            "SELECT 1 FROM conversations WHERE id = ? AND owner = ?", (conversation_id, owner)
+        )
+        return row is not None
+
+    def append(self, conversation_id, role, content):
+        now = time.time()
+        with self._write_lock, self.db.transaction() as conn:
+            seq = conn.execute(
+                "SELECT message_count FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()["message_count"]
+            conn.execute(
+                "INSERT INTO messages (conversation_id, seq, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                (conversation_id, seq, role, content, now),
+            )
+            # The first user question becomes the conversation's title
+            conn.execute(
+                "UPDATE conversations SET message_count = message_count + 1, updated_at = ?, "
+                "title = CASE WHEN title = 'New conversation' AND ? = 'user' THEN substr(?, 1, 60) ELSE title END "
+                "WHERE id = ?",
+                (now, role, content, conversation_id),
+            )
+        return seq
+
+    def count(self, conversation_id):
+        row = self.db.query_one(
+            "SELECT message_count FROM conversations WHERE id = ?", (conversation_id,)
+        )
+        return row["message_count"] if row else 0
+
+    def messages(self, conversation_id, start, stop):
+        rows = self.db.query(
+            "SELECT role, content FROM messages WHERE conversation_id = ? AND seq >= ? AND seq < ? ORDER BY seq",
+            (conversation_id, start, stop),
+        )
+        return [{"role": row["role"], "content": row["content"]} for row in rows]
+
+    def tail(self, conversation_id, limit):
+        # (offset, messages) for the newest `limit` messages
+        total = self.count(conversation_id)
+        start = max(total - limit, 0)
+        return start, self.messages(conversation_id, start, total)
+
+    def recent(self, owner, limit=10):
+        rows = self.db.query(
+            "SELECT id, title, updated_at, message_count FROM conversations "
+            "WHERE owner = ? AND message_count > 1 ORDER BY updated_at DESC LIMIT ?",
+            (owner, limit),
+        )
+        return [dict(row) for row in rows]
+
+    def load_window_state(self, conversation_id):
+        row = self.db.query_one(
+            "SELECT window_state FROM conversations WHERE id = ?", (conversation_id,)
+        )
+        return json.loads(row["window_state"]) if row and row["window_state"] else None
+
+    def save_window_state(self, conversation_id, state):
+        with self._write_lock, self.db.transaction() as conn:
+            conn.execute(
+                "UPDATE conversations SET window_state = ? WHERE id = ?",
+                (json.dumps(state), conversation_id),
+            )
+
+
+@st.cache_resource(on_release=ConversationStore.close)
+def get_conversation_store():
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    return ConversationStore(DATA_DIR / "conversations.db")
@@ -0,0 +1,77 @@
+# utils/db.py
+# SQLite connections for the stores under data/.
+#
+# Streamlit runs every script run on a new thread, so a connection per thread
+# was opened once per rerun and never reused or closed. A Database instead
+# hands out a connection for one read or one transaction and takes it back:
+# at most `max_idle` are kept open between uses and the rest are closed, so
+# the number of open connections follows concurrent use, not threads seen.
+import queue
+import sqlite3
+from contextlib import contextmanager
+
+
+class Database:
+    def __init__(self, path, max_idle=4, timeout=10):
+        self.path = str(path)
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=max_idle)
+        self._closed = False
+
+    def _open(self):
+        # WAL lets readers run while a writer appends
+        conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    @contextmanager
+    def connection(self):
+        # A connection to this thread alone until the block ends
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._open()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    @contextmanager
+    def transaction(self):
+        # Commits when the block ends, rolls back if it raises
+        with self.connection() as conn, conn:
+            yield conn
+
+    def query(self, sql, params=()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def query_one(self, sql, params=()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def idle_count(self):
+        return self._idle.qsize()
+
+    def close(self):
+        # Connections still checked out are closed when they come back
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            conn.close()
@@ -0,0 +1,98 @@
+# utils/downsample.py
+# Reduces dense time series to about as many points as the chart has pixels
+# before they are handed to Plotly. Buckets in which a series crosses a
+# clinical threshold always keep their extreme readings, so a spike past
+# e.g. 140 mmHg can never be smoothed away.
+from utils.lazy_imports import np
+
+# Plot area widths for the Dashboard's layout="wide" charts
+FULL_WIDTH_PX = 1200
+HALF_WIDTH_PX = 560
+
+
+def _bucket_edges(n, n_buckets):
+    return np.linspace(0, n, n_buckets + 1).astype(np.int64)
+
+
+def lttb(x, y, n_out):
+    # Largest-Triangle-Three-Buckets: indices of n_out points that keep the
+    # visual shape of (x, y). First and last points are always kept.
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.concatenate([[1], 1 + _bucket_edges(n - 2, n_out - 2)[1:]])
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        if next_lo >= next_hi:
+            next_lo, next_hi = n - 1, n
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        area = np.abs((x[previous] - avg_x) * (y[lo:hi] - y[previous])
+                      - (x[previous] - x[lo:hi]) * (avg_y - y[previous]))
+        previous = lo + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+def minmax(y, n_buckets):
+    # Index of the minimum and maximum of each bucket
+    n = len(y)
+    if 2 * n_buckets >= n:
+        return np.arange(n)
+    return np.unique(np.concatenate(_bucket_extremes(np.asarray(y, dtype=np.float64), n_buckets)[2:]))
+
+
+def _bucket_extremes(y, n_buckets):
+    # Per-bucket (min value, max value, argmin index, argmax index)
+    edges = _bucket_edges(len(y), n_buckets)
+    starts = edges[:-1]
+    mins = np.minimum.reduceat(y, starts)
+    maxs = np.maximum.reduceat(y, starts)
+    bucket = np.repeat(np.arange(n_buckets), np.diff(edges))
+    index = np.arange(len(y))
+    # First position in each bucket equal to the bucket's min / max
+    argmin = np.full(n_buckets, len(y))
+    argmax = np.full(n_buckets, len(y))
+    np.minimum.at(argmin, bucket, np.where(y == mins[bucket], index, len(y)))
+    np.minimum.at(argmax, bucket, np.where(y == maxs[bucket], index, len(y)))
+    return mins, maxs, argmin, argmax
+
+
+def threshold_extremes(y, thresholds, n_buckets):
+    # Extremes of every bucket whose range spans one of the thresholds
+    y = np.asarray(y, dtype=np.float64)
+    if not thresholds or len(y) == 0:
+        return np.array([], dtype=np.int64)
+    n_buckets = min(n_buckets, len(y))
+    mins, maxs, argmin, argmax = _bucket_extremes(y, n_buckets)
+    crossing = np.zeros(n_buckets, dtype=bool)
+    for threshold in thresholds:
+        crossing |= (mins <= threshold) & (maxs > threshold)
+    return np.concatenate([argmin[crossing], argmax[crossing]])
+
+
+def downsample_frame(frame, x, columns, width_px, thresholds=None, method="lttb"):
+    # Rows of `frame` to plot for the given y columns. Every column keeps its
+    # own shape-preserving points plus its threshold-crossing extremes; the
+    # union is returned so all traces still share one x axis.
+    n = len(frame)
+    if n <= width_px:
+        return frame
+    thresholds = thresholds or {}
+    xs = frame[x].to_numpy().astype("datetime64[s]").astype(np.int64)
+    keep = [np.array([0, n - 1])]
+    for column in columns:
+        ys = frame[column].to_numpy()
+        if method == "minmax":
+            keep.append(minmax(ys, width_px // 2))
+        else:
+            keep.append(lttb(xs, ys, width_px))
+        keep.append(threshold_extremes(ys, thresholds.get(column, ()), width_px // 2))
+    rows = np.unique(np.concatenate(keep))
+    return frame.iloc[rows]
@@ -0,0 +1,120 @@
+# utils/figure_cache.py
+# Process-wide cache of dashboard figures. Figures are stored as serialized
+# Plotly specs keyed on patient, chart and a fingerprint of the data slice
+# they were built from, so a rerun that did not change a chart's inputs skips
+# rebuilding it (make_subplots, add_hline and px.* are the expensive part).
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+from utils.lazy_imports import go, pd
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+
+def fingerprint(*parts):
+    # Content hash of everything a chart is built from: frames, series or
+    # plain values such as thresholds and titles
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, (pd.DataFrame, pd.Series)):
+            if isinstance(part, pd.DataFrame):
+                digest.update(repr(list(part.columns)).encode("utf-8"))
+            digest.update(pd.util.hash_pandas_object(part, index=True).to_numpy().tobytes())
+        else:
+            digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+class FigureCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_build(self, patient_id, chart, data_fingerprint, build, version=None):
+        # build() is only called on a miss. When the data version of a
+        # (patient, chart) pair moves on, every figure built from the older
+        # data is dropped, whatever slice it was built for.
+        key = (patient_id, chart, version, data_fingerprint)
+        with self._lock:
+            self._check_version(patient_id, chart, version)
+            spec = self._entries.get(key)
+            if spec is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if spec is not None:
+            # The spec came out of a validated figure, so skip re-validation
+            return go.Figure(json.loads(spec), _validate=False)
+
+        figure = build()
+        self._put(key, figure.to_json())
+        return figure
+
+    def _check_version(self, patient_id, chart, version):
+        seen = self._versions.get((patient_id, chart))
+        if seen == version:
+            return
+        if seen is not None and version is not None and version < seen:
+            # A session still holding older data; leave the newer entries alone
+            return
+        self._versions[(patient_id, chart)] = version
+        stale = [key for key in self._entries if key[0] == patient_id and key[1] == chart and key[2] != version]
+        for key in stale:
+            self._bytes -= len(self._entries.pop(key))
+            self.invalidations += 1
+
+    def _put(self, key, spec):
+        size = len(spec)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key[2] != self._versions.get(key[:2]):
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = spec
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def invalidate(self, patient_id=None):
+        with self._lock:
+            stale = [key for key in self._entries if patient_id is None or key[0] == patient_id]
+            for key in stale:
+                self._bytes -= len(self._entries.pop(key))
+            self.invalidations += len(stale)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+@st.cache_resource
+def get_figure_cache():
+    return FigureCache()
@@ -0,0 +1,57 @@
+# utils/forum_html.py
+# Rendered HTML for forum posts. Every like or comment bumps the post's
+# version in the forum store, so (id, version, age label) identifies the
+# exact HTML and it is built once per process rather than on every rerun.
+# Everything users typed is escaped: posts are stored and shown to everyone.
+import threading
+from html import escape
+from collections import OrderedDict
+
+from utils.assets import get_asset_pipeline, POST_AVATAR_PX, COMMENT_AVATAR_PX
+
+POST_HTML_CACHE_SIZE = 2048
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def build_post_html(post):
+    assets = get_asset_pipeline()
+    comments_html = ""
+    for comment in post["comments"]:
+        comments_html += f"""
+        <div class="comment-box">
+            <img src="{escape(assets.avatar_src(comment['user'], comment['avatar'], COMMENT_AVATAR_PX))}" width="{COMMENT_AVATAR_PX}" class="comment-avatar"/>
+            <div class="comment-content"><strong>{escape(comment['user'])}</strong><br>{escape(comment['text'])}</div>
+        </div>
+        """.strip()
+
+    return f"""
+    <div class="post-box">
+        <div style="display:flex;align-items:center;gap:15px;">
+            <img src="{escape(assets.avatar_src(post['user'], post['avatar'], POST_AVATAR_PX))}" width="{POST_AVATAR_PX}" class="user-img"/>
+            <div>
+                <strong>{escape(post['user'])}</strong><br>
+                <span class="text-small">{post['time']}</span>
+            </div>
+        </div>
+        <p style="margin-top:10px;font-size:15px;">{escape(post['content'])}</p>
+        <span class="like-text">❤️ {post['likes']} Hearts</span>
+        {comments_html}
+    </div>
+    """
+
+
+def post_html(post):
+    key = (post["id"], post["version"], post["time"])
+    with _lock:
+        html = _cache.get(key)
+        if html is not None:
+            _cache.move_to_end(key)
+            return html
+    html = build_post_html(post)
+    with _lock:
+        _cache[key] = html
+        while len(_cache) > POST_HTML_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return html
@@ -0,0 +1,169 @@
+# utils/forum_model.py
+# One forum model per server process, shared by every session. Posts are
+# held as snapshots that are never modified in place: a like or comment
+# swaps in a new dict (copy-on-write), so sessions can keep reading the one
+# they were given without copies or locks. Likes are counted in memory and
+# flushed to the store in batches; posts and comments are written through.
+import atexit
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import streamlit as st
+
+from utils.forum_store import get_forum_store, format_age, PAGE_SIZE, SEARCH_LIMIT
+
+FLUSH_INTERVAL = 1.0
+FLUSH_BATCH = 200
+MAX_POSTS = 5000
+MAX_PAGES = 256
+
+
+class ForumModel:
+    def __init__(self, store, flush_interval=FLUSH_INTERVAL, flush_batch=FLUSH_BATCH,
+                 max_posts=MAX_POSTS, max_pages=MAX_PAGES):
+        self.store = store
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.max_posts = max_posts
+        self.max_pages = max_pages
+        self._lock = threading.RLock()
+        self._posts = OrderedDict()
+        self._pages = OrderedDict()
+        self._pending_likes = Counter()
+        self._wake = threading.Event()
+        self._stopped = False
+        self.flushes = 0
+        self._flusher = threading.Thread(target=self._flush_loop, name="forum-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    # --- snapshots ---
+
+    def _remember(self, post):
+        # Store rows lag behind likes that are still pending
+        pending = self._pending_likes.get(post["id"], 0)
+        if pending:
+            post = {**post, "likes": post["likes"] + pending, "version": post["version"] + pending}
+        self._posts[post["id"]] = post
+        self._posts.move_to_end(post["id"])
+        while len(self._posts) > self.max_posts:
+            self._posts.popitem(last=False)
+        return post
+
+    def _current(self, post):
+        # Refresh the age label ("2 hours ago") by swapping in a new snapshot
+        label = format_age(post["created_at"])
+        if label != post["time"]:
+            post = {**post, "time": label}
+            self._posts[post["id"]] = post
+        return post
+
+    # --- reads ---
+
+    def get(self, post_id):
+        with self._lock:
+            post = self._posts.get(post_id)
+            if post is None:
+                post = self.store.get(post_id)
+                if post is None:
+                    return None
+                post = self._remember(post)
+            return self._current(post)
+
+    def page(self, sort="newest", after=None, limit=PAGE_SIZE):
+        # Page layouts (ids plus next cursor) are shared too, until a new post
+        # or a like flush could change them
+        key = (sort, after, limit)
+        with self._lock:
+            layout = self._pages.get(key)
+            if layout is not None:
+                self._pages.move_to_end(key)
+                ids, cursor = layout
+                if all(post_id in self._posts for post_id in ids):
+                    return [self._current(self._posts[post_id]) for post_id in ids], cursor
+
+            posts, cursor = self.store.page(sort, after=after, limit=limit)
+            posts = [self._current(self._posts.get(post["id"]) or self._remember(post)) for post in posts]
+            self._pages[key] = ([post["id"] for post in posts], cursor)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+            return posts, cursor
+
+    def search(self, text, limit=SEARCH_LIMIT):
+        # Results are fresh dicts from the store; add likes not yet flushed
+        results = self.store.search(text, limit=limit)
+        with self._lock:
+            for post in results:
+                post["likes"] += self._pending_likes.get(post["id"], 0)
+        return results
+
+    # --- writes ---
+
+    def create_post(self, user, avatar, content):
+        post = self.store.create_post(user, avatar, content)
+        with self._lock:
+            self._pages.clear()
+            return self._remember(post)
+
+    def add_comment(self, post_id, user, avatar, text):
+        with self._lock:
+            post = self.store.add_comment(post_id, user, avatar, text)
+            return None if post is None else self._remember(post)
+
+    def like(self, post_id):
+        with self._lock:
+            post = self._posts.get(post_id) or self.get(post_id)
+            if post is None:
+                return None
+            self._pending_likes[post_id] += 1
+            post = {**post, "likes": post["likes"] + 1, "version": post["version"] + 1}
+            self._posts[post_id] = post
+            if sum(self._pending_likes.values()) >= self.flush_batch:
+                self._wake.set()
+            return post
+
+    # --- flushing ---
+
+    def flush(self):
+        # Written under the model lock (one short transaction) so no store read
+        # can see the new counts while they are still counted as pending
+        with self._lock:
+            pending = self._pending_likes
+            if not pending:
+                return 0
+            self.store.add_likes(pending)
+            self._pending_likes = Counter()
+            # "Most liked" pages may now order differently
+            for key in [key for key in self._pages if key[0] == "likes"]:
+                del self._pages[key]
+            self.flushes += 1
+            return sum(pending.values())
+
+    def _flush_loop(self):
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                time.sleep(self.flush_interval)
+
+    def close(self):
+        self._stopped = True
+        self._wake.set()
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "posts_cached": len(self._posts),
+                "pages_cached": len(self._pages),
+                "pending_likes": sum(self._pending_likes.values()),
+                "flushes": self.flushes,
+            }
+
+
+@st.cache_resource
+def get_forum_model():
+    return ForumModel(get_forum_store())
@@ -0,0 +1,280 @@
+# utils/forum_store.py
+# SQLite (WAL) store shared by every Forum session. Posts are read a page at
+# a time with keyset pagination: the cursor is the sort key of the last post
+# shown, so each page is one index range scan of PAGE_SIZE rows however many
+# posts the forum holds. Post and comment text is also kept in an FTS5
+# index, filled by triggers as rows are inserted, for ranked search.
+import html
+import re
+import threading
+import time
+import uuid
+
+import streamlit as st
+
+from utils.config import DATA_DIR
+from utils.db import Database
+from utils.seed_data import SEED_POSTS
+
+PAGE_SIZE = 10
+SEARCH_LIMIT = 20
+# BM25 ranking is applied to the newest SEARCH_WINDOW matching posts and
+# comments, so a query for a very common word costs the same at any forum size.
+# Older matches are not ranked at all: once a query has more matches than
+# this, an older post can be missed however well it matches.
+SEARCH_WINDOW = 2000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    pk INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    user TEXT NOT NULL,
+    avatar TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    likes INTEGER NOT NULL DEFAULT 0,
+    comment_count INTEGER NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_posts_created ON posts (created_at DESC, pk DESC);
+CREATE INDEX IF NOT EXISTS idx_posts_likes ON posts (likes DESC, created_at DESC, pk DESC);
+CREATE TABLE IF NOT EXISTS comments (
+    pk INTEGER PRIMARY KEY,
+    post_pk INTEGER NOT NULL REFERENCES posts (pk),
+    user TEXT NOT NULL,
+    avatar TEXT NOT NULL,
+    text TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_comments_post ON comments (post_pk, pk);
+"""
+
+# Posts and comments are append-only, so insert triggers keep the index current
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS forum_fts USING fts5(
+    body, kind UNINDEXED, post_pk UNINDEXED, tokenize = 'porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts BEGIN
+    INSERT INTO forum_fts (body, kind, post_pk) VALUES (new.content, 'post', new.pk);
+END;
+CREATE TRIGGER IF NOT EXISTS comments_fts_insert AFTER INSERT ON comments BEGIN
+    INSERT INTO forum_fts (body, kind, post_pk) VALUES (new.text, 'comment', new.post_pk);
+END;
+"""
+
+# sort name: (ORDER BY columns, all descending). The last column is unique,
+# so the tuple of these values for the last row shown is a complete cursor.
+SORTS = {
+    "newest": ("created_at", "pk"),
+    "likes": ("likes", "created_at", "pk"),
+}
+
+_WORD = re.compile(r"\w+")
+_MARK_START, _MARK_END = "\x02", "\x03"
+_AGO = re.compile(r"(\d+)\s+(minute|hour|day|week)s?\s+ago")
+_UNIT_SECONDS = {"minute": 60, "hour": 3600, "day": 86400, "week": 7 * 86400}
+
+
+def seed_age_seconds(label):
+    # "2 hours ago" -> 7200; the seed posts only carry display strings
+    match = _AGO.search(label or "")
+    return int(match.group(1)) * _UNIT_SECONDS[match.group(2)] if match else 0
+
+
+def match_query(text, operator=" "):
+    # Free text -> FTS5 query; words are joined with AND (" ") or " OR ".
+    # Quoting each word keeps punctuation and FTS5 operators in the input
+    # from being parsed.
+    words = _WORD.findall(text.lower())
+    if not words:
+        return None
+    return operator.join(f'"{word}"' for word in words)
+
+
+def highlight(snippet):
+    # Escape the matched text, then turn the snippet markers into <mark> tags
+    return html.escape(snippet).replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>")
+
+
+def format_age(created_at, now=None):
+    seconds = max((now or time.time()) - created_at, 0)
+    for unit in ("week", "day", "hour", "minute"):
+        count = int(seconds // _UNIT_SECONDS[unit])
+        if count:
+            return f"{count} {unit}{'s' if count > 1 else ''} ago"
+    return "just now"
+
+
+class ForumStore:
+    def __init__(self, path, seed_posts=SEED_POSTS):
+        self.path = str(path)
+        self.db = Database(self.path)
+        self._write_lock = threading.Lock()
+        with self.db.transaction() as conn:
+            conn.executescript(SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(posts)")}
+            if "version" not in columns:
+                conn.execute("ALTER TABLE posts ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            indexed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'forum_fts'").fetchone()
+            conn.executescript(SEARCH_SCHEMA)
+            if not indexed:
+                # Forum created before search existed: index what is already there
+                conn.execute("INSERT INTO forum_fts (body, kind, post_pk) SELECT content, 'post', pk FROM posts")
+                conn.execute("INSERT INTO forum_fts (body, kind, post_pk) SELECT text, 'comment', post_pk FROM comments")
+        if seed_posts and self.count() == 0:
+            self._seed(seed_posts)
+
+    def close(self):
+        self.db.close()
+
+    def _seed(self, seed_posts):
+        now = time.time()
+        with self._write_lock, self.db.transaction() as conn:
+            for position, post in enumerate(seed_posts):
+                # Listed newest first; the position breaks ties between equal ages
+                created_at = now - seed_age_seconds(post.get("time")) - position * 1e-3
+                post_pk = conn.execute(
+                    "INSERT INTO posts (id, user, avatar, content, created_at, likes, comment_count) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (post["id"], post["user"], post["avatar"], post["content"], created_at,
+                     post["likes"], len(post["comments"])),
+                ).lastrowid
+                conn.executemany(
+                    "INSERT INTO comments (post_pk, user, avatar, text, created_at) VALUES (?, ?, ?, ?, ?)",
+                    [(post_pk, c["user"], c["avatar"], c["text"], created_at) for c in post["comments"]],
+                )
+
+    # --- writes ---
+
+    def create_post(self, user, avatar, content):
+        post_id = uuid.uuid4().hex
+        with self._write_lock, self.db.transaction() as conn:
+            conn.execute(
+                "INSERT INTO posts (id, user, avatar, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                (post_id, user, avatar, content, time.time()),
+            )
+        return self.get(post_id)
+
+    def add_comment(self, post_id, user, avatar, text):
+        # The post with its new comment, or None if there is no such post
+        with self._write_lock, self.db.transaction() as conn:
+            row = conn.execute("SELECT pk FROM posts WHERE id = ?", (post_id,)).fetchone()
+            if row is None:
+                return None
+            post_pk = row["pk"]
+            conn.execute(
+                "INSERT INTO comments (post_pk, user, avatar, text, created_at) VALUES (?, ?, ?, ?, ?)",
+                (post_pk, user, avatar, text, time.time()),
+            )
+            conn.execute("UPDATE posts SET comment_count = comment_count + 1, version = version + 1 WHERE pk = ?",
+                         (post_pk,))
+        return self.get(post_id)
+
+    def like(self, post_id):
+        with self._write_lock, self.db.transaction() as conn:
+            conn.execute("UPDATE posts SET likes = likes + 1, version = version + 1 WHERE id = ?", (post_id,))
+
+    def add_likes(self, counts):
+        # {post_id: n} applied in one transaction (batched likes from ForumModel)
+        with self._write_lock, self.db.transaction() as conn:
+            conn.executemany(
+                "UPDATE posts SET likes = likes + ?, version = version + ? WHERE id = ?",
+                [(n, n, post_id) for post_id, n in counts.items()],
+            )
+
+    # --- reads ---
+
+    def count(self):
+        return self.db.query_one("SELECT COUNT(*) FROM posts")[0]
+
+    def get(self, post_id):
+        row = self.db.query_one("SELECT * FROM posts WHERE id = ?", (post_id,))
+        return self._with_comments([row])[0] if row else None
+
+    def page(self, sort="newest", after=None, limit=PAGE_SIZE):
+        # (posts, cursor for the next page or None). `after` is the cursor
+        # returned with the previous page.
+        columns = SORTS[sort]
+        order = ", ".join(f"{column} DESC" for column in columns)
+        sql, params = "SELECT * FROM posts", []
+        if after is not None:
+            sql += f" WHERE ({', '.join(columns)}) < ({', '.join('?' * len(columns))})"
+            params.extend(after)
+        rows = self.db.query(f"{sql} ORDER BY {order} LIMIT ?", (*params, limit + 1))
+        more = len(rows) > limit
+        rows = rows[:limit]
+        cursor = tuple(rows[-1][column] for column in columns) if more else None
+        return self._with_comments(rows), cursor
+
+    def search(self, text, limit=SEARCH_LIMIT):
+        # Posts ranked by their best BM25 hit in the post or any of its
+        # comments, each with a highlighted snippet of that hit. All words
+        # must match; if nothing does, any word may. Only the newest
+        # SEARCH_WINDOW matches are ranked.
+        hits = self._hits(match_query(text), limit) or self._hits(match_query(text, " OR "), limit)
+        best = {}
+        for hit in hits:
+            best.setdefault(hit["post_pk"], hit)
+        pks = list(best)[:limit]
+        if not pks:
+            return []
+        rows = self.db.query(
+            f"SELECT * FROM posts WHERE pk IN ({', '.join('?' * len(pks))})", pks
+        )
+        posts = {row["pk"]: post for row, post in zip(rows, self._with_comments(rows))}
+        results = []
+        for pk in pks:
+            post = posts[pk]
+            post["match"] = best[pk]["kind"]
+            post["snippet"] = highlight(best[pk]["snippet"])
+            results.append(post)
+        return results
+
+    def _hits(self, query, limit):
+        if query is None:
+            return []
+        with self.db.connection() as conn:
+            # Lowest rowid among the newest SEARCH_WINDOW matches (walking rowids is cheap)
+            row = conn.execute(
+                "SELECT rowid FROM forum_fts WHERE forum_fts MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?",
+                (query, SEARCH_WINDOW - 1),
+            ).fetchone()
+            return conn.execute(
+                "SELECT post_pk, kind, snippet(forum_fts, 0, ?, ?, '…', 16) AS snippet FROM forum_fts "
+                "WHERE forum_fts MATCH ? AND rowid >= ? ORDER BY rank LIMIT ?",
+                (_MARK_START, _MARK_END, query, row[0] if row else 0, limit * 4),
+            ).fetchall()
+
+    def _with_comments(self, rows):
+        # Comments for the whole page in one query, in the order they were written
+        posts = {row["pk"]: _post(row) for row in rows}
+        if posts:
+            comments = self.db.query(
+                f"SELECT post_pk, user, avatar, text FROM comments "
+                f"WHERE post_pk IN ({', '.join('?' * len(posts))}) ORDER BY post_pk, pk",
+                list(posts),
+            )
+            for comment in comments:
+                posts[comment["post_pk"]]["comments"].append(
+                    {"user": comment["user"], "avatar": comment["avatar"], "text": comment["text"]})
+        return list(posts.values())
+
+
+def _post(row):
+    return {
+        "id": row["id"],
+        "user": row["user"],
+        "avatar": row["avatar"],
+        "time": format_age(row["created_at"]),
+        "created_at": row["created_at"],
+        "content": row["content"],
+        "likes": row["likes"],
+        "version": row["version"],
+        "comments": [],
+    }
+
+
+@st.cache_resource(on_release=ForumStore.close)
+def get_forum_store():
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    return ForumStore(DATA_DIR / "forum.db")
@@ -0,0 +1,285 @@
+# utils/knowledge_base.py
+# Local retrieval index over the educational resources and forum content.
+# Vectors live in a memory-mapped float32 matrix on disk; search goes through
+# random-hyperplane LSH buckets and re-ranks the candidates exactly.
+import hashlib
+import json
+import os
+import re
+import threading
+import warnings
+from pathlib import Path
+
+import streamlit as st
+
+from utils.config import DATA_DIR
+from utils.lazy_imports import np
+from utils.seed_data import RESOURCES, SEED_POSTS
+
+_WORD = re.compile(r"[a-z0-9]+")
+_FIELDS = {"id", "source", "text", "digest"}
+
+
+class HashingEmbedder:
+    # Feature-hashed words, word bigrams and character trigrams. Needs no model
+    # download, so the index can be built on any box the app runs on.
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def _features(self, text):
+        words = _WORD.findall(text.lower())
+        features = list(words)
+        features += [f"{a}_{b}" for a, b in zip(words, words[1:])]
+        for word in words:
+            padded = f"#{word}#"
+            features += [padded[i:i + 3] for i in range(len(padded) - 2)]
+        return features
+
+    def embed(self, texts):
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                sign = 1.0 if value & 1 else -1.0
+                matrix[row, (value >> 1) % self.dim] += sign
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+def chunk_text(text, max_words=80, overlap=20):
+    words = text.split()
+    if len(words) <= max_words:
+        return [text.strip()] if words else []
+    step = max_words - overlap
+    return [" ".join(words[i:i + max_words]) for i in range(0, len(words) - overlap, step)]
+
+
+def resource_passages(resource):
+    text = (f"{resource['title']} ({resource['type']}, posted by {resource['posted_by']}): "
+            f"{resource['description']} Link: {resource['link']}")
+    return [(f"resource:{resource['link']}", "resource", text)]
+
+
+def post_passages(post):
+    passages = [(f"post:{post['id']}", "forum post", f"{post['user']} asked: {post['content']}")]
+    for i, comment in enumerate(post["comments"]):
+        passages.append((f"post:{post['id']}:comment:{i}", "forum comment",
+                         f"{comment['user']} replied to \"{post['content']}\": {comment['text']}"))
+    return passages
+
+
+class KnowledgeBase:
+    def __init__(self, directory, embedder=None, n_tables=8, n_bits=10, seed=7):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.embedder = embedder or HashingEmbedder()
+        self.dim = self.embedder.dim
+        self._lock = threading.Lock()
+
+        rng = np.random.default_rng(seed)
+        self._planes = rng.standard_normal((n_tables, self.dim, n_bits)).astype(np.float32)
+        self._bit_weights = (1 << np.arange(n_bits)).astype(np.int64)
+        self._tables = [dict() for _ in range(n_tables)]
+
+        self._vectors_path = self.directory / "vectors.f32"
+        self._meta_path = self.directory / "passages.jsonl"
+        self.passages = []
+        self._ids = {}
+        self._vectors = None
+        self._capacity = 0
+        self._stale = 0
+        self._load()
+
+    # --- storage ---
+
+    def _open(self, capacity):
+        mode = "r+" if self._vectors_path.exists() else "w+"
+        if self._vectors_path.exists():
+            current = self._vectors_path.stat().st_size // (4 * self.dim)
+            if current < capacity:
+                with open(self._vectors_path, "ab") as f:
+                    f.truncate(capacity * self.dim * 4)
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode=mode, shape=(capacity, self.dim))
+        self._capacity = capacity
+
+    def _read_passages(self):
+        # One passage per line, in row order. A line that does not parse (a
+        # write torn by a crash) still takes up its row, so the rows after it
+        # stay lined up with their vectors; it comes back as None.
+        passages = []
+        if not self._meta_path.exists():
+            return passages
+        with open(self._meta_path, encoding="utf-8", errors="replace") as f:
+            for number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    passage = json.loads(line)
+                except ValueError:
+                    passage = None
+                if not isinstance(passage, dict) or not _FIELDS <= passage.keys():
+                    warnings.warn(f"{self._meta_path}: skipping unreadable passage on line {number}")
+                    passage = None
+                passages.append(passage)
+        return passages
+
+    def _load(self):
+        self.passages = self._read_passages()
+        live = {}
+        for row, passage in enumerate(self.passages):
+            if passage is not None:
+                live[passage["id"]] = row  # an edited passage's newest row wins
+        if self._vectors_path.exists() and self._vectors_path.stat().st_size >= len(self.passages) * self.dim * 4:
+            self._open(max(self._vectors_path.stat().st_size // (4 * self.dim), 1))
+        else:
+            # Vectors missing or truncated: re-embed whatever metadata survived
+            self._vectors_path.unlink(missing_ok=True)
+            self._open(max(len(self.passages), 64))
+            rows = sorted(live.values())
+            if rows:
+                self._vectors[rows] = self.embedder.embed([self.passages[row]["text"] for row in rows])
+        if len(live) < len(self.passages):
+            # Superseded or unreadable rows: rewrite the files without them
+            self._compact(sorted(live.values()))
+        else:
+            self._ids = live
+            if self.passages:
+                self._index_rows(0, len(self.passages))
+
+    def _compact(self, rows):
+        # Keep only `rows`, in order. The old vectors file goes before the new
+        # metadata is in place, so a crash part way leaves metadata without
+        # vectors, which _load re-embeds, never rows that do not line up.
+        passages = [self.passages[row] for row in rows]
+        vectors = np.array(self._vectors[rows]) if rows else np.zeros((0, self.dim), dtype=np.float32)
+        self._vectors = None
+        meta_tmp = self._meta_path.with_suffix(".tmp")
+        with open(meta_tmp, "w", encoding="utf-8") as f:
+            for passage in passages:
+                f.write(json.dumps(passage, ensure_ascii=False) + "\n")
+        self._vectors_path.unlink(missing_ok=True)
+        os.replace(meta_tmp, self._meta_path)
+        vectors_tmp = self._vectors_path.with_suffix(".tmp")
+        vectors.tofile(vectors_tmp)
+        os.replace(vectors_tmp, self._vectors_path)
+
+        self.passages = passages
+        self._ids = {passage["id"]: row for row, passage in enumerate(passages)}
+        self._stale = 0
+        self._tables = [dict() for _ in self._tables]
+        self._open(max(len(passages), 64))
+        if passages:
+            self._index_rows(0, len(passages))
+
+    def _codes(self, vectors):
+        # (n, tables) bucket ids: sign pattern of each projection packed into an int
+        bits = np.einsum("nd,tdb->ntb", vectors, self._planes) > 0
+        return bits.astype(np.int64) @ self._bit_weights
+
+    def _index_rows(self, start, stop):
+        codes = self._codes(np.asarray(self._vectors[start:stop]))
+        for offset, row_codes in enumerate(codes):
+            for table, code in zip(self._tables, row_codes):
+                table.setdefault(int(code), []).append(start + offset)
+
+    def _unindex_row(self, row):
+        codes = self._codes(np.asarray(self._vectors[row:row + 1]))[0]
+        for table, code in zip(self._tables, codes):
+            bucket = table.get(int(code))
+            if bucket is not None and row in bucket:
+                bucket.remove(row)
+                if not bucket:
+                    del table[int(code)]
+
+    # --- updates ---
+
+    def add(self, passages):
+        # passages: iterable of (id, source, text). Known ids with unchanged
+        # text are skipped, so re-adding a whole collection only embeds what is new.
+        with self._lock:
+            fresh = {}
+            for passage_id, source, text in passages:
+                digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+                row = self._ids.get(passage_id)
+                if row is not None and self.passages[row]["digest"] == digest:
+                    continue
+                fresh[passage_id] = {"id": passage_id, "source": source, "text": text, "digest": digest}
+            if not fresh:
+                return 0
+            fresh = list(fresh.values())
+
+            start = len(self.passages)
+            stop = start + len(fresh)
+            if stop > self._capacity:
+                self._vectors.flush()
+                self._open(max(stop, self._capacity * 2))
+            self._vectors[start:stop] = self.embedder.embed([p["text"] for p in fresh])
+            self._vectors.flush()
+
+            superseded = []
+            with open(self._meta_path, "a", encoding="utf-8") as f:
+                for offset, passage in enumerate(fresh):
+                    if passage["id"] in self._ids:
+                        superseded.append(self._ids[passage["id"]])
+                    self._ids[passage["id"]] = start + offset
+                    self.passages.append(passage)
+                    f.write(json.dumps(passage, ensure_ascii=False) + "\n")
+            self._index_rows(start, stop)
+
+            # An edited passage's old row leaves the LSH tables now, and the
+            # files once a quarter of their rows are superseded
+            for row in superseded:
+                self._unindex_row(row)
+            self._stale += len(superseded)
+            if self._stale * 4 >= len(self.passages):
+                self._compact(sorted(self._ids.values()))
+            return len(fresh)
+
+    def add_resource(self, resource):
+        return self.add(resource_passages(resource))
+
+    def add_post(self, post):
+        return self.add(post_passages(post))
+
+    # --- search ---
+
+    def search(self, query, k=3, min_score=0.1):
+        with self._lock:
+            if not self._ids or not query.strip():
+                return []
+            query_vec = self.embedder.embed([query])[0]
+            candidates = set()
+            for table, code in zip(self._tables, self._codes(query_vec[None, :])[0]):
+                candidates.update(table.get(int(code), ()))
+            if len(candidates) < k:
+                rows = np.fromiter(self._ids.values(), dtype=np.int64, count=len(self._ids))
+            else:
+                rows = np.fromiter(candidates, dtype=np.int64)
+            scores = np.asarray(self._vectors[rows]) @ query_vec
+
+            results = []
+            for i in np.argsort(-scores):
+                passage = self.passages[rows[i]]
+                if scores[i] < min_score or len(results) == k:
+                    break
+                results.append({"id": passage["id"], "source": passage["source"],
+                                 "text": passage["text"], "score": float(scores[i])})
+            return results
+
+
+def format_context(passages):
+    lines = [f"[{i}] ({p['source']}) {p['text']}" for i, p in enumerate(passages, start=1)]
+    return ("Use the following passages from the HealthBridge resources and forum when they are relevant. "
+            "Cite them by number and say so if they do not answer the question.\n" + "\n".join(lines))
+
+
+@st.cache_resource
+def get_knowledge_base():
+    kb = KnowledgeBase(DATA_DIR / "knowledge_base")
+    for resource in RESOURCES:
+        kb.add_resource(resource)
+    for post in SEED_POSTS:
+        kb.add_post(post)
+    return kb
@@ -0,0 +1,63 @@
+# utils/lab_ranges.py
+# Lab status derived from the reference range instead of typed by hand.
+# Range strings ('13.5-17.5', '<200', '>40', ...) are parsed once per
+# distinct string and the whole result table is classified in a single
+# vectorized pass.
+import re
+from functools import lru_cache
+
+from utils.lazy_imports import np, pd
+
+# Share of the range bound inside which a normal value is flagged borderline
+BORDERLINE_MARGIN = 0.05
+
+STATUS_ORDER = ["Low", "Borderline Low", "Normal", "Borderline High", "High"]
+
+_NUMBER = r"(-?\d+(?:\.\d+)?)"
+_BETWEEN = re.compile(rf"^\s*{_NUMBER}\s*(?:-|–|to)\s*{_NUMBER}\s*$")
+_BOUND = re.compile(rf"^\s*(<=|>=|≤|≥|<|>)\s*{_NUMBER}\s*$")
+
+
+@lru_cache(maxsize=4096)
+def parse_range(text):
+    # (low, high, low_inclusive, high_inclusive); open ends are +/- inf
+    match = _BETWEEN.match(text)
+    if match:
+        return float(match.group(1)), float(match.group(2)), True, True
+    match = _BOUND.match(text)
+    if match:
+        op, value = match.group(1), float(match.group(2))
+        if op in ("<", "<=", "≤"):
+            return -np.inf, value, True, op != "<"
+        return value, np.inf, op != ">", True
+    raise ValueError(f"unrecognised reference range {text!r}")
+
+
+def classify(values, low, high, low_inclusive, high_inclusive, margin=BORDERLINE_MARGIN):
+    values = np.asarray(values, dtype=np.float64)
+    below = np.where(low_inclusive, values < low, values <= low)
+    above = np.where(high_inclusive, values > high, values >= high)
+    with np.errstate(invalid="ignore"):
+        near_high = np.isfinite(high) & (values >= high - np.abs(high) * margin)
+        near_low = np.isfinite(low) & (values <= low + np.abs(low) * margin)
+    status = np.select(
+        [np.isnan(values), below, above, near_high, near_low],
+        ["Unknown", "Low", "High", "Borderline High", "Borderline Low"],
+        default="Normal",
+    )
+    return status
+
+
+def classify_labs(labs, margin=BORDERLINE_MARGIN):
+    # Adds Status (and numeric bounds) to a table with Test, Unit, Reference_Range and Value
+    codes, ranges = pd.factorize(labs["Reference_Range"].astype(str))
+    compiled = np.array([parse_range(text) for text in ranges], dtype=object).reshape(-1, 4)
+    low = compiled[:, 0].astype(np.float64)[codes]
+    high = compiled[:, 1].astype(np.float64)[codes]
+    low_inclusive = compiled[:, 2].astype(bool)[codes]
+    high_inclusive = compiled[:, 3].astype(bool)[codes]
+    result = labs.copy()
+    result["Range_Low"] = low
+    result["Range_High"] = high
+    result["Status"] = classify(labs["Value"], low, high, low_inclusive, high_inclusive, margin)
+    return result
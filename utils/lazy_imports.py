@@ -0,0 +1,71 @@
+# utils/lazy_imports.py
+# Heavy libraries behind module proxies that import on first attribute
+# access. Pages and utils import the proxies instead of the libraries, so
+# loading a page costs nothing until it actually builds a frame, a chart or
+# a model client. Python keeps one copy of every imported module, so
+# whichever page gets there first pays once for every page in the process;
+# preload() does that work on a background thread once the landing page has
+# rendered, before the user opens the pages that need it.
+import importlib
+import threading
+
+import streamlit as st
+
+from utils import config
+
+# Imported by preload(), in this order
+HEAVY_MODULES = ("numpy", "pandas", "plotly.express", "plotly.subplots")
+
+
+class LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+                module = self._module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
+px = LazyModule("plotly.express")
+go = LazyModule("plotly.graph_objects")
+plotly_subplots = LazyModule("plotly.subplots")
+ollama = LazyModule("ollama")
+httpx = LazyModule("httpx")
+
+
+def make_subplots(*args, **kwargs):
+    return plotly_subplots.make_subplots(*args, **kwargs)
+
+
+def _import_all(names):
+    for name in names:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+
+@st.cache_resource
+def preload():
+    # Once per server process, and only if PRELOAD_MODULES is on
+    if not config.PRELOAD_MODULES:
+        return None
+    thread = threading.Thread(target=_import_all, args=(HEAVY_MODULES,), name="module-preload", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,503 @@
+# utils/link_metadata.py
+# Link checks and previews (page title, thumbnail, PDF page count) for
+# catalog resources, fetched by a pool of asyncio workers on one background
+# thread per server process. Results go to a SQLite cache that the Hub page
+# reads; the page itself never touches the network. Each host is rate
+# limited, failed fetches are retried with backoff, and a link is not
+# fetched again until its cached result expires. Links are submitted by
+# users, so every hop is resolved first, hosts on private, loopback or
+# otherwise non-public addresses are refused, and the request then goes to
+# the address that was checked rather than resolving the host again.
+import asyncio
+import atexit
+import hashlib
+import ipaddress
+import itertools
+import os
+import re
+import socket
+import threading
+import time
+import zlib
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+import streamlit as st
+
+from utils import config
+from utils.config import DATA_DIR
+from utils.db import Database
+from utils.assets import get_asset_pipeline
+from utils.lazy_imports import httpx
+from utils.resource_store import get_resource_store, normalize_link
+
+# Thumbnails are shown at 320px; the variant is made at twice that
+THUMBNAIL_WIDTH = 640
+OK_TTL = 7 * 86400
+FAILED_TTL = 6 * 3600
+HTML_BYTES = 256 * 1024
+PDF_BYTES = 10 * 1024 * 1024
+IMAGE_BYTES = 2 * 1024 * 1024
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+SWEEP_BATCH = 500
+MAX_REDIRECTS = 5
+USER_AGENT = "HealthBridge link checker"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS link_metadata (
+    link_key TEXT PRIMARY KEY,
+    link TEXT NOT NULL,
+    status TEXT NOT NULL,
+    http_status INTEGER,
+    final_url TEXT,
+    content_type TEXT,
+    title TEXT,
+    thumbnail TEXT,
+    page_count INTEGER,
+    error TEXT,
+    attempts INTEGER NOT NULL,
+    checked_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+COLUMNS = ("link_key", "link", "status", "http_status", "final_url", "content_type", "title",
+           "thumbnail", "page_count", "error", "attempts", "checked_at")
+
+
+class MetadataStore:
+    # status is "ok" (2xx), "broken" (an HTTP error) or "unreachable"
+    # (no response after every retry)
+    def __init__(self, path):
+        self.path = str(path)
+        self.db = Database(self.path)
+        self._write_lock = threading.Lock()
+        with self.db.transaction() as conn:
+            conn.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def put(self, record):
+        with self._write_lock, self.db.transaction() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO link_metadata ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                [record.get(column) for column in COLUMNS],
+            )
+
+    def get_many(self, link_keys):
+        # {link_key: record} for the keys that have been checked
+        link_keys = list(link_keys)
+        if not link_keys:
+            return {}
+        rows = self.db.query(
+            f"SELECT * FROM link_metadata WHERE link_key IN ({', '.join('?' * len(link_keys))})", link_keys
+        )
+        return {row["link_key"]: dict(row) for row in rows}
+
+    def stale(self, link_keys, now=None):
+        # The keys with no result yet or one that has expired
+        link_keys = list(link_keys)
+        now = now or time.time()
+        records = self.get_many(link_keys)
+        return [key for key in link_keys if key not in records or not is_fresh(records[key], now)]
+
+
+def is_fresh(record, now=None):
+    ttl = OK_TTL if record["status"] == "ok" else FAILED_TTL
+    return (now or time.time()) - record["checked_at"] < ttl
+
+
+# --- parsing ---
+
+class _PreviewParser(HTMLParser):
+    # <title> and the Open Graph / Twitter card tags of a page
+    TAGS = ("og:title", "twitter:title", "og:image", "twitter:image")
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.meta = {}
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "title":
+            self._in_title = True
+        elif tag == "meta":
+            name = (attrs.get("property") or attrs.get("name") or "").lower()
+            if name in self.TAGS and attrs.get("content"):
+                self.meta.setdefault(name, attrs["content"].strip())
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+
+
+def parse_html(body, base_url, encoding="utf-8"):
+    # (title, absolute thumbnail URL); either may be None
+    parser = _PreviewParser()
+    parser.feed(body.decode(encoding or "utf-8", errors="replace"))
+    title = parser.meta.get("og:title") or parser.meta.get("twitter:title") or parser.title
+    title = " ".join(title.split()) or None
+    image = parser.meta.get("og:image") or parser.meta.get("twitter:image")
+    return title, urljoin(base_url, image) if image else None
+
+
+_PAGES = re.compile(rb"/Type\s*/Pages\b")
+_COUNT = re.compile(rb"/Count\s+(\d+)")
+_PAGE = re.compile(rb"/Type\s*/Page\b(?!s)")
+_STREAM = re.compile(rb"stream\r?\n(.*?)\r?\nendstream", re.S)
+
+
+def pdf_page_count(data):
+    # The /Count of the root page tree (the largest one), looked for in the
+    # file and then inside compressed object streams; failing that, the
+    # number of /Page objects. None if neither is found.
+    for chunk in itertools.chain([data], _inflated_streams(data)):
+        counts = []
+        for match in _PAGES.finditer(chunk):
+            window = chunk[max(match.start() - 512, 0):match.end() + 512]
+            counts.extend(int(count) for count in _COUNT.findall(window))
+        if counts:
+            return max(counts)
+    pages = len(_PAGE.findall(data))
+    return pages or None
+
+
+def _inflated_streams(data):
+    for match in _STREAM.finditer(data):
+        try:
+            yield zlib.decompress(match.group(1))
+        except zlib.error:
+            continue
+
+
+# --- fetching ---
+
+class BlockedHost(Exception):
+    # The link points at an address the server must not fetch from
+    pass
+
+
+def is_public_address(address):
+    address = ipaddress.ip_address(address.split("%")[0])
+    if address.version == 6 and address.ipv4_mapped:
+        address = address.ipv4_mapped
+    return address.is_global and not address.is_multicast
+
+
+class PinnedTransport:
+    # httpx transport that connects to the address in the request's
+    # "pinned_address" extension instead of resolving the URL's host, so a
+    # DNS answer that changes after the check (rebinding) is never used. The
+    # Host header, TLS server name and certificate check stay those of the URL.
+    def __init__(self, **kwargs):
+        self._transport = httpx.AsyncHTTPTransport(**kwargs)
+
+    async def handle_async_request(self, request):
+        extensions = dict(request.extensions)
+        address = extensions.pop("pinned_address", None)
+        if address is not None:
+            extensions["sni_hostname"] = request.url.host
+            request = httpx.Request(request.method, request.url.copy_with(host=address), headers=request.headers,
+                                    stream=request.stream, extensions=extensions)
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+    async def __aenter__(self):
+        await self._transport.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._transport.__aexit__(*exc_info)
+
+
+class LinkChecker:
+    def __init__(self, cache, thumbnail_dir, pipeline=None, workers=4, max_queue=1000, timeout=10.0,
+                 retries=3, backoff=1.0, host_interval=1.0, allowed_hosts=()):
+        self.cache = cache
+        self.thumbnail_dir = Path(thumbnail_dir)
+        self.pipeline = pipeline
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.retries = max(retries, 1)
+        self.backoff = backoff
+        self.host_interval = host_interval
+        # Hosts fetched even though they resolve to a non-public address
+        self.allowed_hosts = frozenset(host.lower() for host in allowed_hosts)
+        self._lock = threading.Lock()
+        self._queued = set()
+        self._order = itertools.count()
+        self._started = threading.Event()
+        self._loop = None
+        self._queue = None
+        self._stopping = None
+        self._host_locks = {}
+        self._thumbnails = {}
+        self._host_next = {}
+        self.fetched = 0
+        self.retried = 0
+        self.dropped = 0
+
+    # --- lifecycle ---
+
+    def start(self):
+        thread = threading.Thread(target=self._run, name="link-checker", daemon=True)
+        thread.start()
+        self._started.wait()
+        atexit.register(self.close)
+        return self
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.PriorityQueue()
+        self._stopping = self._loop.create_future()
+        self._started.set()
+        self._loop.run_until_complete(self._main())
+        self._loop.close()
+
+    async def _main(self):
+        headers = {"User-Agent": USER_AGENT}
+        async with httpx.AsyncClient(timeout=self.timeout, headers=headers, transport=PinnedTransport()) as client:
+            tasks = [asyncio.create_task(self._worker(client)) for _ in range(self.workers)]
+            await self._stopping
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def close(self):
+        # Stops the workers; links still queued are checked after the next start
+        if not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(lambda: self._stopping.done() or self._stopping.set_result(None))
+
+    # --- queueing ---
+
+    def submit(self, link, priority=0):
+        # Queues a link from any thread; False if it is not a web link or the
+        # queue is full. A link already queued is not queued twice.
+        key = normalize_link(link)
+        if key is None:
+            return False
+        with self._lock:
+            if key in self._queued:
+                return True
+            if len(self._queued) >= self.max_queue:
+                self.dropped += 1
+                return False
+            self._queued.add(key)
+        item = (priority, next(self._order), key, link)
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+        return True
+
+    def sweep(self, links):
+        # Queues the (link_key, link) pairs whose cached result is missing or
+        # expired, behind any submissions. Runs on the event loop and feeds
+        # the queue gradually, leaving half of it free for submissions.
+        asyncio.run_coroutine_threadsafe(self._sweep(list(links)), self._loop)
+
+    async def _sweep(self, links):
+        for start in range(0, len(links), SWEEP_BATCH):
+            batch = links[start:start + SWEEP_BATCH]
+            stale = set(await asyncio.to_thread(self.cache.stale, [key for key, _ in batch]))
+            for key, link in batch:
+                if key in stale:
+                    while self.pending() >= self.max_queue // 2:
+                        await asyncio.sleep(0.5)
+                    self.submit(link, priority=1)
+
+    def pending(self):
+        with self._lock:
+            return len(self._queued)
+
+    def wait_idle(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.pending():
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def stats(self):
+        return {"pending": self.pending(), "fetched": self.fetched, "retried": self.retried, "dropped": self.dropped}
+
+    # --- workers ---
+
+    async def _worker(self, client):
+        while True:
+            _, _, key, link = await self._queue.get()
+            try:
+                # SQLite calls run on a thread, off the event loop
+                cached = (await asyncio.to_thread(self.cache.get_many, [key])).get(key)
+                if cached is None or not is_fresh(cached):
+                    await asyncio.to_thread(self.cache.put, await self._check(client, key, link))
+            except Exception as e:
+                await asyncio.to_thread(self.cache.put, {
+                    "link_key": key, "link": link, "status": "unreachable", "error": str(e),
+                    "attempts": 0, "checked_at": time.time()})
+            finally:
+                with self._lock:
+                    self._queued.discard(key)
+
+    async def _check(self, client, key, link):
+        url = link.strip() if "://" in link else "https://" + link.strip()
+        record = {"link_key": key, "link": link, "status": "unreachable", "attempts": 0}
+        response, body = await self._fetch(client, url, record)
+        if response is not None:
+            content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+            record.update(status="ok" if response.is_success else "broken", http_status=response.status_code,
+                          final_url=str(response.url), content_type=content_type)
+            if response.is_success and content_type in ("text/html", "application/xhtml+xml"):
+                title, image = parse_html(body, str(response.url), response.encoding)
+                record["title"] = title
+                if image:
+                    record["thumbnail"] = await self._thumbnail(client, image)
+            elif response.is_success and (content_type == "application/pdf" or url.lower().endswith(".pdf")):
+                record["page_count"] = pdf_page_count(body)
+        record["checked_at"] = time.time()
+        return record
+
+    async def _fetch(self, client, url, record, limit=None):
+        # (response, first bytes of the body); response is None when the host
+        # never answered. Rate-limit waits and retries happen here.
+        for attempt in range(1, self.retries + 1):
+            record["attempts"] += 1
+            try:
+                response, body = await self._get(client, url, limit)
+            except BlockedHost as e:
+                # Not retried: the answer will not change
+                record["error"] = str(e)
+                return None, b""
+            except httpx.HTTPError as e:
+                record["error"] = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+                response = None
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                record.pop("error", None)
+                return response, body
+            if attempt == self.retries:
+                return response, b"" if response is None else body
+            self.retried += 1
+            await asyncio.sleep(self._retry_delay(response, attempt))
+
+    async def _get(self, client, url, limit):
+        # Redirects are followed here rather than by httpx, so every hop is
+        # checked for a public address and waits its turn for its host
+        for _ in range(MAX_REDIRECTS + 1):
+            address = await self._check_address(url)
+            await self._wait_for_host(url)
+            async with client.stream("GET", url, extensions={"pinned_address": address}) as response:
+                self.fetched += 1
+                if not response.is_redirect:
+                    return response, await self._read(response, limit)
+                url = str(response.url.join(response.headers["location"]))
+        raise httpx.TooManyRedirects(f"more than {MAX_REDIRECTS} redirects", request=response.request)
+
+    async def _check_address(self, url):
+        # Every address the host resolves to must be public, unless the host
+        # is allowed by configuration. Returns the address to connect to
+        # (None for an allowed host, which is resolved as usual).
+        parts = urlsplit(url)
+        host = (parts.hostname or "").lower()
+        if parts.scheme.lower() not in ("http", "https") or not host:
+            raise BlockedHost(f"refused: {url} is not a web link")
+        if host in self.allowed_hosts:
+            return None
+        port = parts.port or (443 if parts.scheme.lower() == "https" else 80)
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise httpx.ConnectError(f"cannot resolve {host}: {e}") from e
+        addresses = [sockaddr[0].split("%")[0] for *_, sockaddr in infos]
+        for address in addresses:
+            if not is_public_address(address):
+                raise BlockedHost(f"refused: {host} resolves to a non-public address ({address})")
+        return addresses[0]
+
+    async def _read(self, response, limit):
+        if limit is None:
+            content_type = response.headers.get("content-type", "").lower()
+            limit = PDF_BYTES if "pdf" in content_type or str(response.url).lower().endswith(".pdf") else HTML_BYTES
+        body = bytearray()
+        async for chunk in response.aiter_bytes():
+            body += chunk
+            if len(body) >= limit:
+                break
+        return bytes(body[:limit])
+
+    def _retry_delay(self, response, attempt):
+        # Retry-After (in seconds) when the server sends one, else exponential backoff
+        if response is not None:
+            try:
+                return min(float(response.headers.get("retry-after", "")), 60.0)
+            except ValueError:
+                pass
+        return self.backoff * 2 ** (attempt - 1)
+
+    async def _wait_for_host(self, url):
+        # At most one request per host_interval to any one host
+        host = urlsplit(url).netloc.lower()
+        lock = self._host_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            delay = self._host_next.get(host, 0) - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._host_next[host] = time.monotonic() + self.host_interval
+
+    async def _thumbnail(self, client, url):
+        # Pages sharing an image (a site-wide logo) download it once
+        task = self._thumbnails.get(url)
+        if task is None:
+            task = self._thumbnails[url] = asyncio.ensure_future(self._download_thumbnail(client, url))
+            task.add_done_callback(lambda _: self._thumbnails.pop(url, None))
+        return await asyncio.shield(task)
+
+    async def _download_thumbnail(self, client, url):
+        # Downloaded once and turned into a local WebP variant, so the Hub
+        # serves it like any other asset; None if it is not a usable image
+        path = self.thumbnail_dir / hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+        if path.exists():
+            return str(path)
+        response, body = await self._fetch(client, url, {"attempts": 0}, limit=IMAGE_BYTES)
+        if response is None or not response.is_success or not response.headers.get("content-type", "").startswith("image/"):
+            return None
+        self.thumbnail_dir.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix(f".{next(self._order)}.tmp")
+        temporary.write_bytes(body)
+        os.replace(temporary, path)
+        if self.pipeline is not None:
+            try:
+                await asyncio.to_thread(self.pipeline.image, path, THUMBNAIL_WIDTH)
+            except Exception:
+                path.unlink(missing_ok=True)
+                return None
+        return str(path)
+
+
+@st.cache_resource(on_release=MetadataStore.close)
+def get_link_metadata():
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    return MetadataStore(DATA_DIR / "link_metadata.db")
+
+
+@st.cache_resource
+def get_link_checker():
+    checker = LinkChecker(
+        get_link_metadata(),
+        DATA_DIR / "thumbnails",
+        pipeline=get_asset_pipeline(),
+        workers=config.LINK_WORKERS,
+        timeout=config.LINK_TIMEOUT,
+        retries=config.LINK_RETRIES,
+        host_interval=config.LINK_HOST_INTERVAL,
+        allowed_hosts=config.LINK_ALLOWED_HOSTS,
+    ).start()
+    # Catalog resources not checked yet (or checked too long ago) go behind submissions
+    checker.sweep(get_resource_store().links())
+    return checker
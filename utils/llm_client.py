@@ -0,0 +1,163 @@
+# utils/llm_client.py
+# One Ollama client per server process. Generations are admitted in strict
+# arrival order with a bounded number running at once, so a burst of users
+# queues up instead of all slowing each other down on the same model.
+import itertools
+import threading
+import time
+from collections import deque
+
+import streamlit as st
+
+from utils import config
+from utils.lazy_imports import ollama
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class QueueTimeoutError(Exception):
+    pass
+
+
+class PooledChatClient:
+    def __init__(self, client_factory, max_concurrent=2, max_queue=32, queue_timeout=90.0, poll_interval=0.25,
+                 keep_alive=None):
+        # The underlying client is made on the first request, so pages that
+        # only show the queue (or the model status) never import its library
+        self._client_factory = client_factory
+        self._client = None
+        self.keep_alive = keep_alive
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.poll_interval = poll_interval
+        self._cond = threading.Condition()
+        # Guards only the client's creation, which imports its library: the
+        # queue lock stays free meanwhile, so admissions are not held up
+        self._client_lock = threading.Lock()
+        self._waiting = deque()
+        self._active = 0
+        self._tickets = itertools.count(1)
+        self.rejected = 0
+        self.timed_out = 0
+
+    @property
+    def client(self):
+        client = self._client
+        if client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._client_factory()
+                client = self._client
+        return client
+
+    # --- admission ---
+
+    def _enqueue(self):
+        with self._cond:
+            if len(self._waiting) >= self.max_queue:
+                self.rejected += 1
+                raise QueueFullError(f"{len(self._waiting)} requests already waiting")
+            ticket = next(self._tickets)
+            self._waiting.append(ticket)
+            return ticket
+
+    def _wait_turn(self, ticket, on_queued=None):
+        # Blocks until the ticket is at the head of the queue and a slot is free.
+        # on_queued(position) is called whenever the 1-based position changes.
+        deadline = time.monotonic() + self.queue_timeout
+        last_position = None
+        with self._cond:
+            try:
+                while True:
+                    if self._waiting[0] == ticket and self._active < self.max_concurrent:
+                        self._waiting.popleft()
+                        self._active += 1
+                        self._cond.notify_all()
+                        return
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timed_out += 1
+                        raise QueueTimeoutError(f"waited {self.queue_timeout:.0f}s for a free slot")
+                    position = self._waiting.index(ticket) + 1
+                    if on_queued is not None and position != last_position:
+                        last_position = position
+                        # Call outside the lock so a slow UI update cannot stall the queue
+                        self._cond.release()
+                        try:
+                            on_queued(position)
+                        finally:
+                            self._cond.acquire()
+                        continue
+                    self._cond.wait(min(self.poll_interval, remaining))
+            except BaseException:
+                # Timed out, or the caller went away (streamlit stops or reruns a
+                # script by raising inside it, e.g. from on_queued): give up the
+                # place in line so the requests behind it are not stuck
+                self._waiting.remove(ticket)
+                self._cond.notify_all()
+                raise
+
+    def _release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "active": self._active,
+                "waiting": len(self._waiting),
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+            }
+
+    # --- requests ---
+
+    def chat(self, model, messages, on_queued=None, on_admitted=None, **kwargs):
+        ticket = self._enqueue()
+        self._wait_turn(ticket, on_queued)
+        kwargs.setdefault("keep_alive", self.keep_alive)
+        try:
+            if on_admitted is not None:
+                on_admitted()
+            return self.client.chat(model=model, messages=messages, **kwargs)
+        finally:
+            self._release()
+
+    def stream_chat(self, model, messages, on_queued=None, on_admitted=None, **kwargs):
+        # Generator of response chunks; the slot is held until the stream is
+        # exhausted or the consumer closes the generator.
+        ticket = self._enqueue()
+        self._wait_turn(ticket, on_queued)
+        kwargs.setdefault("keep_alive", self.keep_alive)
+        try:
+            if on_admitted is not None:
+                on_admitted()
+            for chunk in self.client.chat(model=model, messages=messages, stream=True, **kwargs):
+                yield chunk
+        finally:
+            self._release()
+
+
+def _parse_keep_alive(value):
+    # Ollama takes either a number of seconds or a duration string such as "30m"
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+@st.cache_resource
+def get_llm_client():
+    return PooledChatClient(
+        lambda: ollama.Client(host=config.OLLAMA_HOST, timeout=config.LLM_REQUEST_TIMEOUT),
+        max_concurrent=config.LLM_MAX_CONCURRENT,
+        max_queue=config.LLM_MAX_QUEUE,
+        queue_timeout=config.LLM_QUEUE_TIMEOUT,
+        keep_alive=_parse_keep_alive(config.LLM_KEEP_ALIVE),
+    )
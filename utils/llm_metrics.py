@@ -0,0 +1,128 @@
+# utils/llm_metrics.py
+# Timing for each assistant reply (queue wait, time to first token, gaps
+# between tokens, throughput) and a process-wide ring buffer of the results.
+import csv
+import io
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import streamlit as st
+
+FIELDS = [
+    "timestamp", "model", "source", "prompt_tokens", "queue_wait_ms", "ttft_ms",
+    "itl_p50_ms", "itl_p95_ms", "itl_p99_ms", "total_ms", "tokens", "tokens_per_sec",
+    "load_ms", "prompt_eval_ms", "eval_ms", "status",
+]
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = (len(sorted_values) - 1) * q / 100
+    lower = int(index)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (index - lower)
+
+
+def _ns_to_ms(value):
+    return round(value / 1e6, 1) if value else None
+
+
+def _round(value):
+    return round(value, 1) if value is not None else None
+
+
+class StreamTimer:
+    # Started when the request is made; admitted() when the queue lets it
+    # through, token() for every streamed chunk, finish() once at the end.
+    def __init__(self, model, prompt_tokens=None, clock=time.perf_counter):
+        self.model = model
+        self.prompt_tokens = prompt_tokens
+        self._clock = clock
+        self.started = clock()
+        self.admitted_at = None
+        self.token_times = []
+        self.server_stats = {}
+
+    def admitted(self):
+        self.admitted_at = self._clock()
+
+    def token(self, chunk=None):
+        self.token_times.append(self._clock())
+        if chunk is not None and chunk.get("done"):
+            # Ollama reports its own durations (in ns) on the final chunk
+            for key in ("eval_count", "load_duration", "prompt_eval_count", "prompt_eval_duration", "eval_duration"):
+                if chunk.get(key) is not None:
+                    self.server_stats[key] = chunk.get(key)
+
+    def finish(self, source="model", status="ok"):
+        ended = self._clock()
+        admitted = self.admitted_at if self.admitted_at is not None else self.started
+        first = self.token_times[0] if self.token_times else None
+        gaps = sorted((b - a) * 1000 for a, b in zip(self.token_times, self.token_times[1:]))
+        tokens = self.server_stats.get("eval_count") or len(self.token_times)
+        decode_seconds = (ended - first) if first is not None else 0
+        prompt_tokens = self.server_stats.get("prompt_eval_count") or self.prompt_tokens
+        return {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "model": self.model,
+            "source": source,
+            "prompt_tokens": prompt_tokens,
+            "queue_wait_ms": round((admitted - self.started) * 1000, 1),
+            "ttft_ms": round((first - admitted) * 1000, 1) if first is not None else None,
+            "itl_p50_ms": _round(percentile(gaps, 50)),
+            "itl_p95_ms": _round(percentile(gaps, 95)),
+            "itl_p99_ms": _round(percentile(gaps, 99)),
+            "total_ms": round((ended - self.started) * 1000, 1),
+            "tokens": tokens,
+            "tokens_per_sec": round(tokens / decode_seconds, 1) if decode_seconds > 0 else None,
+            "load_ms": _ns_to_ms(self.server_stats.get("load_duration")),
+            "prompt_eval_ms": _ns_to_ms(self.server_stats.get("prompt_eval_duration")),
+            "eval_ms": _ns_to_ms(self.server_stats.get("eval_duration")),
+            "status": status,
+        }
+
+
+class MetricsRing:
+    def __init__(self, capacity=5000):
+        self._records = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def record(self, row):
+        with self._lock:
+            self._records.append(row)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._records)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def to_csv(self):
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(self.snapshot())
+        return buffer.getvalue()
+
+    def summary(self):
+        rows = [row for row in self.snapshot() if row["source"] == "model" and row["status"] == "ok"]
+        ttft = sorted(row["ttft_ms"] for row in rows if row["ttft_ms"] is not None)
+        wait = sorted(row["queue_wait_ms"] for row in rows)
+        rates = [row["tokens_per_sec"] for row in rows if row["tokens_per_sec"]]
+        return {
+            "requests": len(rows),
+            "ttft_p50_ms": _round(percentile(ttft, 50)),
+            "ttft_p95_ms": _round(percentile(ttft, 95)),
+            "queue_wait_p95_ms": _round(percentile(wait, 95)),
+            "mean_tokens_per_sec": round(sum(rates) / len(rates), 1) if rates else None,
+        }
+
+
+@st.cache_resource
+def get_metrics():
+    return MetricsRing()
@@ -0,0 +1,263 @@
+# utils/resource_store.py
+# SQLite (WAL) catalog of educational resources shared by every session.
+# A resource is identified by its normalized link, so the same article
+# submitted twice (different scheme, "www.", tracking parameters, ...) is
+# stored once. Type, author and tag each have an index ordered like the
+# listing itself, so a filtered page is one index range scan with the same
+# keyset cursor as the unfiltered one, however large the catalog grows.
+import re
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import streamlit as st
+
+from utils.config import DATA_DIR
+from utils.db import Database
+from utils.seed_data import RESOURCES
+
+PAGE_SIZE = 10
+RESOURCE_TYPES = ["Article", "Video", "PDF", "Website", "Other"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resources (
+    pk INTEGER PRIMARY KEY,
+    link_key TEXT NOT NULL UNIQUE,
+    link TEXT NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    type TEXT NOT NULL,
+    posted_by TEXT NOT NULL,
+    author_key TEXT NOT NULL,
+    src TEXT NOT NULL DEFAULT '',
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_resources_created ON resources (created_at DESC, pk DESC);
+CREATE INDEX IF NOT EXISTS idx_resources_type ON resources (type, created_at DESC, pk DESC);
+CREATE INDEX IF NOT EXISTS idx_resources_author ON resources (author_key, created_at DESC, pk DESC);
+CREATE TABLE IF NOT EXISTS resource_tags (
+    tag TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    resource_pk INTEGER NOT NULL REFERENCES resources (pk),
+    PRIMARY KEY (tag, created_at, resource_pk)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_resource_tags_resource ON resource_tags (resource_pk);
+"""
+
+# Query parameters that only track where a click came from
+_TRACKING = re.compile(r"^(utm_\w+|fbclid|gclid|mc_cid|mc_eid)$")
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_SPACES = re.compile(r"\s+")
+_HOST = re.compile(r"^[a-z0-9-]+(\.[a-z0-9-]+)+$")
+
+
+def normalize_link(link):
+    # Key under which a link is deduplicated: no scheme, lower-case host
+    # without "www." or a default port, no fragment or tracking parameters,
+    # remaining parameters sorted, no trailing slash. YouTube share links
+    # (youtu.be/ID) map to the watch URL. None if it is not a web link.
+    link = (link or "").strip()
+    if not link:
+        return None
+    if "://" not in link:
+        link = "https://" + link
+    parts = urlsplit(link)
+    if parts.scheme.lower() not in _DEFAULT_PORTS or not parts.hostname:
+        return None
+    host = parts.hostname.lower().removeprefix("www.")
+    if not _HOST.match(host):
+        return None
+    try:
+        port = parts.port
+    except ValueError:
+        return None
+    if port and port != _DEFAULT_PORTS[parts.scheme.lower()]:
+        host = f"{host}:{port}"
+    path = parts.path.rstrip("/")
+    params = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+              if not _TRACKING.match(key.lower())]
+    if host == "m.youtube.com":
+        host = "youtube.com"
+    if host == "youtu.be" and path:
+        host, path, params = "youtube.com", "/watch", [("v", path.lstrip("/"))] + params
+    if host == "youtube.com" and path == "/watch":
+        params = [(key, value) for key, value in params if key == "v"]
+    query = urlencode(sorted(params))
+    return host + path + (f"?{query}" if query else "")
+
+
+def absolute_link(link):
+    # The link as stored and shown: what was entered, with https:// added
+    # when there is no scheme so it never renders as a link into the app
+    link = (link or "").strip()
+    if normalize_link(link) is None:
+        return None
+    if "://" not in link:
+        return "https://" + link
+    scheme, rest = link.split("://", 1)
+    return f"{scheme.lower()}://{rest}"
+
+
+def normalize_tags(tags):
+    # "Heart, blood  pressure,heart" -> ["heart", "blood pressure"]
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    seen = []
+    for tag in tags or []:
+        tag = _SPACES.sub(" ", tag).strip().lower()
+        if tag and tag not in seen:
+            seen.append(tag)
+    return seen
+
+
+def author_key(name):
+    return _SPACES.sub(" ", name or "").strip().lower()
+
+
+class ResourceStore:
+    def __init__(self, path, seed_resources=RESOURCES):
+        self.path = str(path)
+        self.db = Database(self.path)
+        self._write_lock = threading.Lock()
+        # Filter options (types, authors, tags), rebuilt after the next write
+        self._facets = {}
+        with self.db.transaction() as conn:
+            conn.executescript(SCHEMA)
+            # Links stored before absolute_link() existed may lack a scheme
+            conn.execute("UPDATE resources SET link = 'https://' || link WHERE link NOT LIKE '%://%'")
+        if seed_resources and self.count() == 0:
+            now = time.time()
+            # Listed newest first, like the page shows them
+            for position, resource in enumerate(seed_resources):
+                self.add(resource, created_at=now - position * 1e-3)
+
+    def close(self):
+        self.db.close()
+
+    # --- writes ---
+
+    def add(self, resource, created_at=None):
+        # (resource, created). A link already in the catalog is not added
+        # again; the resource returned is then the one stored first.
+        link_key = normalize_link(resource["link"])
+        if link_key is None:
+            raise ValueError(f"Not a web link: {resource['link']!r}")
+        created_at = time.time() if created_at is None else created_at
+        with self._write_lock, self.db.transaction() as conn:
+            inserted = conn.execute(
+                "INSERT INTO resources (link_key, link, title, description, type, posted_by, author_key, src, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (link_key) DO NOTHING",
+                (link_key, absolute_link(resource["link"]), resource["title"].strip(), resource.get("description", "").strip(),
+                 resource["type"], resource["posted_by"].strip(), author_key(resource["posted_by"]),
+                 resource.get("src", ""), created_at),
+            )
+            created = inserted.rowcount == 1
+            if created:
+                conn.executemany(
+                    "INSERT INTO resource_tags (tag, created_at, resource_pk) VALUES (?, ?, ?)",
+                    [(tag, created_at, inserted.lastrowid) for tag in normalize_tags(resource.get("tags"))],
+                )
+                self._facets = {}
+        return self.get(link_key), created
+
+    # --- reads ---
+
+    def count(self, type=None, author=None, tag=None):
+        sql, params = self._filtered("COUNT(*)", type, author, tag)
+        return self.db.query_one(sql, params)[0]
+
+    def get(self, link_key):
+        row = self.db.query_one("SELECT * FROM resources WHERE link_key = ?", (link_key,))
+        return self._with_tags([row])[0] if row else None
+
+    def find(self, link):
+        # The stored resource for a link, in any of its spellings
+        link_key = normalize_link(link)
+        return self.get(link_key) if link_key else None
+
+    def page(self, type=None, author=None, tag=None, after=None, limit=PAGE_SIZE):
+        # (resources, cursor for the next page or None), newest first. The
+        # cursor is (created_at, pk) of the last resource shown.
+        sql, params = self._filtered("r.*", type, author, tag)
+        created, pk = ("t.created_at", "t.resource_pk") if tag else ("r.created_at", "r.pk")
+        if after is not None:
+            sql += f" AND ({created}, {pk}) < (?, ?)"
+            params.extend(after)
+        sql += f" ORDER BY {created} DESC, {pk} DESC LIMIT ?"
+        rows = self.db.query(sql, (*params, limit + 1))
+        more = len(rows) > limit
+        rows = rows[:limit]
+        cursor = (rows[-1]["created_at"], rows[-1]["pk"]) if more else None
+        return self._with_tags(rows), cursor
+
+    def _filtered(self, select, type, author, tag):
+        # A tag filter reads the tag index and joins each row back; type and
+        # author filters use their own (type/author, created_at, pk) index
+        if tag:
+            sql = f"SELECT {select} FROM resource_tags t JOIN resources r ON r.pk = t.resource_pk WHERE t.tag = ?"
+            params = [tag]
+        else:
+            sql, params = f"SELECT {select} FROM resources r WHERE 1", []
+        if type:
+            sql += " AND r.type = ?"
+            params.append(type)
+        if author:
+            sql += " AND r.author_key = ?"
+            params.append(author_key(author))
+        return sql, params
+
+    def links(self):
+        # (link_key, link) for every resource, newest first
+        return [tuple(row) for row in self.db.query(
+            "SELECT link_key, link FROM resources ORDER BY created_at DESC, pk DESC")]
+
+    def types(self):
+        return self._facet("types", "SELECT DISTINCT type FROM resources ORDER BY type")
+
+    def authors(self):
+        # One display name per author (the first one stored)
+        return self._facet("authors", "SELECT posted_by FROM resources r WHERE pk = "
+                                      "(SELECT MIN(pk) FROM resources WHERE author_key = r.author_key) ORDER BY author_key")
+
+    def tags(self):
+        # Most used tags first
+        return self._facet("tags", "SELECT tag FROM resource_tags GROUP BY tag ORDER BY COUNT(*) DESC, tag")
+
+    def _facet(self, name, sql):
+        facets = self._facets
+        if name not in facets:
+            facets[name] = [row[0] for row in self.db.query(sql)]
+        return facets[name]
+
+    def _with_tags(self, rows):
+        # Tags for the whole page in one query
+        resources = {row["pk"]: _resource(row) for row in rows}
+        if resources:
+            tags = self.db.query(
+                f"SELECT resource_pk, tag FROM resource_tags "
+                f"WHERE resource_pk IN ({', '.join('?' * len(resources))}) ORDER BY resource_pk, tag",
+                list(resources),
+            )
+            for row in tags:
+                resources[row["resource_pk"]]["tags"].append(row["tag"])
+        return list(resources.values())
+
+
+def _resource(row):
+    return {
+        "title": row["title"],
+        "description": row["description"],
+        "type": row["type"],
+        "link": row["link"],
+        "link_key": row["link_key"],
+        "posted_by": row["posted_by"],
+        "src": row["src"],
+        "created_at": row["created_at"],
+        "tags": [],
+    }
+
+
+@st.cache_resource(on_release=ResourceStore.close)
+def get_resource_store():
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    return ResourceStore(DATA_DIR / "resources.db")
@@ -0,0 +1,79 @@
+# utils/response_cache.py
+# Process-wide cache for finished assistant replies, keyed on the model and
+# a normalized copy of the conversation that was sent to it.
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+_WHITESPACE = re.compile(r"\s+")
+_TOKEN = re.compile(r"\S+\s*|\s+")
+
+
+def normalize_text(text):
+    return _WHITESPACE.sub(" ", str(text)).strip().lower()
+
+
+def make_key(model, messages):
+    normalized = [[msg.get("role", ""), normalize_text(msg.get("content", ""))] for msg in messages]
+    payload = json.dumps([model, normalized], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def replay_stream(text):
+    # Split a cached reply back into word-sized chunks so write_stream renders
+    # it the same way as a live response.
+    for match in _TOKEN.finditer(text):
+        yield match.group(0)
+
+
+class ResponseCache:
+    def __init__(self, max_entries=256, ttl_seconds=3600, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, text = entry
+                if self._clock() - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return text
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, text):
+        if not text:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock(), text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
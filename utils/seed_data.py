@@ -0,0 +1,120 @@
+# utils/seed_data.py
+# Hard-coded sample content shared by the Forum and Educational Resources pages
+# (and indexed by the assistant's knowledge base).
+
+SEED_POSTS = [
+    {
+        "id": "seed-post-1",
+        "user": "Alice",
+        "avatar": "",
+        "time": "2 hours ago",
+        "content": "Has anyone experienced joint pain along with fever? I'm really worried it might be something serious.",
+        "likes": 12,
+        "comments": [
+            {"user": "Bob", "avatar": "", "text": "That sounds like it could be an autoimmune issue. Have you seen a doctor?"},
+            {"user": "Charlie", "avatar": "", "text": "Could be the flu, but I'd get it checked out just in case."}
+        ]
+    },
+    {
+        "id": "seed-post-2",
+        "user": "Bob",
+        "avatar": "",
+        "time": "4 hours ago",
+        "content": "I've been feeling fatigued for weeks now. My doctor ran tests, but they couldn’t pinpoint the cause. Any advice?",
+        "likes": 8,
+        "comments": [
+            {"user": "Alice", "avatar": "", "text": "Fatigue can be linked to stress or even poor diet. Have you tried changing your routine?"},
+            {"user": "Charlie", "avatar": "", "text": "You might want to consider seeing a specialist or getting a second opinion."}
+        ]
+    },
+    {
+        "id": "seed-post-3",
+        "user": "Charlie",
+        "avatar": "",
+        "time": "1 day ago",
+        "content": "Has anyone dealt with persistent headaches? I’ve tried over-the-counter meds, but nothing seems to work.",
+        "likes": 5,
+        "comments": [
+            {"user": "Alice", "avatar": "", "text": "I had similar issues. I was prescribed a migraine medication, and it really helped."},
+            {"user": "Bob", "avatar": "", "text": "Have you tried keeping a headache journal? It could help identify triggers."}
+        ]
+    },
+    {
+        "id": "seed-post-4",
+        "user": "Alice",
+        "avatar": "",
+        "time": "3 days ago",
+        "content": "I’ve been struggling with anxiety lately. I know exercise is good, but I feel too overwhelmed to start.",
+        "likes": 15,
+        "comments": [
+            {"user": "Bob", "avatar": "", "text": "Starting small with a 10-minute walk could help ease the pressure. Baby steps!"},
+            {"user": "Charlie", "avatar": "", "text": "Yoga and mindfulness also helped me when I felt anxious."}
+        ]
+    },
+    {
+        "id": "seed-post-5",
+        "user": "Bob",
+        "avatar": "",
+        "time": "5 days ago",
+        "content": "Does anyone know how to manage asthma symptoms during cold weather? I’m really struggling this winter.",
+        "likes": 9,
+        "comments": [
+            {"user": "Alice", "avatar": "", "text": "Make sure to use your inhaler regularly and wear a scarf over your mouth to warm up the air."},
+            {"user": "Charlie", "avatar": "", "text": "You should also avoid cold, dry air as much as possible and stay indoors when you can."}
+        ]
+    },
+    {
+        "id": "seed-post-6",
+        "user": "Charlie",
+        "avatar": "",
+        "time": "1 week ago",
+        "content": "Has anyone been on a gluten-free diet for a while? How did you adjust to it and feel? I’ve been considering it.",
+        "likes": 7,
+        "comments": [
+            {"user": "Alice", "avatar": "", "text": "It took a while for me to get used to it, but my digestive issues improved."},
+            {"user": "Bob", "avatar": "", "text": "Gluten-free can be tough, but it definitely helps with inflammation if you’re sensitive."}
+        ]
+    },
+    {
+        "id": "seed-post-7",
+        "user": "Alice",
+        "avatar": "",
+        "time": "1 week ago",
+        "content": "I’ve been having trouble sleeping lately. Any tips for getting better sleep without relying on medication?",
+        "likes": 10,
+        "comments": [
+            {"user": "Bob", "avatar": "", "text": "Try limiting screen time before bed and establish a consistent routine. It helps a lot."},
+            {"user": "Charlie", "avatar": "", "text": "I also found drinking chamomile tea before bed really soothing."}
+        ]
+    }
+]
+
+RESOURCES = [
+    {
+        "title": "Understanding Hypertension",
+        "description": "A beginner-friendly guide to managing high blood pressure.",
+        "type": "Article",
+        "link": "https://www.heart.org/en/health-topics/high-blood-pressure",
+        "posted_by": "Dr. Smith",
+        "src": "assets/HighBloodPressure.png",
+        "tags": ["hypertension", "blood pressure", "heart"]
+    },
+    {
+        "title": "Diabetes & Nutrition",
+        "description": "Learn how to manage diabetes through diet and exercise.",
+        "type": "Video",
+        "link": "https://www.youtube.com/watch?v=wZAjVQWbMlE",
+        "posted_by": "Dr. Maria Tan",
+        "src": "assets/Diabetes.png",
+        "tags": ["diabetes", "nutrition", "exercise"]
+    },
+    {
+        "title": "Asthma Action Plan",
+        "description": "Download a printable asthma management plan.",
+        "type": "PDF",
+        "link": "https://www.cdc.gov/asthma/action-plan/documents/asthma-action-plan-508.pdf",
+        "posted_by": "Nurse Alex",
+        "src": "assets/Asthma.png",
+        "tags": ["asthma", "action plan", "breathing"]
+    }
+]
@@ -0,0 +1,21 @@
+# utils/transcript.py
+# Helpers for drawing only the tail of a long chat transcript.
+import html
+
+TRANSCRIPT_PAGE_SIZE = 20
+
+
+def user_bubble_html(content):
+    return f"""
+            <div style='display: flex; justify-content: flex-end;'>
+                <div style='background-color: #DCF8C6; padding: 8px 12px; border-radius: 10px; max-width: 70%; margin: 4px 0;'>
+                    {html.escape(content)}
+                </div>
+            </div>
+            """
+
+
+def first_visible(total, shown):
+    # Index of the first of `total` messages to draw when the newest `shown` are visible
+    return max(total - shown, 0)
+
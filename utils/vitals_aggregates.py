@@ -0,0 +1,222 @@
+# utils/vitals_aggregates.py
+# Per-patient rolling statistics kept up to date as readings arrive, so the
+# Dashboard's tiles and insights never rescan a patient's history. Each
+# window holds running sums for the mean and least-squares slope, and
+# monotonic deques for min/max, so adding a reading is O(1) amortised.
+import threading
+from collections import deque
+
+import streamlit as st
+
+from utils.lazy_imports import np, pd
+from utils.vitals_generator import VITAL_COLUMNS
+from utils.vitals_store import TIME_COLUMN
+
+# name: either {"size": n} for the last n readings or {"span": "30D"} for a time window
+DEFAULT_WINDOWS = {
+    "recent": {"size": 3},
+    "30d": {"span": "30D"},
+    "365d": {"span": "365D"},
+}
+BASELINE_SIZE = 3
+SECONDS_PER_DAY = 86400.0
+
+
+class RollingWindow:
+    def __init__(self, size=None, span=None):
+        self.size = size
+        self.span_s = pd.Timedelta(span).total_seconds() if span else None
+        self.items = deque()
+        self._min = deque()
+        self._max = deque()
+        self._origin = None
+        self.n = 0
+        self.sum_y = self.sum_t = self.sum_tt = self.sum_ty = 0.0
+
+    def add(self, t, y):
+        # t in epoch seconds; slope sums use days from the first reading seen
+        if self._origin is None:
+            self._origin = t
+        d = (t - self._origin) / SECONDS_PER_DAY
+        self.items.append((t, d, y))
+        self.n += 1
+        self.sum_y += y
+        self.sum_t += d
+        self.sum_tt += d * d
+        self.sum_ty += d * y
+        while self._min and self._min[-1][1] > y:
+            self._min.pop()
+        self._min.append((t, y))
+        while self._max and self._max[-1][1] < y:
+            self._max.pop()
+        self._max.append((t, y))
+        self._evict(t)
+
+    def load(self, ts, ys):
+        # Bulk-fills an empty window from time-sorted arrays in a few NumPy passes
+        ts = np.asarray(ts, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.float64)
+        if self.size is not None:
+            ts, ys = ts[-self.size:], ys[-self.size:]
+        if self.span_s is not None and len(ts):
+            keep = ts >= ts[-1] - self.span_s
+            ts, ys = ts[keep], ys[keep]
+        if not len(ts):
+            return
+        self._origin = int(ts[0])
+        ds = (ts - self._origin) / SECONDS_PER_DAY
+        self.items = deque(zip(ts.tolist(), ds.tolist(), ys.tolist()))
+        self.n = len(ts)
+        self.sum_y, self.sum_t = float(ys.sum()), float(ds.sum())
+        self.sum_tt, self.sum_ty = float((ds * ds).sum()), float((ds * ys).sum())
+        # A reading stays in the min (max) deque while nothing later is smaller (larger)
+        later_min = np.append(np.minimum.accumulate(ys[::-1])[::-1][1:], np.inf)
+        later_max = np.append(np.maximum.accumulate(ys[::-1])[::-1][1:], -np.inf)
+        self._min = deque(zip(ts[ys <= later_min].tolist(), ys[ys <= later_min].tolist()))
+        self._max = deque(zip(ts[ys >= later_max].tolist(), ys[ys >= later_max].tolist()))
+
+    def _evict(self, now):
+        while self.items and (
+            (self.size is not None and len(self.items) > self.size)
+            or (self.span_s is not None and now - self.items[0][0] > self.span_s)
+        ):
+            t, d, y = self.items.popleft()
+            self.n -= 1
+            self.sum_y -= y
+            self.sum_t -= d
+            self.sum_tt -= d * d
+            self.sum_ty -= d * y
+            if self._min and self._min[0][0] == t:
+                self._min.popleft()
+            if self._max and self._max[0][0] == t:
+                self._max.popleft()
+
+    def stats(self):
+        if not self.n:
+            return {"count": 0, "mean": None, "min": None, "max": None, "slope_per_day": None}
+        denominator = self.n * self.sum_tt - self.sum_t ** 2
+        slope = (self.n * self.sum_ty - self.sum_t * self.sum_y) / denominator if abs(denominator) > 1e-12 else 0.0
+        return {
+            "count": self.n,
+            "mean": self.sum_y / self.n,
+            "min": self._min[0][1],
+            "max": self._max[0][1],
+            "slope_per_day": slope,
+        }
+
+
+class PatientAggregates:
+    def __init__(self, windows):
+        self.baseline = {column: [] for column in VITAL_COLUMNS}
+        self.first = {}
+        self.last = {}
+        self.last_time = None
+        self.windows = {
+            name: {column: RollingWindow(**spec) for column in VITAL_COLUMNS}
+            for name, spec in windows.items()
+        }
+
+    def add(self, t, values):
+        if self.last_time is not None and t <= self.last_time:
+            # Late readings would break the running windows; they only affect stored
+            # history. Readings at last_time were already loaded by bootstrap.
+            return
+        for column, value in values.items():
+            if len(self.baseline[column]) < BASELINE_SIZE:
+                self.baseline[column].append(value)
+                self.first.setdefault(column, value)
+            self.last[column] = value
+            for window in self.windows.values():
+                window[column].add(t, value)
+        self.last_time = t
+
+    def load(self, frame):
+        # Seeds last values and windows from the tail of a patient's history
+        if not len(frame):
+            return
+        times = frame[TIME_COLUMN].to_numpy().astype("datetime64[s]").astype(np.int64)
+        for column in VITAL_COLUMNS:
+            values = frame[column].to_numpy(dtype=np.float64)
+            self.last[column] = float(values[-1])
+            for window in self.windows.values():
+                window[column].load(times, values)
+        self.last_time = int(times[-1])
+
+    def snapshot(self):
+        return {
+            "last_time": pd.Timestamp(self.last_time, unit="s") if self.last_time is not None else None,
+            "first": dict(self.first),
+            "last": dict(self.last),
+            "baseline_mean": {c: float(np.mean(v)) for c, v in self.baseline.items() if v},
+            "windows": {
+                name: {column: window.stats() for column, window in columns.items()}
+                for name, columns in self.windows.items()
+            },
+        }
+
+
+class VitalsAggregates:
+    def __init__(self, windows=None):
+        self.windows = windows or DEFAULT_WINDOWS
+        self._patients = {}
+        self._lock = threading.Lock()
+
+    def _longest_tail(self):
+        sizes = [spec["size"] for spec in self.windows.values() if "size" in spec]
+        spans = [pd.Timedelta(spec["span"]) for spec in self.windows.values() if "span" in spec]
+        return max(sizes, default=0), max(spans, default=pd.Timedelta(0))
+
+    def bootstrap(self, store, patient_id):
+        with self._lock:
+            return self._bootstrap(store, patient_id)
+
+    def _bootstrap(self, store, patient_id):
+        # Seeds a patient from the edges of its stored history only: the first
+        # few readings for the baseline and the longest window's tail. Runs
+        # under the lock, so on_write cannot deliver rows between the store
+        # read and registration; rows that reached the store before the read
+        # and are delivered after it are skipped as already seen.
+        aggregates = PatientAggregates(self.windows)
+        head = store.head(patient_id, BASELINE_SIZE)
+        tail_rows, tail_span = self._longest_tail()
+        bounds = store.time_bounds(patient_id)
+        if bounds is not None:
+            tail = store.read_frame(patient_id, start=bounds[1] - tail_span)
+            if len(tail) < tail_rows:
+                tail = store.tail(patient_id, tail_rows)
+            for column in VITAL_COLUMNS:
+                aggregates.baseline[column] = head[column].astype(float).tolist()
+                if len(head):
+                    aggregates.first[column] = float(head[column].iloc[0])
+            aggregates.load(tail)
+        self._patients[patient_id] = aggregates
+        return aggregates
+
+    def _add_rows(self, aggregates, frame):
+        times = frame[TIME_COLUMN].to_numpy().astype("datetime64[s]").astype(np.int64)
+        values = {column: frame[column].to_numpy(dtype=np.float64) for column in VITAL_COLUMNS}
+        for i, t in enumerate(times):
+            aggregates.add(int(t), {column: float(values[column][i]) for column in VITAL_COLUMNS})
+
+    def on_write(self, columns):
+        # Store listener: folds newly written readings into patients already tracked
+        frame = pd.DataFrame(columns)
+        with self._lock:
+            for patient_id, rows in frame.groupby("patient_id", sort=False):
+                aggregates = self._patients.get(int(patient_id))
+                if aggregates is not None:
+                    self._add_rows(aggregates, rows.sort_values(TIME_COLUMN))
+
+    def get(self, store, patient_id):
+        with self._lock:
+            aggregates = self._patients.get(patient_id)
+            if aggregates is None:
+                aggregates = self._bootstrap(store, patient_id)
+            return aggregates.snapshot()
+
+
+@st.cache_resource
+def get_vitals_aggregates(_store):
+    aggregates = VitalsAggregates()
+    _store.subscribe(aggregates.on_write)
+    return aggregates
@@ -0,0 +1,161 @@
+# utils/vitals_generator.py
+# Synthetic vital-sign readings for any number of patients, built as typed
+# column arrays with NumPy instead of one dict per reading. Output depends
+# only on the arguments (including the seed), so scaling runs are repeatable.
+from utils.lazy_imports import np, pd
+
+# column: (population mean, between-patient sd, within-patient sd, slow drift sd per step)
+VITAL_SPECS = {
+    "Systolic_BP": (130.0, 10.0, 15.0, 0.05),
+    "Diastolic_BP": (85.0, 6.0, 10.0, 0.03),
+    "Heart_Rate": (75.0, 6.0, 8.0, 0.03),
+    "Temperature": (98.6, 0.2, 0.5, 0.0),
+    "Weight": (78.0, 12.0, 2.0, 0.01),
+    "Blood_Sugar": (100.0, 12.0, 20.0, 0.05),
+}
+VITAL_COLUMNS = list(VITAL_SPECS)
+
+FIRST_NAMES = ["Ali", "Siti", "Wei Ming", "Priya", "Ahmad", "Mei Ling", "Ravi", "Nurul", "Jason", "Aisha"]
+BLOOD_TYPES = ["O+", "A+", "B+", "AB+", "O-", "A-", "B-", "AB-"]
+BLOOD_TYPE_SHARES = [0.37, 0.30, 0.20, 0.05, 0.04, 0.02, 0.015, 0.005]
+
+
+def sample_times(start, end, freq):
+    # One shared time axis; any pandas frequency works ("min", "h", "D", "ME", ...)
+    return pd.date_range(start=start, end=end, freq=freq).values.astype("datetime64[s]")
+
+
+def _batch_rng(seed, batch_index):
+    return np.random.default_rng(np.random.SeedSequence([seed, batch_index]))
+
+
+def generate_vitals_batch(patient_ids, times, seed=42, batch_index=0, vary_patients=True):
+    # Columns for len(patient_ids) x len(times) readings, patient-major and time-sorted.
+    # With vary_patients=False every patient is centred on the population mean.
+    rng = _batch_rng(seed, batch_index)
+    n_patients, n_times = len(patient_ids), len(times)
+    columns = {
+        "patient_id": np.repeat(np.asarray(patient_ids, dtype=np.int32), n_times),
+        "Date": np.tile(times, n_patients),
+    }
+    for name, (mean, between_sd, within_sd, drift_sd) in VITAL_SPECS.items():
+        baseline = rng.normal(mean, between_sd if vary_patients else 0.0, size=(n_patients, 1))
+        values = baseline + rng.normal(0.0, within_sd, size=(n_patients, n_times))
+        if drift_sd:
+            values += np.cumsum(rng.normal(0.0, drift_sd, size=(n_patients, n_times)), axis=1)
+        columns[name] = values.astype(np.float32).ravel()
+    return columns
+
+
+def iter_vitals(n_patients, start, end, freq, seed=42, batch_patients=64, vary_patients=True):
+    # Yields column dicts for `batch_patients` patients at a time so per-minute
+    # data for large cohorts never has to fit in memory at once. Batches are
+    # seeded by position, so the same arguments always give the same readings.
+    times = sample_times(start, end, freq)
+    for batch_index, first in enumerate(range(0, n_patients, batch_patients)):
+        patient_ids = np.arange(first, min(first + batch_patients, n_patients))
+        yield generate_vitals_batch(patient_ids, times, seed=seed, batch_index=batch_index,
+                                    vary_patients=vary_patients)
+
+
+def generate_vitals(n_patients, start, end, freq, seed=42, batch_patients=64, vary_patients=True):
+    batches = list(iter_vitals(n_patients, start, end, freq, seed=seed, batch_patients=batch_patients,
+                               vary_patients=vary_patients))
+    if not batches:
+        # No patients: the same columns and dtypes, with no rows
+        return generate_vitals_batch([], sample_times(start, end, freq), seed=seed)
+    return {name: np.concatenate([batch[name] for batch in batches]) for name in batches[0]}
+
+
+def vitals_frame(columns):
+    frame = pd.DataFrame(columns)
+    frame["Date"] = pd.to_datetime(frame["Date"])
+    return frame
+
+
+def generate_patients(n_patients, seed=42):
+    rng = np.random.default_rng(np.random.SeedSequence([seed, 0xBA5E]))
+    ids = np.arange(n_patients, dtype=np.int32)
+    age = rng.integers(18, 90, size=n_patients).astype(np.int16)
+    gender = np.where(rng.random(n_patients) < 0.5, "Male", "Female")
+    height_cm = np.where(gender == "Male", rng.normal(172, 7, n_patients), rng.normal(159, 6, n_patients))
+    weight_kg = rng.normal(VITAL_SPECS["Weight"][0], VITAL_SPECS["Weight"][1], n_patients).clip(40, 160)
+    names = np.array(FIRST_NAMES)[ids % len(FIRST_NAMES)]
+    return pd.DataFrame({
+        "patient_id": ids,
+        "Name": [f"{name} #{i}" for name, i in zip(names, ids)],
+        "Age": age,
+        "Gender": gender,
+        "Blood Type": rng.choice(BLOOD_TYPES, size=n_patients, p=BLOOD_TYPE_SHARES),
+        "Height": height_cm.round(0).astype(np.float32),
+        "Weight": weight_kg.round(1).astype(np.float32),
+        "BMI": (weight_kg / (height_cm / 100) ** 2).round(1).astype(np.float32),
+    })
+
+
+# test: (unit, reference range, population mean, sd)
+LAB_PANEL = {
+    "Hemoglobin": ("g/dL", "13.5-17.5", 14.5, 1.2),
+    "White Blood Cells": ("10³/μL", "4.0-11.0", 7.0, 1.8),
+    "Cholesterol": ("mg/dL", "<200", 190.0, 30.0),
+    "HDL": ("mg/dL", ">40", 50.0, 12.0),
+    "LDL": ("mg/dL", "<100", 110.0, 25.0),
+    "Triglycerides": ("mg/dL", "<150", 140.0, 40.0),
+    "Creatinine": ("mg/dL", "0.7-1.3", 1.0, 0.2),
+    "BUN": ("mg/dL", "7-20", 14.0, 4.0),
+}
+
+
+def generate_lab_history(n_patients, start, end, freq, seed=42):
+    # Long table of one result per patient, draw date and test in LAB_PANEL
+    rng = np.random.default_rng(np.random.SeedSequence([seed, 0x1AB]))
+    return _lab_frame(np.arange(n_patients, dtype=np.int32), sample_times(start, end, freq), rng)
+
+
+def generate_lab_batch(patient_ids, times, seed=42, batch_index=0):
+    # Same table for one batch of patients, seeded by position like generate_vitals_batch
+    rng = np.random.default_rng(np.random.SeedSequence([seed, batch_index, 0x1AB]))
+    return _lab_frame(np.asarray(patient_ids, dtype=np.int32), times, rng)
+
+
+def _lab_frame(patient_ids, times, rng):
+    tests = list(LAB_PANEL)
+    units, ranges, means, sds = (np.array(values) for values in zip(*LAB_PANEL.values()))
+    means, sds = means.astype(np.float64), sds.astype(np.float64)
+    n_patients, n_times, n_tests = len(patient_ids), len(times), len(tests)
+
+    # Patient offsets persist across draws; each draw adds its own noise
+    offsets = rng.normal(0.0, 0.7, size=(n_patients, 1, n_tests)) * sds
+    values = means + offsets + rng.normal(0.0, 0.5, size=(n_patients, n_times, n_tests)) * sds
+    values = np.round(np.clip(values, 0, None), 1).astype(np.float32)
+
+    size = n_patients * n_times * n_tests
+    return pd.DataFrame({
+        "patient_id": np.repeat(patient_ids, n_times * n_tests),
+        "Date": pd.to_datetime(np.tile(np.repeat(times, n_tests), n_patients)),
+        "Test": pd.Categorical(np.tile(tests, n_patients * n_times), categories=tests),
+        "Value": values.ravel(),
+        "Unit": np.tile(units, size // n_tests),
+        "Reference_Range": np.tile(ranges, size // n_tests),
+    })
+
+
+# condition: (prevalence, share of diagnosed patients per status)
+CONDITION_PANEL = {
+    "Hypertension": (0.30, {"Ongoing": 0.45, "Controlled": 0.40, "Managed": 0.15}),
+    "Type 2 Diabetes": (0.12, {"Ongoing": 0.35, "Controlled": 0.50, "Managed": 0.15}),
+    "High Cholesterol": (0.25, {"Ongoing": 0.50, "Controlled": 0.35, "Managed": 0.15}),
+    "Anxiety": (0.10, {"Ongoing": 0.30, "Managed": 0.50, "Resolved": 0.20}),
+}
+
+
+def generate_conditions_batch(patient_ids, seed=42, batch_index=0):
+    # One row per diagnosed (patient, condition) with its current status
+    rng = np.random.default_rng(np.random.SeedSequence([seed, batch_index, 0xC0D]))
+    patient_ids = np.asarray(patient_ids, dtype=np.int32)
+    frames = []
+    for condition, (prevalence, status_shares) in CONDITION_PANEL.items():
+        diagnosed = patient_ids[rng.random(len(patient_ids)) < prevalence]
+        statuses = rng.choice(list(status_shares), size=len(diagnosed), p=list(status_shares.values()))
+        frames.append(pd.DataFrame({"patient_id": diagnosed, "Condition": condition, "Status": statuses}))
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,247 @@
+# utils/vitals_store.py
+# On-disk vitals partitioned by patient and calendar month. Each partition
+# is a directory of .npy column files sorted by time; a per-patient manifest
+# keeps every partition's time bounds, so a date-range query opens only the
+# partitions it overlaps and binary-searches the memory-mapped Date column
+# for the exact rows, leaving the rest of the file untouched.
+#
+# Partitions are never modified in place: a write builds a new versioned
+# directory and then publishes a new manifest that points at it. A reader
+# takes one manifest snapshot and only opens the directories it names, so a
+# concurrent write can never show it a half-updated patient. Replaced
+# directories are deleted once no reader can still be using them; any that an
+# earlier process left behind are deleted when the store opens.
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import streamlit as st
+
+from utils.config import DATA_DIR
+from utils.lazy_imports import np, pd
+from utils.vitals_generator import VITAL_COLUMNS
+
+TIME_COLUMN = "Date"
+COLUMNS = [TIME_COLUMN] + VITAL_COLUMNS
+# Seconds a replaced partition directory is kept for readers holding an older manifest
+RETIRE_SECONDS = 60
+
+
+def _to_seconds(value):
+    return np.datetime64(pd.Timestamp(value).to_datetime64(), "s")
+
+
+class VitalsStore:
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        # Guards writes and manifest loads; readers never take it
+        self._lock = threading.RLock()
+        self._manifests = {}
+        self._retired = []
+        self._listeners = []
+        self._delete_orphans()
+
+    # --- layout ---
+
+    def _patient_dir(self, patient_id):
+        return self.root / f"patient={int(patient_id):06d}"
+
+    def _partition_dir(self, patient_id, month, meta):
+        # Manifests written before partitions were versioned name no directory
+        return self._patient_dir(patient_id) / meta.get("dir", month)
+
+    def _manifest(self, patient_id):
+        # The current snapshot; published manifests are never mutated
+        manifest = self._manifests.get(patient_id)
+        if manifest is None:
+            with self._lock:
+                manifest = self._manifests.get(patient_id)
+                if manifest is None:
+                    path = self._patient_dir(patient_id) / "manifest.json"
+                    if path.exists():
+                        manifest = json.loads(path.read_text())
+                    else:
+                        manifest = {"version": 0, "partitions": {}}
+                    self._manifests[patient_id] = manifest
+        return manifest
+
+    def _save_manifest(self, patient_id, manifest):
+        path = self._patient_dir(patient_id) / "manifest.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest, sort_keys=True))
+        os.replace(tmp, path)
+
+    # --- writes ---
+
+    def subscribe(self, listener):
+        # listener(columns) is called with every batch after it has been written
+        self._listeners.append(listener)
+
+    def write(self, columns):
+        # Appends readings (column dict with patient_id, Date and vitals, any
+        # order). Only the partitions that receive rows are rewritten.
+        patient_ids = np.asarray(columns["patient_id"])
+        times = np.asarray(columns[TIME_COLUMN]).astype("datetime64[s]")
+        months = times.astype("datetime64[M]")
+        order = np.lexsort((times, months, patient_ids))
+        patient_ids, months = patient_ids[order], months[order]
+        boundaries = np.flatnonzero((np.diff(patient_ids) != 0) | (np.diff(months) != np.timedelta64(0, "M"))) + 1
+        starts = np.concatenate([[0], boundaries])
+        stops = np.concatenate([boundaries, [len(order)]])
+
+        updated = {}
+        with self._lock:
+            for start, stop in zip(starts, stops):
+                if start == stop:
+                    continue
+                rows = order[start:stop]
+                patient_id = int(patient_ids[start])
+                block = {TIME_COLUMN: times[rows]}
+                for name in VITAL_COLUMNS:
+                    block[name] = np.asarray(columns[name])[rows].astype(np.float32)
+                if patient_id not in updated:
+                    current = self._manifest(patient_id)
+                    updated[patient_id] = {"version": current["version"] + 1, "partitions": dict(current["partitions"])}
+                self._write_partition(patient_id, str(months[start]), block, updated[patient_id])
+            # Publish: readers that start from here on see the new partitions
+            for patient_id, manifest in updated.items():
+                self._save_manifest(patient_id, manifest)
+                self._manifests[patient_id] = manifest
+            self._delete_retired()
+        for listener in self._listeners:
+            listener(columns)
+        return sorted(updated)
+
+    def _write_partition(self, patient_id, month, block, manifest):
+        # Writes the partition to a new directory and points `manifest` (not yet published) at it
+        previous = manifest["partitions"].get(month)
+        if previous is not None:
+            directory = self._partition_dir(patient_id, month, previous)
+            existing = {name: np.load(directory / f"{name}.npy") for name in COLUMNS}
+            block = {name: np.concatenate([existing[name], block[name]]) for name in COLUMNS}
+            order = np.argsort(block[TIME_COLUMN], kind="stable")
+            block = {name: values[order] for name, values in block.items()}
+
+        name = f"{month}.v{manifest['version']}"
+        staging = self._patient_dir(patient_id) / (name + ".staging")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        for column, values in block.items():
+            np.save(staging / f"{column}.npy", values)
+        os.replace(staging, self._patient_dir(patient_id) / name)
+        if previous is not None:
+            self._retired.append((time.monotonic(), directory))
+
+        manifest["partitions"][month] = {
+            "dir": name,
+            "start": int(block[TIME_COLUMN][0].astype(np.int64)),
+            "end": int(block[TIME_COLUMN][-1].astype(np.int64)),
+            "rows": int(len(block[TIME_COLUMN])),
+        }
+
+    def _delete_orphans(self):
+        # Versioned directories the current manifest does not name: replaced
+        # ones still waiting out RETIRE_SECONDS when the last process stopped,
+        # and writes (or staging copies) whose manifest was never published.
+        # Nothing reads from this store yet, so none of them can be in use.
+        for patient_dir in self.root.glob("patient=*"):
+            manifest = self._manifest(int(patient_dir.name.partition("=")[2]))
+            referenced = {meta.get("dir", month) for month, meta in manifest["partitions"].items()}
+            for directory in patient_dir.glob("*.v*"):
+                if directory.is_dir() and directory.name not in referenced:
+                    shutil.rmtree(directory, ignore_errors=True)
+
+    def _delete_retired(self):
+        cutoff = time.monotonic() - RETIRE_SECONDS
+        while self._retired and self._retired[0][0] < cutoff:
+            shutil.rmtree(self._retired.pop(0)[1], ignore_errors=True)
+
+    # --- reads ---
+
+    def has_patient(self, patient_id):
+        return bool(self._manifest(patient_id)["partitions"])
+
+    def version(self, patient_id):
+        return self._manifest(patient_id)["version"]
+
+    def time_bounds(self, patient_id):
+        partitions = self._manifest(patient_id)["partitions"].values()
+        if not partitions:
+            return None
+        start = min(p["start"] for p in partitions)
+        end = max(p["end"] for p in partitions)
+        return pd.Timestamp(start, unit="s"), pd.Timestamp(end, unit="s")
+
+    def row_count(self, patient_id):
+        return sum(p["rows"] for p in self._manifest(patient_id)["partitions"].values())
+
+    def _overlapping(self, manifest, start, end):
+        # Partition pruning: only months whose [start, end] overlaps the query
+        lo = int(start.astype(np.int64)) if start is not None else None
+        hi = int(end.astype(np.int64)) if end is not None else None
+        for month, meta in sorted(manifest["partitions"].items()):
+            if (hi is None or meta["start"] <= hi) and (lo is None or meta["end"] >= lo):
+                yield month, meta
+
+    def read(self, patient_id, start=None, end=None, columns=None):
+        # Rows with start <= Date <= end (either bound optional) as column arrays
+        start = _to_seconds(start) if start is not None else None
+        end = _to_seconds(end) if end is not None else None
+        names = [TIME_COLUMN] + [c for c in (columns or VITAL_COLUMNS) if c != TIME_COLUMN]
+        pieces = {name: [] for name in names}
+        for month, meta in self._overlapping(self._manifest(patient_id), start, end):
+            directory = self._partition_dir(patient_id, month, meta)
+            times = np.load(directory / f"{TIME_COLUMN}.npy", mmap_mode="r")
+            lo = np.searchsorted(times, start, side="left") if start is not None else 0
+            hi = np.searchsorted(times, end, side="right") if end is not None else len(times)
+            if lo >= hi:
+                continue
+            for name in names:
+                values = times if name == TIME_COLUMN else np.load(directory / f"{name}.npy", mmap_mode="r")
+                pieces[name].append(np.array(values[lo:hi]))
+        return {
+            name: np.concatenate(parts) if parts else np.array([], dtype="datetime64[s]" if name == TIME_COLUMN else np.float32)
+            for name, parts in pieces.items()
+        }
+
+    def read_frame(self, patient_id, start=None, end=None, columns=None):
+        return _frame(self.read(patient_id, start, end, columns))
+
+    def head(self, patient_id, n):
+        # First n readings, reading partitions from the oldest until n are found
+        return self._edge(patient_id, n, newest=False)
+
+    def tail(self, patient_id, n):
+        # Latest n readings, reading partitions from the newest until n are found
+        return self._edge(patient_id, n, newest=True)
+
+    def _edge(self, patient_id, n, newest):
+        pieces, rows = [], 0
+        for month, meta in sorted(self._manifest(patient_id)["partitions"].items(), reverse=newest):
+            directory = self._partition_dir(patient_id, month, meta)
+            pieces.append({name: np.load(directory / f"{name}.npy") for name in COLUMNS})
+            rows += len(pieces[-1][TIME_COLUMN])
+            if rows >= n:
+                break
+        if newest:
+            pieces.reverse()
+        if not pieces:
+            return _frame(self.read(patient_id, end="1970-01-01"))
+        columns = {name: np.concatenate([piece[name] for piece in pieces]) for name in COLUMNS}
+        frame = _frame(columns)
+        return (frame.tail(n) if newest else frame.head(n)).reset_index(drop=True)
+
+
+def _frame(columns):
+    frame = pd.DataFrame(columns)
+    frame[TIME_COLUMN] = pd.to_datetime(frame[TIME_COLUMN])
+    return frame
+
+
+@st.cache_resource
+def get_vitals_store():
+    return VitalsStore(DATA_DIR / "vitals")
@@ -0,0 +1,78 @@
+# utils/warmup.py
+# Loads the assistant's model once per server process, in the background, so
+# the first real question does not pay for reading the weights into memory.
+import threading
+import time
+
+import streamlit as st
+
+from utils import config
+from utils.llm_client import get_llm_client
+
+# Seconds between warm-up attempts while Ollama is unreachable, doubling up to the cap
+RETRY_INITIAL = 2.0
+RETRY_MAX = 60.0
+
+
+class ModelReadiness:
+    def __init__(self, model):
+        self.model = model
+        self.state = "loading"
+        self.error = None
+        self.started = time.monotonic()
+        self.elapsed = None
+        self.retry_in = None
+
+    def mark(self, state, error=None, retry_in=None):
+        self.state = state
+        self.error = error
+        self.retry_in = retry_in
+        self.elapsed = time.monotonic() - self.started
+
+
+def warm_up(client, readiness, system_prompt, retry_initial=RETRY_INITIAL, retry_max=RETRY_MAX):
+    # A one-token reply to the fixed system prompt loads the weights, pins them
+    # with the client's keep_alive and leaves the system prompt in Ollama's
+    # prompt cache for the first real request to reuse. If Ollama is down
+    # (e.g. still starting), keep trying with backoff instead of reporting the
+    # model unavailable until the server restarts.
+    delay = retry_initial
+    while True:
+        try:
+            client.chat(
+                readiness.model,
+                [{"role": "system", "content": system_prompt}, {"role": "user", "content": "Hello"}],
+                options={"num_predict": 1},
+            )
+            readiness.mark("ready")
+            return
+        except Exception as e:
+            readiness.mark("error", str(e), retry_in=delay)
+        time.sleep(delay)
+        delay = min(delay * 2, retry_max)
+
+
+@st.cache_resource
+def get_model_readiness():
+    readiness = ModelReadiness(config.LLM_MODEL)
+    if not config.LLM_WARMUP:
+        readiness.mark("skipped")
+        return readiness
+    thread = threading.Thread(
+        target=warm_up,
+        args=(get_llm_client(), readiness, config.SYSTEM_PROMPT),
+        name="model-warmup",
+        daemon=True,
+    )
+    thread.start()
+    return readiness
+
+
+def show_model_status():
+    readiness = get_model_readiness()
+    if readiness.state == "ready":
+        st.sidebar.success(f"🟢 {readiness.model} ready (loaded in {readiness.elapsed:.1f}s)")
+    elif readiness.state == "loading":
+        st.sidebar.info(f"🟡 Loading {readiness.model}… the first answer may take a little longer.")
+    elif readiness.state == "error":
+        st.sidebar.error(f"🔴 {readiness.model} unavailable: {readiness.error} (retrying, next attempt within {readiness.retry_in:.0f}s)")
@@ -0,0 +1,53 @@
+# utils/worker_pool.py
+# Process pools that are safe to start from the Streamlit server.
+#
+# Forking the server would copy whatever locks its other threads (the forum's
+# like flusher, the link checker, the model warm-up) hold at that moment, so
+# workers come from a forkserver instead: a fresh interpreter with no threads
+# that imports the worker modules once and forks every worker from itself.
+#
+# multiprocessing also tells every new worker to re-run the parent's
+# __main__, which under Streamlit is whichever page script ran last. Workers
+# are started by submit(), so the pool hides __main__ for the length of each
+# submit and the workers only import the modules their tasks come from.
+import multiprocessing
+import sys
+import threading
+import types
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+_main_lock = threading.Lock()
+
+
+@contextmanager
+def _hidden_main():
+    # An empty __main__ has no file or spec for a new process to re-import
+    with _main_lock:
+        main = sys.modules.get("__main__")
+        stand_in = sys.modules["__main__"] = types.ModuleType("__main__")
+        try:
+            yield
+        finally:
+            # Unless a script run has installed its own __main__ meanwhile
+            if sys.modules.get("__main__") is stand_in:
+                if main is None:
+                    del sys.modules["__main__"]
+                else:
+                    sys.modules["__main__"] = main
+
+
+class WorkerPool(ProcessPoolExecutor):
+    def submit(self, fn, /, *args, **kwargs):
+        with _hidden_main():
+            return super().submit(fn, *args, **kwargs)
+
+
+def make_process_pool(max_workers, preload=()):
+    # None where there is no forkserver (Windows); callers then run serially.
+    # `preload` modules are imported once in the forkserver, not per worker.
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return None
+    ctx = multiprocessing.get_context("forkserver")
+    ctx.set_forkserver_preload(list(preload))
+    return WorkerPool(max_workers=max_workers, mp_context=ctx)